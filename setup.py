@@ -162,6 +162,7 @@ setup(
                 'veusz/helpers/src/threed/clipcontainer.cpp',
                 'veusz/helpers/src/threed/bsp.cpp',
                 'veusz/helpers/src/threed/twod.cpp',
+                'veusz/helpers/src/threed/zbuffer.cpp',
                 'veusz/helpers/src/threed/threed.sip'
             ],
             language="c++",
@@ -213,6 +214,7 @@ setup(
                 'veusz/helpers/src/qtloops/beziers.cpp',
                 'veusz/helpers/src/qtloops/beziers_qtwrap.cpp',
                 'veusz/helpers/src/qtloops/numpyfuncs.cpp',
+                'veusz/helpers/src/qtloops/delaunay.cpp',
                 'veusz/helpers/src/qtloops/qtloops.sip'],
             language="c++",
             include_dirs=[
@@ -0,0 +1,108 @@
+import os
+import sys
+import tempfile
+
+import numpy as N
+
+import veusz.qtall as qt
+import veusz.utils as utils
+import veusz.document as document
+import veusz.widgets
+
+# Contour scattered points, with lines and fills, and check the
+# traced contours. The checks are written to the output, rather
+# than the rendered document, as the order of the points in the
+# traced lines depends on the triangulation.
+
+def polygonArea(pts):
+    """Signed area of polygon."""
+    x, y = pts[:,0], pts[:,1]
+    return 0.5*N.sum(x*N.roll(y, -1) - N.roll(x, -1)*y)
+
+def isClosed(pts):
+    return len(pts) > 2 and N.all(pts[0] == pts[-1])
+
+def main(outfile):
+    app = qt.QApplication([])
+
+    rs = N.random.RandomState(42)
+    x = rs.uniform(-1, 1, 300)
+    y = rs.uniform(-1, 1, 300)
+    z = N.exp(-4*(x**2 + y**2)) + 0.2*x
+
+    doc = document.Document()
+    ifc = document.CommandInterface(doc)
+    ifc.SetData('x', x)
+    ifc.SetData('y', y)
+    ifc.SetData('z', z)
+
+    ifc.To(ifc.Add('page'))
+    ifc.To(ifc.Add('graph'))
+    ifc.Add(
+        'contour', name='contour', scattered=True,
+        xData='x', yData='y', zData='z', numLevels=6)
+    ifc.Set('contour/Fills/fills', [
+        ('solid', 'red', False), ('solid', 'green', False),
+        ('solid', 'blue', False)])
+    ifc.Set('contour/SubLines/hide', False)
+    ifc.Set('x/TickLabels/hide', True)
+    ifc.Set('y/TickLabels/hide', True)
+
+    # draw document to trace the contours
+    fd, tempname = tempfile.mkstemp(suffix='.svg')
+    os.close(fd)
+    try:
+        ifc.Export(tempname)
+    finally:
+        os.unlink(tempname)
+
+    contour = doc.resolveWidgetPath(None, '/page1/graph1/contour')
+    levels = contour.settings.levelsOut
+    lines = contour._cachedcontours
+    polygons = contour._cachedpolygons
+
+    # area of the convex hull is the area of the triangulation
+    tri = utils.Triangulation(x, y)
+    tx, ty = x[tri.triangles], y[tri.triangles]
+    hullarea = 0.5*N.sum(N.abs(
+        (tx[:,1]-tx[:,0])*(ty[:,2]-ty[:,0]) -
+        (ty[:,1]-ty[:,0])*(tx[:,2]-tx[:,0]) ))
+
+    # the levels span the data, so the fills between them should
+    # cover the hull, where holes have the opposite sign
+    bandareas = [sum(polygonArea(p) for p in pl) for pl in polygons]
+
+    # values on the edge of the hull
+    outer = tri.neighbours < 0
+    edgez = z[tri.triangles[outer]].max()
+
+    out = []
+    out.append('levels: %i' % len(levels))
+    out.append('line levels traced: %i' % len(lines))
+    out.append('fill levels traced: %i' % len(polygons))
+    out.append('bands have positive area: %s' % all(
+        a > 0 for a in bandareas))
+    out.append('bands cover hull: %s' % N.allclose(
+        sum(bandareas), hullarea))
+    out.append('polygons closed: %s' % all(
+        isClosed(p) for pl in polygons for p in pl))
+    out.append('interior levels: %i' % N.sum(
+        N.array(levels[1:-1]) > edgez))
+    out.append('interior lines closed: %s' % all(
+        isClosed(p)
+        for level, ll in zip(levels, lines) if level > edgez
+        for p in ll))
+
+    # each band on its own, including open ends
+    contourer = tri.contourer(z)
+    edges = [-N.inf] + list(levels[1:-1]) + [N.inf]
+    total = 0.
+    for low, high in zip(edges[:-1], edges[1:]):
+        total += sum(polygonArea(p) for p in contourer.polygons(low, high))
+    out.append('open bands cover hull: %s' % N.allclose(total, hullarea))
+
+    with open(outfile, 'w') as f:
+        f.write('\n'.join(out) + '\n')
+
+if __name__ == '__main__':
+    main(sys.argv[1])
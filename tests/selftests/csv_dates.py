@@ -0,0 +1,79 @@
+import os
+import sys
+
+import numpy as N
+
+import veusz.qtall as qt
+from veusz.dataimport import defn_csv, readcsv
+
+# Import dates from a CSV file, including blanks, text and invalid
+# dates, in different header modes. The dates in a file are
+# converted together after reading, so also check that the datasets
+# are the same as when converting each value as it is read.
+
+thisdir = os.path.dirname(os.path.abspath(__file__))
+
+def readBulk(params):
+    """Read datasets converting dates after reading."""
+    reader = readcsv.ReadCSV(params)
+    reader.readData()
+    out = {}
+    reader.setData(out)
+    return out
+
+def readEach(params):
+    """Read datasets converting each date as it is read."""
+    reader = readcsv.ReadCSV(params)
+    reader.deferdates = False
+    reader._readFile()
+    out = {}
+    reader.setData(out)
+    return out
+
+def sameDatasets(ds1, ds2):
+    if sorted(ds1) != sorted(ds2):
+        return False
+    for name in ds1:
+        d1, d2 = ds1[name], ds2[name]
+        if type(d1) != type(d2):
+            return False
+        if d1.dstype == 'Text':
+            if list(d1.data) != list(d2.data):
+                return False
+        elif not N.array_equal(d1.data, d2.data, equal_nan=True):
+            return False
+    return True
+
+def describe(datasets):
+    out = []
+    for name in sorted(datasets):
+        ds = datasets[name]
+        if ds.dstype == 'Text':
+            vals = ' '.join(repr(v) for v in ds.data)
+        else:
+            vals = ' '.join(repr(float(v)) for v in ds.data)
+        out.append('  %s (%s): %s' % (name, ds.dstype, vals))
+    return out
+
+def main(outfile):
+    app = qt.QApplication([])
+
+    out = []
+    for headermode, blanksaredata in (
+            ('multi', False), ('1st', False), ('1st', True)):
+        params = defn_csv.ImportParamsCSV(
+            filename=os.path.join(thisdir, 'csv_dates.csv'),
+            headermode=headermode, blanksaredata=blanksaredata)
+        datasets = readBulk(params)
+
+        out.append('headermode=%s blanksaredata=%s' % (
+            headermode, blanksaredata))
+        out.append(' same as converting each value: %s' % sameDatasets(
+            datasets, readEach(params)))
+        out += describe(datasets)
+
+    with open(outfile, 'w') as f:
+        f.write('\n'.join(out) + '\n')
+
+if __name__ == '__main__':
+    main(sys.argv[1])
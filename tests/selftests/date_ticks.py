@@ -0,0 +1,92 @@
+import datetime
+import sys
+
+import numpy as N
+
+import veusz.utils as utils
+
+# Check that formatting lists of numbers, and making ranges of
+# dates, which are done for whole arrays of values, give the same
+# results as formatting each number and stepping each date.
+
+formats = [
+    '%VDY-%VDm-%VDd',
+    '%VDH:%VDM:%VDS',
+    '%VDd/%VDm/%VDY %VDH:%VDM',
+    '%VDVS',
+    '%VDY %VDb %VDa %VDj',
+    '%Vg',
+    '%.3f%%',
+    'text',
+]
+
+def testValues():
+    """Dates as floats to format."""
+    dt = utils.datetimeToFloat
+    vals = [
+        0., -0.5, -1e-7, 59.9999995, 60.0000004, -86400.0000001,
+        dt(datetime.datetime(1969, 12, 31, 23, 59, 59, 999999)),
+        dt(datetime.datetime(1970, 1, 1)) - 0.25,
+        dt(datetime.datetime(1900, 2, 28, 12, 30, 15, 500000)),
+        dt(datetime.datetime(2000, 2, 29, 23, 59, 59, 999500)),
+        dt(datetime.datetime(1000, 1, 1, 0, 0, 0, 1)),
+        dt(datetime.datetime(999, 12, 31, 23, 59, 59)),
+        dt(datetime.datetime(2100, 3, 1, 6, 7, 8, 900000)),
+    ]
+    rs = N.random.RandomState(7)
+    vals += list(rs.uniform(-3e10, 6e9, 200))
+    vals += list(rs.uniform(-1e5, 1e5, 50))
+    return vals
+
+def testRanges():
+    """Ranges (start, end, time tuple) for date ticks."""
+    D = datetime.datetime
+    return [
+        (D(2009, 1, 1), D(2009, 1, 2), (0, 0, 0, 1, 0, 0, 0)),
+        (D(1969, 12, 31, 23, 59, 58, 500000), D(1970, 1, 1, 0, 0, 2),
+         (0, 0, 0, 0, 0, 0, 250000)),
+        (D(1960, 1, 1, 0, 0, 0, 100), D(1960, 1, 1, 0, 0, 0, 900),
+         (0, 0, 0, 0, 0, 0, 7)),
+        (D(1899, 12, 25), D(1901, 2, 1), (0, 0, 7, 0, 0, 0, 0)),
+        (D(1950, 1, 15, 12), D(1953, 7, 1), (0, 1, 0, 0, 0, 0, 0)),
+        (D(1968, 11, 1), D(1972, 3, 1), (0, 3, 0, 0, 0, 0, 0)),
+        (D(2001, 1, 28, 6), D(2001, 12, 31), (0, 1, 0, 0, 0, 0, 0)),
+        (D(1900, 1, 1), D(2100, 1, 1), (10, 0, 0, 0, 0, 0, 0)),
+        (D(1800, 6, 1), D(1810, 6, 1), (1, 6, 0, 0, 0, 0, 0)),
+        (D(1996, 2, 28), D(2012, 3, 1), (1, 0, 0, 0, 0, 0, 0)),
+        (D(2020, 5, 5), D(2020, 5, 1), (0, 0, 1, 0, 0, 0, 0)),
+    ]
+
+def stepRange(start, end, tt):
+    """Make range by stepping each date."""
+    vals = []
+    dt = start
+    while dt <= end:
+        vals.append(utils.datetimeToFloat(dt))
+        dt = utils.addTimeTupleToDateTime(dt, tt)
+    return N.array(vals)
+
+def main(outfile):
+    out = []
+
+    vals = testValues()
+    for fmt in formats:
+        each = [utils.formatNumber(v, fmt) for v in vals]
+        same = utils.formatNumbers(vals, fmt) == each
+        out.append('format %r: same as formatNumber: %s' % (fmt, same))
+        # avoid unicode characters (e.g. minus signs) in output
+        out.append('  ' + ' | '.join(each[:11]).encode(
+            'ascii', 'xmlcharrefreplace').decode('ascii'))
+
+    for start, end, tt in testRanges():
+        steps = stepRange(start, end, tt)
+        rng = utils.timeTupleRange(start, end, tt)
+        out.append('range %s to %s by %s: %i values, same as stepping: %s' % (
+            start.isoformat(), end.isoformat(), tt, len(steps),
+            len(rng) == len(steps) and bool(N.all(rng == steps))))
+
+    with open(outfile, 'w') as f:
+        f.write('\n'.join(out) + '\n')
+
+if __name__ == '__main__':
+    main(sys.argv[1])
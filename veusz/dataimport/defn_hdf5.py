@@ -348,20 +348,13 @@ class OperationDataImportHDF5(base.OperationDataImportBase):
                 fmt = 'YYYY-MM-DD|T|hh:mm:ss'
 
             try:
-                datere = re.compile(utils.dateStrToRegularExpression(fmt))
+                re.compile(utils.dateStrToRegularExpression(fmt))
             except Exception:
                 raise base.ImportingError(
                     _("Could not interpret date-time syntax '%s'") % fmt)
 
-            dout = N.empty(len(data), dtype=N.float64)
-            for i, ditem in enumerate(data):
-                ditem = bconv(ditem)
-                try:
-                    match = datere.match(ditem)
-                    val = utils.dateREMatchToDate(match)
-                except ValueError:
-                    val = N.nan
-                dout[i] = val
+            dout = utils.dateFormatStringsToFloats(
+                [bconv(d) for d in data], fmt)
 
             ds = datasets.DatasetDateTime(dout)
 
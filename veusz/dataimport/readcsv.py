@@ -309,7 +309,13 @@ class ReadCSV:
                     raise ValueError
             elif ctype == 'date':
                 m = self.datere.match(col)
-                v = utils.dateREMatchToDate(m)
+                if self.deferdates:
+                    # converted together after reading
+                    if m is None or m.lastindex is None:
+                        raise ValueError
+                    v = col
+                else:
+                    v = utils.dateREMatchToDate(m)
             elif ctype == 'string':
                 v = col
             else:
@@ -325,6 +331,19 @@ class ReadCSV:
     def readData(self):
         """Read the data into the document."""
 
+        # dates are converted together after reading the file
+        self.deferdates = True
+        self._readFile()
+        if not self._convertDates() and self.params.headermode != '1st':
+            # an invalid date should have started a new dataset, so
+            # read again converting dates as they are read
+            self.deferdates = False
+            self.data = {}
+            self._readFile()
+
+    def _readFile(self):
+        """Read the values in the file."""
+
         par = self.params
 
         # open the csv file
@@ -341,13 +360,6 @@ class ReadCSV:
         else:
             it = _FileReaderCols(csvf)
 
-        # ignore rows (at top), if requested
-        for i in range(par.rowsignore):
-            try:
-                next(it)
-            except StopIteration:
-                return
-
         # dataset names for each column
         self.colnames = {}
         # type of column (float, string or date)
@@ -360,6 +372,13 @@ class ReadCSV:
         # type detection
         self.colblanks = {}
 
+        # ignore rows (at top), if requested
+        for i in range(par.rowsignore):
+            try:
+                next(it)
+            except StopIteration:
+                return
+
         # iterate over each line (or column)
         while True:
             try:
@@ -374,6 +393,24 @@ class ReadCSV:
                 except _NextValue:
                     pass
 
+    def _convertDates(self):
+        """Convert text values in date datasets to dates.
+
+        Returns False if any could not be converted."""
+        allvalid = True
+        for name, dtype in self.nametypes.items():
+            if dtype != 'date':
+                continue
+            vals = self.data[name]
+            idxs = [i for i, v in enumerate(vals) if isinstance(v, str)]
+            dates = utils.dateFormatStringsToFloats(
+                [vals[i] for i in idxs], self.params.dateformat)
+            for i, v in zip(idxs, dates.tolist()):
+                vals[i] = v
+            if N.any(N.isnan(dates)):
+                allvalid = False
+        return allvalid
+
     def setData(self, outmap, linkedfile=None):
         """Set the read-in datasets in the dict outmap."""
 
@@ -278,7 +278,8 @@ class DescriptorPart:
                         dat = val
 
                 elif self.datatype == 'date':
-                    dat = utils.dateStringToDate(val)
+                    # converted in setOutput
+                    dat = val
 
                 # add data into dataset
                 dataset.append(dat)
@@ -333,6 +334,7 @@ class DescriptorPart:
                                            nerr = neg, perr = pos,
                                            linked = linkedfile )
                 elif self.datatype == 'date':
+                    vals = utils.dateStringsToFloats(vals)
                     ds = datasets.DatasetDateTime( data=vals,
                                                    linked=linkedfile )
                 elif self.datatype == 'string':
@@ -18,8 +18,13 @@
 
 """Base class for all Datasets."""
 
+import itertools
+
 from .commonfn import _
 
+# source of unique version numbers for datasets
+_versioncounter = itertools.count(1)
+
 class DatasetException(Exception):
     """Raised with dataset errors."""
     pass
@@ -31,6 +36,21 @@ class DatasetExpressionException(DatasetException):
 class DatasetBase:
     """Base class for all datasets."""
 
+    def updateVersion(self):
+        """Give the dataset a new unique version number.
+
+        This should be called whenever the data in the dataset change.
+        """
+        self._version = next(_versioncounter)
+
+    @property
+    def version(self):
+        """Unique number which changes when the data are modified.
+
+        This allows cached calculations based on the dataset to be
+        checked cheaply."""
+        return self._version
+
 class DatasetConcreteBase(DatasetBase):
     """A base dataset class for datasets which are real, and not proxies,
     etc."""
@@ -67,6 +87,8 @@ class DatasetConcreteBase(DatasetBase):
         # tags applied to dataset
         self.tags = set()
 
+        self.updateVersion()
+
     def saveLinksToSavedDoc(self, fileobj, savedlinks, relpath=None):
         '''Save the link to the saved document, if this dataset is linked.
 
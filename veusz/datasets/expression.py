@@ -70,6 +70,45 @@ def substituteDatasets(datasets, expression, thispart):
 
     return ''.join(bits), dslist
 
+# calls in expressions which read the document (or the time) directly
+_docreading_re = re.compile(
+    r'\b(DATA|SETTING|FILENAME|BASENAME|DATE|TIME)\s*\(')
+
+def expressionReadsDocument(doc, exprs):
+    """Can evaluating the expressions read the document directly,
+    e.g. using DATA() or SETTING(), including in custom functions?
+
+    If so, their results may change whenever the document changes.
+    """
+    for name, val in doc.evaluate.def_definitions:
+        if _docreading_re.search(val):
+            return True
+    for expr in exprs:
+        if expr and _docreading_re.search(expr):
+            return True
+    return False
+
+def expressionDependencies(doc, exprs, part='data'):
+    """Return a value which changes if the result of evaluating the
+    expressions could change.
+
+    This includes the evaluation context and the versions of the
+    datasets used in the expressions. If the expressions can read the
+    document directly (e.g. using DATA()), the document changeset is
+    included.
+    """
+
+    names = []
+    for expr in exprs:
+        if expr:
+            names += substituteDatasets(doc.data, expr, part)[1]
+    return (
+        doc.evaluate.changeset,
+        doc.changeset if expressionReadsDocument(doc, exprs) else None,
+        tuple((n, doc.data[n].version if n in doc.data else None)
+              for n in names)
+    )
+
 def _evaluateDataset(datasets, dsname, dspart):
     """Return the dataset given.
 
@@ -259,6 +298,7 @@ class DatasetExpression(Dataset1DBase):
 
         self.docchangeset = -1
         self.evaluated = {}
+        self.lastdeps = None
 
     def evaluateDataset(self, dsname, dspart):
         """Return the dataset given.
@@ -339,6 +379,14 @@ class DatasetExpression(Dataset1DBase):
             # avoid infinite recursion!
             self.docchangeset = self.document.changeset
 
+            # values only change if the datasets used change
+            deps = expressionDependencies(
+                self.document, list(self.expr.values()))
+            if deps == self.lastdeps:
+                return ok
+            self.lastdeps = deps
+            self.updateVersion()
+
             # zero out previous values
             for part in self.columns:
                 self.evaluated[part] = None
@@ -369,6 +417,12 @@ class DatasetExpression(Dataset1DBase):
     perr = property(lambda self: self._propValues('perr'))
     nerr = property(lambda self: self._propValues('nerr'))
 
+    @property
+    def version(self):
+        """Version number, updated when expressions are reevaluated."""
+        self.updateEvaluation()
+        return self._version
+
     def saveDataRelationToText(self, fileobj, name):
         '''Save data to file.
         '''
@@ -477,6 +531,7 @@ class Dataset2DXYZExpression(Dataset2DBase):
         Dataset2DBase.__init__(self)
 
         self.lastchangeset = -1
+        self.lastdeps = None
         self.cacheddata = None
         self.xedge = self.yedge = self.xcent = self.ycent = None
 
@@ -501,7 +556,15 @@ class Dataset2DXYZExpression(Dataset2DBase):
         if self.document.changeset == self.lastchangeset:
             return self.cacheddata
         self.lastchangeset = self.document.changeset
+
+        # values only change if the datasets used change
+        deps = expressionDependencies(
+            self.document, (self.exprx, self.expry, self.exprz))
+        if deps == self.lastdeps:
+            return self.cacheddata
+        self.lastdeps = deps
         self.cacheddata = None
+        self.updateVersion()
 
         evaluated = {}
 
@@ -574,6 +637,12 @@ class Dataset2DXYZExpression(Dataset2DBase):
             return N.array( [[]] )
         return ds
 
+    @property
+    def version(self):
+        """Version number, updated when expressions are reevaluated."""
+        self.evalDataset()
+        return self._version
+
     def saveDataRelationToText(self, fileobj, name):
         '''Save expressions to file.
         '''
@@ -646,9 +715,16 @@ class Dataset2DExpression(Dataset2DBase):
         ds = self.evalDataset()
         return ds.ycent if ds is not None else None
 
+    @property
+    def version(self):
+        """Version number of evaluated dataset."""
+        ds = self.evalDataset()
+        return ds.version if ds is not None else self._version
+
     def evalDataset(self):
-        """Do actual evaluation."""
-        return evalDatasetExpression(self.document, self.expr, dimensions=2)
+        """Do actual evaluation (cached until the datasets used change)."""
+        return self.document.evaluate.evalDatasetExpression(
+            self.expr, dimensions=2)
 
     def saveDataRelationToText(self, fileobj, name):
         '''Save expression to file.'''
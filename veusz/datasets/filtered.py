@@ -21,7 +21,8 @@ import numpy as N
 from .commonfn import _
 from .base import DatasetBase
 from .oned import Dataset
-from .expression import evalDatasetExpression
+from .expression import (
+    evalDatasetExpression, substituteDatasets, expressionReadsDocument)
 
 class DatasetFilterGenerator:
     """This object is shared by all DatasetFiltered datasets, to calculate
@@ -47,32 +48,57 @@ class DatasetFilterGenerator:
         self.invert = invert
         self.replaceblanks = replaceblanks
 
+        # versions of inputs to expression when last evaluated
+        self.exprversions = None
+        # boolean filter array and indices of kept/blanked items
+        self.filterarr = None
+        self.keepidxs = self.blankidxs = None
+
+        # output datasets and versions of datasets they were made from
         self.outdatasets = {}
+        self.outversions = {}
+
+    def _filterIndices(self, minlen):
+        """Get indices of items to keep (or blank if replacing blanks)
+        in the first minlen items of the input.
+
+        The index arrays are shared between all the filtered datasets."""
+        if self.replaceblanks:
+            if self.blankidxs is None:
+                self.blankidxs = N.flatnonzero(N.logical_not(self.filterarr))
+            idxs = self.blankidxs
+        else:
+            if self.keepidxs is None:
+                self.keepidxs = N.flatnonzero(self.filterarr)
+            idxs = self.keepidxs
+        return idxs[:N.searchsorted(idxs, minlen)]
 
-    def filterNumeric(self, ds, filterarr):
+    def filterNumeric(self, ds, minlen):
         """Filter a numeric dataset."""
+        idxs = self._filterIndices(minlen)
         outdata = {}
-        minlen = len(filterarr)
         for attr in ds.columns:
             data = getattr(ds, attr)
             if data is None:
                 filtered = None
-            else:
+            elif self.replaceblanks:
                 filtered = N.array(data[:minlen])
-                if self.replaceblanks:
-                    filtered[N.logical_not(filterarr)] = N.nan
-                else:
-                    filtered = filtered[filterarr]
+                filtered[idxs] = N.nan
+            else:
+                filtered = N.take(data, idxs)
             outdata[attr] = filtered
         return ds.returnCopyWithNewData(**outdata)
 
-    def filterText(self, ds, filterarr):
+    def filterText(self, ds, minlen):
         """Filter a text dataset."""
+        idxs = self._filterIndices(minlen)
         data = ds.data
         if self.replaceblanks:
-            filtered = [(d if f else "") for f, d in zip(filterarr, data)]
+            filtered = list(data[:minlen])
+            for i in idxs:
+                filtered[i] = ""
         else:
-            filtered = [d for f, d in zip(filterarr, data) if f]
+            filtered = [data[i] for i in idxs]
         return ds.returnCopyWithNewData(data=filtered)
 
     def checkUpdate(self, doc):
@@ -83,53 +109,105 @@ class DatasetFilterGenerator:
             if log:
                 doc.log('\n'.join(log)+'\n')
 
-    def evaluateFilter(self, doc):
-        """Update filtering calculation if doc changed.
+    def _exprVersions(self, doc):
+        """Get versions of inputs to the filter expression."""
+        if self.inexpr in doc.data:
+            names = [self.inexpr]
+        else:
+            names = substituteDatasets(doc.data, self.inexpr, 'data')[1]
+        return (
+            doc.evaluate.changeset,
+            # DATA() and SETTING() can read anything in the document
+            doc.changeset if expressionReadsDocument(doc, (self.inexpr,))
+            else None,
+        ) + tuple(
+            (n, doc.data[n].version if n in doc.data else None)
+            for n in names)
+
+    def _updateFilterArray(self, doc):
+        """Reevaluate the filter expression if its inputs have changed.
 
         Returns log of errors
         """
-
-        # this is populated by output
-        self.outdatasets = {}
+        exprversions = self._exprVersions(doc)
+        if exprversions == self.exprversions:
+            return []
+        self.exprversions = exprversions
 
         # evaluate filter expression
+        filterarr = None
+        log = []
         d = evalDatasetExpression(doc, self.inexpr)
         if d is None:
-            return ["Invalid filter expression: '%s'" % self.inexpr]
-        if d.dimensions != 1:
-            return [
+            log.append("Invalid filter expression: '%s'" % self.inexpr)
+        elif d.dimensions != 1:
+            log.append(
                 _("Invalid number of dimensions in filter expression '%s'") %
-                self.inexpr]
-        if d.datatype != "numeric":
-            return [
-                _("Input filter expression non-numeric: '%s'") % self.inexpr]
+                self.inexpr)
+        elif d.datatype != "numeric":
+            log.append(
+                _("Input filter expression non-numeric: '%s'") % self.inexpr)
+        else:
+            filterarr = d.data.astype(bool)
+            if self.invert:
+                filterarr = N.logical_not(filterarr)
+
+        if log:
+            # force reevaluation next time, as errors are not cached
+            self.exprversions = None
+
+        # outputs only need updating if the filter changes
+        if ( filterarr is None or self.filterarr is None or
+             not N.array_equal(filterarr, self.filterarr) ):
+            self.filterarr = filterarr
+            self.keepidxs = self.blankidxs = None
+            self.outdatasets = {}
+            self.outversions = {}
 
-        filterarr = d.data.astype(N.bool)
-        if self.invert:
-            filterarr = N.logical_not(filterarr)
+        return log
+
+    def evaluateFilter(self, doc):
+        """Update filtering calculation if doc changed.
+
+        Output datasets are only recalculated if the filter or their
+        input datasets have changed.
+
+        Returns log of errors
+        """
+
+        log = self._updateFilterArray(doc)
+        if self.filterarr is None:
+            return log
 
         # do filtering of datasets
-        log = []
         for name in self.indatasets:
             ds = doc.data.get(name)
             if ds is None:
+                self.outdatasets.pop(name, None)
+                self.outversions.pop(name, None)
+                continue
+            version = ds.version
+            if name in self.outdatasets and self.outversions[name] == version:
+                # unchanged
                 continue
+            self.outdatasets.pop(name, None)
+
             if ds.dimensions != 1:
                 log.append(
                     _("Filtered dataset '%s' has more than 1 dimension") % name)
                 continue
-            minlen = min(len(ds.data), len(filterarr))
-            filterarrchop = filterarr[:minlen]
+            minlen = min(len(ds.data), len(self.filterarr))
 
             if ds.datatype == "numeric":
-                filtered = self.filterNumeric(ds, filterarrchop)
+                filtered = self.filterNumeric(ds, minlen)
             elif ds.datatype == "text":
-                filtered = self.filterText(ds, filterarrchop)
+                filtered = self.filterText(ds, minlen)
             else:
                 log.append(_("Could not filter dataset '%s'") % name)
                 continue
 
             self.outdatasets[name] = filtered
+            self.outversions[name] = version
         return log
 
     def saveToFile(self, doc, fileobj):
@@ -184,6 +262,12 @@ class DatasetFiltered(DatasetBase):
             else:
                 self._internalds = ds
 
+    @property
+    def version(self):
+        """Version number of the filtered data."""
+        self._checkUpdate()
+        return self._internalds.version
+
     def linkedInformation(self):
         return _("Filtered '%s' using '%s'") % (
             self.namein, self.generator.inexpr)
@@ -53,17 +53,22 @@ class DatasetHistoGenerator:
         self.bindataset = self.valuedataset = None
 
     def getData(self):
-        """Get data from input expression, caching result."""
+        """Get sorted data from input expression, caching result.
+
+        Returns a HistogramData object or None if no valid data
+        """
         if self.document.changeset != self.changeset:
+            hdata = None
             d = evalDatasetExpression(self.document, self.inexpr)
             if d is not None:
-                d = d.data
-                # only use finite data
-                d = d[N.isfinite(d)]
-                if len(d) == 0:
-                    d = None
-
-            self._cacheddata = d
+                # share sorted data with other histograms of same data
+                hdata = utils.getHistogramData(
+                    ((d.version, None), 'linear'),
+                    lambda: (d.data, None))
+                if hdata.numfinite == 0:
+                    hdata = None
+
+            self._cacheddata = hdata
             self.changeset = self.document.changeset
         return self._cacheddata
 
@@ -75,13 +80,14 @@ class DatasetHistoGenerator:
             numbins, minval, maxval, islog = self.binparams
 
             if minval == 'Auto' or maxval == 'Auto':
-                data = self.getData()
-                if data is None:
+                hdata = self.getData()
+                if hdata is None:
                     return N.array([])
+                # only finite values are used
                 if minval == 'Auto':
-                    minval = N.min(data)
+                    minval = hdata.sorted[0]
                 if maxval == 'Auto':
-                    maxval = N.max(data)
+                    maxval = hdata.sorted[-1]
 
             if not islog:
                 delta = (maxval - minval) / numbins
@@ -116,17 +122,14 @@ class DatasetHistoGenerator:
         perr = binlocs[1:] - data
         return data, nerr, perr
 
-    def getErrors(self, data, binlocs):
-        """Compute error bars if requried."""
-
-        hist, edges = N.histogram(data, bins=binlocs)
-        hist = hist.astype(N.float64)  # integers can break plots (github#49)
+    def getErrors(self, hist, hdata, binlocs):
+        """Compute error bars if requried, given counts in bins."""
 
         # calculate scaling values for error bars
         if self.method == 'density':
-            ratio = 1. / (hist.size*(edges[1]-edges[0]))
+            ratio = 1. / (hist.size*(binlocs[1]-binlocs[0]))
         elif self.method == 'fractions':
-            ratio = 1. / data.size
+            ratio = 1. / hdata.numfinite
         else:
             ratio = 1.
 
@@ -143,19 +146,29 @@ class DatasetHistoGenerator:
         return -nerr*ratio, perr*ratio
 
     def getBinVals(self):
-        """Return results for each bin."""
+        """Return results for each bin.
+
+        The counts are computed from the cached sorted data, so
+        changing the binning or mode does not require a pass over the
+        input data.
+        """
 
-        data = self.getData()
-        if data is None:
+        hdata = self.getData()
+        if hdata is None:
             return (N.array([]), None, None)
 
-        density = self.method == 'density'
         binlocs = self.binLocations()
-        hist, edges = N.histogram(data, bins=binlocs, density=density)
-        hist = hist.astype(N.float64)  # integers can break plots (github#49)
+        counts = hdata.counts(binlocs)
+        # integers can break plots (github#49)
+        counts = counts.astype(N.float64)
 
-        if self.method == 'fractions':
-            hist = hist * (1./data.size)
+        if self.method == 'density':
+            # same normalisation as numpy.histogram
+            hist = counts / N.diff(binlocs) / counts.sum()
+        elif self.method == 'fractions':
+            hist = counts * (1./hdata.numfinite)
+        else:
+            hist = counts
 
         # if cumulative wanted
         if self.cumulative == 'smalltolarge':
@@ -164,7 +177,7 @@ class DatasetHistoGenerator:
             hist = N.cumsum(hist[::-1])[::-1]
 
         if self.errors:
-            nerr, perr = self.getErrors(data, binlocs)
+            nerr, perr = self.getErrors(counts, hdata, binlocs)
         else:
             nerr, perr = None, None
 
@@ -229,8 +242,15 @@ class DatasetHistoBins(Dataset1DBase):
         if self.changeset != self.generator.document.changeset:
             self.datacache = self.generator.getBinLocations()
             self.changeset = self.generator.document.changeset
+            self.updateVersion()
         return self.datacache
 
+    @property
+    def version(self):
+        """Version number, updated when histogram is recalculated."""
+        self.getData()
+        return self._version
+
     def linkedInformation(self):
         """Informating about linking."""
         return self.generator.linkedInformation() + _(" (bin positions)")
@@ -264,8 +284,15 @@ class DatasetHistoValues(Dataset1DBase):
         if self.changeset != self.generator.document.changeset:
             self.datacache = self.generator.getBinVals()
             self.changeset = self.generator.document.changeset
+            self.updateVersion()
         return self.datacache
 
+    @property
+    def version(self):
+        """Version number, updated when histogram is recalculated."""
+        self.getData()
+        return self._version
+
     def saveDataRelationToText(self, fileobj, name):
         """Save dataset and its counterpart to a file."""
         self.generator.saveToFile(fileobj)
@@ -33,6 +33,12 @@ class _DatasetPlugin:
         self.pluginmanager.update()
         return getattr(self.pluginds, attr)
 
+    @property
+    def version(self):
+        """Version number, updated when plugin is rerun."""
+        self.pluginmanager.update()
+        return self._version
+
     def linkedInformation(self):
         """Return information about how this dataset was created."""
 
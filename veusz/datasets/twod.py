@@ -331,6 +331,7 @@ class Dataset2DXYFunc(Dataset2DBase):
 
         self.cacheddata = None
         self.lastchangeset = -1
+        self.lastevalchangeset = -1
 
     @property
     def data(self):
@@ -347,6 +348,13 @@ class Dataset2DXYFunc(Dataset2DBase):
         if self.document.changeset == self.lastchangeset:
             return self.cacheddata
 
+        # the values only depend on the evaluation context
+        evalchangeset = self.document.evaluate.changeset
+        if ( self.cacheddata is not None and
+             evalchangeset == self.lastevalchangeset ):
+            self.lastchangeset = self.document.changeset
+            return self.cacheddata
+
         env = self.document.evaluate.context.copy()
 
         xarange = N.arange(
@@ -371,8 +379,16 @@ class Dataset2DXYFunc(Dataset2DBase):
 
         self.cacheddata = data
         self.lastchangeset = self.document.changeset
+        self.lastevalchangeset = evalchangeset
+        self.updateVersion()
         return data
 
+    @property
+    def version(self):
+        """Version number, updated when expression is reevaluated."""
+        self.data
+        return self._version
+
     def saveDataRelationToText(self, fileobj, name):
         '''Save expressions to file.
         '''
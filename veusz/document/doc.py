@@ -42,6 +42,7 @@ from . import evaluate
 from .. import datasets
 from .. import utils
 from .. import setting
+from .. import plugins
 
 def _(text, disambiguation=None, context="Document"):
     """Translate text."""
@@ -241,6 +242,7 @@ class Document(qt.QObject):
         """Set dataset in document."""
         self.data[name] = dataset
         dataset.document = self
+        dataset.updateVersion()
 
         # update the change tracking
         self.setModified()
@@ -253,6 +255,7 @@ class Document(qt.QObject):
     def modifiedData(self, dataset):
         """Notify dataset was modified"""
         assert dataset in self.data.values()
+        dataset.updateVersion()
         self.setModified()
 
     def getLinkedFiles(self, filenames=None):
@@ -346,6 +349,7 @@ class Document(qt.QObject):
 
     def paintTo(self, painthelper, page):
         """Paint page specified to the paint helper."""
+        plugins.updateDatasetPlugins(self)
         self.basewidget.draw(painthelper, page)
 
     def getNumberPages(self):
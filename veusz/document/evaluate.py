@@ -75,6 +75,9 @@ class Evaluate:
         # directories to examine when importing
         self.importpath = []
 
+        # incremented when the evaluation context is updated
+        self.changeset = 0
+
         self.wipe()
 
     def wipe(self):
@@ -115,6 +118,8 @@ class Evaluate:
         This sets up a safe environment where things can be evaluated
         """
 
+        self.changeset += 1
+
         c = self.context
         c.clear()
 
@@ -403,15 +408,29 @@ class Evaluate:
 
         key = (expr, part, datatype, dimensions)
         if self.exprdscachechangeset != self.doc.changeset:
+            # keep datasets where the datasets used in the expression
+            # are unchanged, so their versions stay the same
             self.exprdscachechangeset = self.doc.changeset
-            self.exprdscache.clear()
-        elif key in self.exprdscache:
-            return self.exprdscache[key]
-
-        self.exprdscache[key] = ds = datasets.evalDatasetExpression(
+            oldcache = self.exprdscache
+            self.exprdscache = {}
+            for k, v in oldcache.items():
+                # checking may evaluate other expressions, adding them
+                if ( k not in self.exprdscache and
+                     v[1] == self._exprDependencies(k[0], k[1]) ):
+                    self.exprdscache[k] = v
+        if key in self.exprdscache:
+            return self.exprdscache[key][0]
+
+        ds = datasets.evalDatasetExpression(
             self.doc, expr, part=part, datatype=datatype, dimensions=dimensions)
+        self.exprdscache[key] = (ds, self._exprDependencies(expr, part))
         return ds
 
+    def _exprDependencies(self, expr, part):
+        """Return a value which changes if the result of the dataset
+        expression could change."""
+        return datasets.expressionDependencies(self.doc, (expr,), part)
+
     def _checkImportsSafe(self):
         """Check whether symbols are safe to import."""
 
@@ -47,6 +47,9 @@ class DrawState:
         # controlgraphs belonging to widget
         self.cgis = []
 
+        # data kept by widget for identifying what it drew at a point
+        self.pickdata = None
+
         # list of child widgets states
         self.children = []
 
@@ -229,6 +232,17 @@ class PaintHelper:
         except KeyError:
             return None
 
+    def setPickData(self, widget, data):
+        """Records data for identifying what the widget drew."""
+        self.states[(widget,0)].pickdata = data
+
+    def getPickData(self, widget):
+        """Return data for identifying what the widget drew (or None)."""
+        try:
+            return self.states[(widget,0)].pickdata
+        except KeyError:
+            return None
+
     def renderToPainter(self, painter):
         """Render saved output to painter.
         """
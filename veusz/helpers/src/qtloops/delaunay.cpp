@@ -0,0 +1,399 @@
+//    Copyright (C) 2021 Jeremy S. Sanders
+//    Email: Jeremy Sanders <jeremy@jeremysanders.net>
+//
+//    This program is free software; you can redistribute it and/or modify
+//    it under the terms of the GNU General Public License as published by
+//    the Free Software Foundation; either version 2 of the License, or
+//    (at your option) any later version.
+//
+//    This program is distributed in the hope that it will be useful,
+//    but WITHOUT ANY WARRANTY; without even the implied warranty of
+//    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+//    GNU General Public License for more details.
+//
+//    You should have received a copy of the GNU General Public License along
+//    with this program; if not, write to the Free Software Foundation, Inc.,
+//    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+/////////////////////////////////////////////////////////////////////////////
+
+// Incremental (Bowyer-Watson) Delaunay triangulation. Points are
+// inserted in Hilbert curve order, so that the walk to find the
+// triangle containing each new point is short.
+
+#include "delaunay.h"
+#include <vector>
+#include <algorithm>
+#include <cmath>
+
+namespace {
+
+  // triangle vertices are anticlockwise
+  // n[i] is the neighbouring triangle opposite v[i] (or -1)
+  struct Tri
+  {
+    int v[3];
+    int n[3];
+  };
+
+  // size of the enclosing triangle relative to the normalised data
+  const double SUPERSIZE = 1e5;
+
+  // distance along hilbert curve of size 2**order
+  unsigned hilbertDistance(unsigned order, unsigned x, unsigned y)
+  {
+    unsigned d = 0;
+    for(unsigned s = 1u << (order-1); s > 0; s >>= 1)
+      {
+	const unsigned rx = (x & s) > 0;
+	const unsigned ry = (y & s) > 0;
+	d += s * s * ((3 * rx) ^ ry);
+	if( ry == 0 )
+	  {
+	    if( rx == 1 )
+	      {
+		x = s-1 - x;
+		y = s-1 - y;
+	      }
+	    std::swap(x, y);
+	  }
+      }
+    return d;
+  }
+
+  class Delaunay
+  {
+  public:
+    Delaunay(const Numpy1DObj& xpts, const Numpy1DObj& ypts);
+    void triangulate();
+    void output(int* numtri, int** triangles, int** neighbours) const;
+
+  private:
+    // > 0 if c is to the left of a->b
+    inline double orient(int a, int b, int c) const
+    {
+      return (px[b]-px[a])*(py[c]-py[a]) - (py[b]-py[a])*(px[c]-px[a]);
+    }
+    inline bool isSuper(int v) const { return v >= npts; }
+
+    bool inCircle(int t, int p) const;
+    int locate(int p, int start) const;
+    void insert(int p);
+    void findCavityBoundary();
+    int newTri();
+
+    int npts;
+    std::vector<double> px, py;
+    std::vector<Tri> tris;
+    std::vector<int> freetris;
+
+    // working space for insertion
+    std::vector<int> mark;
+    int epoch;
+    std::vector<int> cavity, stack;
+    struct Edge { int a, b, nb; };
+    std::vector<Edge> boundary;
+    std::vector<int> startat, endat;
+    int lasttri;
+  };
+
+  Delaunay::Delaunay(const Numpy1DObj& xpts, const Numpy1DObj& ypts)
+    : npts(std::min(xpts.dim, ypts.dim)), epoch(0), lasttri(0)
+  {
+    // normalise coordinates to lie within a unit square about the
+    // origin, to keep precision near the enclosing triangle
+    double minx = 0, maxx = 0, miny = 0, maxy = 0;
+    for(int i = 0; i < npts; ++i)
+      {
+	if( i == 0 || xpts(i) < minx ) minx = xpts(i);
+	if( i == 0 || xpts(i) > maxx ) maxx = xpts(i);
+	if( i == 0 || ypts(i) < miny ) miny = ypts(i);
+	if( i == 0 || ypts(i) > maxy ) maxy = ypts(i);
+      }
+    const double cx = 0.5*(minx+maxx);
+    const double cy = 0.5*(miny+maxy);
+    double scale = std::max(maxx-minx, maxy-miny);
+    if( !(scale > 0) )
+      scale = 1;
+
+    px.resize(npts+3);
+    py.resize(npts+3);
+    for(int i = 0; i < npts; ++i)
+      {
+	px[i] = (xpts(i)-cx) / scale;
+	py[i] = (ypts(i)-cy) / scale;
+      }
+
+    // enclosing triangle
+    px[npts] = -SUPERSIZE; py[npts] = -SUPERSIZE;
+    px[npts+1] = SUPERSIZE; py[npts+1] = -SUPERSIZE;
+    px[npts+2] = 0; py[npts+2] = SUPERSIZE;
+
+    Tri t;
+    for(int i = 0; i < 3; ++i)
+      {
+	t.v[i] = npts+i;
+	t.n[i] = -1;
+      }
+    tris.push_back(t);
+    mark.push_back(0);
+
+    startat.resize(npts+3, -1);
+    endat.resize(npts+3, -1);
+  }
+
+  // is p within the circumcircle of the triangle
+  bool Delaunay::inCircle(int t, int p) const
+  {
+    const Tri& tri = tris[t];
+
+    int numsuper = 0, superidx = 0;
+    for(int i = 0; i < 3; ++i)
+      if( isSuper(tri.v[i]) )
+	{
+	  ++numsuper;
+	  superidx = i;
+	}
+
+    // for a triangle on the hull, treat the enclosing vertex as
+    // being at infinity, so the circle becomes the half plane on the
+    // outside of the hull edge. This keeps the hull convex.
+    if( numsuper == 1 )
+      return orient(tri.v[(superidx+1)%3], tri.v[(superidx+2)%3], p) > 0;
+
+    const double adx = px[tri.v[0]]-px[p], ady = py[tri.v[0]]-py[p];
+    const double bdx = px[tri.v[1]]-px[p], bdy = py[tri.v[1]]-py[p];
+    const double cdx = px[tri.v[2]]-px[p], cdy = py[tri.v[2]]-py[p];
+
+    const double alift = adx*adx + ady*ady;
+    const double blift = bdx*bdx + bdy*bdy;
+    const double clift = cdx*cdx + cdy*cdy;
+
+    const double det =
+      alift*(bdx*cdy - cdx*bdy) +
+      blift*(cdx*ady - adx*cdy) +
+      clift*(adx*bdy - bdx*ady);
+    return det > 0;
+  }
+
+  // walk from triangle start to the triangle containing point p
+  int Delaunay::locate(int p, int start) const
+  {
+    int t = start;
+    // rotate the starting edge to avoid cycling in degenerate cases
+    int rot = 0;
+    const int maxsteps = int(tris.size())*3 + 10;
+    for(int step = 0; step < maxsteps; ++step)
+      {
+	const Tri& tri = tris[t];
+	bool inside = true;
+	for(int k = 0; k < 3; ++k)
+	  {
+	    const int i = (k+rot) % 3;
+	    if( orient(tri.v[(i+1)%3], tri.v[(i+2)%3], p) < 0 )
+	      {
+		if( tri.n[i] < 0 )
+		  return -1;
+		t = tri.n[i];
+		inside = false;
+		break;
+	      }
+	  }
+	if( inside )
+	  return t;
+	rot = (rot+1) % 3;
+      }
+    return -1;
+  }
+
+  // find the edges around the triangles in the cavity
+  void Delaunay::findCavityBoundary()
+  {
+    boundary.clear();
+    for(int c : cavity)
+      {
+	const Tri& tri = tris[c];
+	for(int i = 0; i < 3; ++i)
+	  {
+	    const int nb = tri.n[i];
+	    if( nb < 0 || mark[nb] != epoch )
+	      {
+		Edge e = { tri.v[(i+1)%3], tri.v[(i+2)%3], nb };
+		boundary.push_back(e);
+	      }
+	  }
+      }
+  }
+
+  int Delaunay::newTri()
+  {
+    if( ! freetris.empty() )
+      {
+	const int t = freetris.back();
+	freetris.pop_back();
+	return t;
+      }
+    tris.push_back(Tri());
+    mark.push_back(0);
+    return int(tris.size())-1;
+  }
+
+  void Delaunay::insert(int p)
+  {
+    const int t = locate(p, lasttri);
+    if( t < 0 )
+      return;
+
+    // ignore duplicate points
+    for(int i = 0; i < 3; ++i)
+      {
+	const int v = tris[t].v[i];
+	if( px[v] == px[p] && py[v] == py[p] )
+	  return;
+      }
+
+    // find triangles with circumcircles containing the point
+    ++epoch;
+    cavity.clear();
+    stack.clear();
+    mark[t] = epoch;
+    cavity.push_back(t);
+    stack.push_back(t);
+    while( ! stack.empty() )
+      {
+	const int c = stack.back();
+	stack.pop_back();
+	for(int i = 0; i < 3; ++i)
+	  {
+	    const int nb = tris[c].n[i];
+	    if( nb >= 0 && mark[nb] != epoch && inCircle(nb, p) )
+	      {
+		mark[nb] = epoch;
+		cavity.push_back(nb);
+		stack.push_back(nb);
+	      }
+	  }
+      }
+
+    // rounding errors can give a cavity where the point cannot see
+    // all of the boundary, which would make inverted triangles, so
+    // grow the cavity until it can
+    for(;;)
+      {
+	findCavityBoundary();
+	bool okay = true;
+	for(const Edge& e : boundary)
+	  if( e.nb >= 0 && mark[e.nb] != epoch && orient(e.a, e.b, p) <= 0 )
+	    {
+	      mark[e.nb] = epoch;
+	      cavity.push_back(e.nb);
+	      okay = false;
+	    }
+	if( okay )
+	  break;
+      }
+
+    // remove the old triangles
+    for(int c : cavity)
+      freetris.push_back(c);
+
+    // join the point to each boundary edge
+    const int numnew = int(boundary.size());
+    std::vector<int> newtris(numnew);
+    for(int k = 0; k < numnew; ++k)
+      {
+	const Edge& e = boundary[k];
+	const int nt = newTri();
+	newtris[k] = nt;
+	Tri& tri = tris[nt];
+	tri.v[0] = e.a; tri.v[1] = e.b; tri.v[2] = p;
+	tri.n[2] = e.nb;
+
+	// point outside triangle back to the new one
+	if( e.nb >= 0 )
+	  {
+	    Tri& out = tris[e.nb];
+	    for(int i = 0; i < 3; ++i)
+	      if( out.v[i] != e.a && out.v[i] != e.b )
+		out.n[i] = nt;
+	  }
+	startat[e.a] = nt;
+	endat[e.b] = nt;
+      }
+
+    // link the new triangles to each other
+    for(int nt : newtris)
+      {
+	Tri& tri = tris[nt];
+	tri.n[0] = startat[tri.v[1]];
+	tri.n[1] = endat[tri.v[0]];
+      }
+
+    lasttri = newtris[0];
+  }
+
+  void Delaunay::triangulate()
+  {
+    if( npts == 0 )
+      return;
+
+    // sort points along a hilbert curve
+    const unsigned order = 16;
+    const double gridsize = double((1u << order) - 1);
+    std::vector< std::pair<unsigned, int> > order_idx(npts);
+    for(int i = 0; i < npts; ++i)
+      {
+	const unsigned hx = unsigned((px[i]+0.5)*gridsize);
+	const unsigned hy = unsigned((py[i]+0.5)*gridsize);
+	order_idx[i] = std::make_pair(hilbertDistance(order, hx, hy), i);
+      }
+    std::sort(order_idx.begin(), order_idx.end());
+
+    for(int i = 0; i < npts; ++i)
+      insert(order_idx[i].second);
+  }
+
+  void Delaunay::output(int* numtri, int** triangles, int** neighbours) const
+  {
+    // number the output triangles
+    std::vector<int> outidx(tris.size(), -1);
+    std::vector<bool> isfree(tris.size(), false);
+    for(int t : freetris)
+      isfree[t] = true;
+
+    int num = 0;
+    for(size_t t = 0; t < tris.size(); ++t)
+      {
+	const Tri& tri = tris[t];
+	if( ! (isfree[t] || isSuper(tri.v[0]) || isSuper(tri.v[1]) ||
+	       isSuper(tri.v[2])) )
+	  outidx[t] = num++;
+      }
+
+    *numtri = num;
+    *triangles = new int[num*3];
+    *neighbours = new int[num*3];
+    for(size_t t = 0; t < tris.size(); ++t)
+      {
+	const int o = outidx[t];
+	if( o < 0 )
+	  continue;
+	const Tri& tri = tris[t];
+	for(int i = 0; i < 3; ++i)
+	  {
+	    (*triangles)[o*3+i] = tri.v[i];
+	    // edge i is from v[i] to v[i+1], opposite v[i+2]
+	    const int nb = tri.n[(i+2)%3];
+	    (*neighbours)[o*3+i] = nb < 0 ? -1 : outidx[nb];
+	  }
+      }
+  }
+
+} // namespace
+
+void delaunayTriangulate(const Numpy1DObj& xpts, const Numpy1DObj& ypts,
+			 int* numtri, int** triangles, int** neighbours)
+{
+  Delaunay d(xpts, ypts);
+  d.triangulate();
+  d.output(numtri, triangles, neighbours);
+}
@@ -0,0 +1,32 @@
+//    Copyright (C) 2021 Jeremy S. Sanders
+//    Email: Jeremy Sanders <jeremy@jeremysanders.net>
+//
+//    This program is free software; you can redistribute it and/or modify
+//    it under the terms of the GNU General Public License as published by
+//    the Free Software Foundation; either version 2 of the License, or
+//    (at your option) any later version.
+//
+//    This program is distributed in the hope that it will be useful,
+//    but WITHOUT ANY WARRANTY; without even the implied warranty of
+//    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+//    GNU General Public License for more details.
+//
+//    You should have received a copy of the GNU General Public License along
+//    with this program; if not, write to the Free Software Foundation, Inc.,
+//    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+/////////////////////////////////////////////////////////////////////////////
+
+#ifndef DELAUNAY_HH
+#define DELAUNAY_HH
+
+#include "qtloops_helpers.h"
+
+// Delaunay triangulation of the points given by xpts and ypts, which
+// should be finite. Output is numtri triangles as triples of point
+// indices, in anticlockwise order. Duplicate points are ignored.
+// neighbours gives the triangle on the other side of each edge (or
+// -1), where edge i goes from vertex i to vertex i+1.
+void delaunayTriangulate(const Numpy1DObj& xpts, const Numpy1DObj& ypts,
+			 int* numtri, int** triangles, int** neighbours);
+
+#endif
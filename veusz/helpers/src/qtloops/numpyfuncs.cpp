@@ -18,6 +18,11 @@
 
 #include "numpyfuncs.h"
 #include <limits>
+#include <deque>
+#include <set>
+#include <vector>
+#include <algorithm>
+#include <cmath>
 #include "isnan.h"
 
 namespace {
@@ -73,6 +78,122 @@ void binData(const Numpy1DObj& indata, int binning,
     }
 }
 
+void binDataExtremes(const Numpy1DObj& indata, int binning,
+		     bool findmax,
+		     int* numoutbins, double** outdata)
+{
+  // round up output size
+  int size = indata.dim / binning;
+  if( indata.dim % binning != 0 )
+    ++size;
+
+  // create output array
+  *numoutbins = size;
+  double *out = new double[size];
+  *outdata = out;
+
+  for(int bin = 0; bin < size; ++bin)
+    {
+      const int maxi = min(indata.dim, (bin+1)*binning);
+      bool found = false;
+      double extreme = 0;
+      for(int i = bin*binning; i < maxi; ++i)
+	{
+	  const double x = indata(i);
+	  if( isFinite(x) &&
+	      (!found || (findmax ? x > extreme : x < extreme)) )
+	    {
+	      extreme = x;
+	      found = true;
+	    }
+	}
+      out[bin] = found ? extreme : std::numeric_limits<double>::quiet_NaN();
+    }
+}
+
+void binData2D(const Numpy2DObj& indata, int xbin, int ybin, int mode,
+	       int* numoutx, int* numouty, double** outdata)
+{
+  // round up output size
+  const int nx = (indata.dims[1] + xbin - 1) / xbin;
+  const int ny = (indata.dims[0] + ybin - 1) / ybin;
+
+  *numoutx = nx;
+  *numouty = ny;
+  double *out = new double[nx*ny];
+  *outdata = out;
+
+  // used for computing medians
+  std::vector<double> vals;
+
+  for(int oy = 0; oy < ny; ++oy)
+    {
+      const int maxy = min(indata.dims[0], (oy+1)*ybin);
+      for(int ox = 0; ox < nx; ++ox)
+	{
+	  const int maxx = min(indata.dims[1], (ox+1)*xbin);
+
+	  int ct = 0;
+	  double sum = 0.;
+	  double extreme = 0.;
+	  vals.clear();
+
+	  for(int y = oy*ybin; y < maxy; ++y)
+	    for(int x = ox*xbin; x < maxx; ++x)
+	      {
+		const double v = indata(x, y);
+		if( ! isFinite(v) )
+		  continue;
+		switch(mode)
+		  {
+		  case BIN2D_MIN:
+		    if( ct == 0 || v < extreme ) extreme = v;
+		    break;
+		  case BIN2D_MAX:
+		    if( ct == 0 || v > extreme ) extreme = v;
+		    break;
+		  case BIN2D_MEDIAN:
+		    vals.push_back(v);
+		    break;
+		  default:
+		    sum += v;
+		    break;
+		  }
+		++ct;
+	      }
+
+	  double res = std::numeric_limits<double>::quiet_NaN();
+	  if( ct != 0 )
+	    {
+	      switch(mode)
+		{
+		case BIN2D_SUM:
+		  res = sum; break;
+		case BIN2D_MEAN:
+		  res = sum / ct; break;
+		case BIN2D_MIN:
+		case BIN2D_MAX:
+		  res = extreme; break;
+		case BIN2D_MEDIAN:
+		  {
+		    const int mid = ct / 2;
+		    std::nth_element(vals.begin(), vals.begin()+mid, vals.end());
+		    res = vals[mid];
+		    if( ct % 2 == 0 )
+		      res = 0.5*(res + *std::max_element(
+				   vals.begin(), vals.begin()+mid));
+		  }
+		  break;
+		}
+	    }
+	  else if( mode == BIN2D_SUM )
+	    res = 0.;
+
+	  out[ox + oy*nx] = res;
+	}
+    }
+}
+
 void rollingAverage(const Numpy1DObj& indata,
 		    const Numpy1DObj* weights,
 		    int width,
@@ -124,3 +245,229 @@ void rollingAverage(const Numpy1DObj& indata,
 	out[i] = std::numeric_limits<double>::quiet_NaN();
     }
 }
+
+void rollingStdDev(const Numpy1DObj& indata, int width,
+		   int* numoutbins, double** outdata)
+{
+  const int size = indata.dim;
+  *numoutbins = size;
+  double *out = new double[size];
+  *outdata = out;
+
+  // running mean and sum of squared deviations (Welford), updated as
+  // points enter and leave the window
+  int ct = 0;
+  double mean = 0.;
+  double m2 = 0.;
+
+  // add points before first output point
+  for(int ri = 0; ri < width && ri < size; ++ri)
+    {
+      const double x = indata(ri);
+      if( isFinite(x) )
+	{
+	  ++ct;
+	  const double delta = x - mean;
+	  mean += delta / ct;
+	  m2 += delta * (x - mean);
+	}
+    }
+
+  for(int i = 0; i < size; ++i)
+    {
+      // add new point at end of window
+      const int addi = i + width;
+      if( addi < size && isFinite(indata(addi)) )
+	{
+	  const double x = indata(addi);
+	  ++ct;
+	  const double delta = x - mean;
+	  mean += delta / ct;
+	  m2 += delta * (x - mean);
+	}
+
+      // remove point which has left the start of the window
+      const int remi = i - width - 1;
+      if( remi >= 0 && isFinite(indata(remi)) )
+	{
+	  const double x = indata(remi);
+	  --ct;
+	  if( ct == 0 )
+	    {
+	      mean = m2 = 0.;
+	    }
+	  else
+	    {
+	      const double delta = x - mean;
+	      mean -= delta / ct;
+	      m2 -= delta * (x - mean);
+	    }
+	}
+
+      if( ct != 0 )
+	out[i] = std::sqrt( m2 > 0. ? m2 / ct : 0. );
+      else
+	out[i] = std::numeric_limits<double>::quiet_NaN();
+    }
+}
+
+void rollingExtreme(const Numpy1DObj& indata, int width, bool findmax,
+		    int* numoutbins, double** outdata)
+{
+  const int size = indata.dim;
+  *numoutbins = size;
+  double *out = new double[size];
+  *outdata = out;
+
+  // indices of candidate extreme values in window, where the values
+  // are in decreasing order of "extremeness"
+  std::deque<int> cands;
+
+  for(int ri = 0; ri < size + width; ++ri)
+    {
+      // add new point at end of window
+      if( ri < size && isFinite(indata(ri)) )
+	{
+	  const double x = indata(ri);
+	  while( !cands.empty() &&
+		 (findmax ? indata(cands.back()) <= x
+		  : indata(cands.back()) >= x) )
+	    cands.pop_back();
+	  cands.push_back(ri);
+	}
+
+      // output point is at centre of window
+      const int i = ri - width;
+      if( i >= 0 )
+	{
+	  // drop points which have left start of window
+	  while( !cands.empty() && cands.front() < i - width )
+	    cands.pop_front();
+
+	  if( !cands.empty() )
+	    out[i] = indata(cands.front());
+	  else
+	    out[i] = std::numeric_limits<double>::quiet_NaN();
+	}
+    }
+}
+
+namespace {
+  // keep track of median of set of values, where values can be
+  // added or removed
+  class RunningMedian
+  {
+  public:
+    void add(double x)
+    {
+      if( lo.empty() || x <= *lo.rbegin() )
+	lo.insert(x);
+      else
+	hi.insert(x);
+      balance();
+    }
+
+    void remove(double x)
+    {
+      // all values in hi are >= all values in lo
+      if( x <= *lo.rbegin() )
+	lo.erase(lo.find(x));
+      else
+	hi.erase(hi.find(x));
+      balance();
+    }
+
+    bool empty() const
+    {
+      return lo.empty();
+    }
+
+    double median() const
+    {
+      if( lo.size() > hi.size() )
+	return *lo.rbegin();
+      else
+	return 0.5*(*lo.rbegin() + *hi.begin());
+    }
+
+  private:
+    // lo has the same number of items or one more item than hi
+    void balance()
+    {
+      if( lo.size() > hi.size()+1 )
+	{
+	  std::multiset<double>::iterator it = --lo.end();
+	  hi.insert(*it);
+	  lo.erase(it);
+	}
+      else if( hi.size() > lo.size() )
+	{
+	  std::multiset<double>::iterator it = hi.begin();
+	  lo.insert(*it);
+	  hi.erase(it);
+	}
+    }
+
+  private:
+    std::multiset<double> lo, hi;
+  };
+}
+
+void rollingMedian(const Numpy1DObj& indata, int width,
+		   int* numoutbins, double** outdata)
+{
+  const int size = indata.dim;
+  *numoutbins = size;
+  double *out = new double[size];
+  *outdata = out;
+
+  RunningMedian running;
+
+  for(int ri = 0; ri < width && ri < size; ++ri)
+    if( isFinite(indata(ri)) )
+      running.add(indata(ri));
+
+  for(int i = 0; i < size; ++i)
+    {
+      const int addi = i + width;
+      if( addi < size && isFinite(indata(addi)) )
+	running.add(indata(addi));
+
+      const int remi = i - width - 1;
+      if( remi >= 0 && isFinite(indata(remi)) )
+	running.remove(indata(remi));
+
+      if( !running.empty() )
+	out[i] = running.median();
+      else
+	out[i] = std::numeric_limits<double>::quiet_NaN();
+    }
+}
+
+void exponentialMovingAverage(const Numpy1DObj& indata, double alpha,
+			      int* numoutbins, double** outdata)
+{
+  const int size = indata.dim;
+  *numoutbins = size;
+  double *out = new double[size];
+  *outdata = out;
+
+  // non-finite values are skipped, keeping the previous average
+  double avg = std::numeric_limits<double>::quiet_NaN();
+  bool started = false;
+  for(int i = 0; i < size; ++i)
+    {
+      const double x = indata(i);
+      if( isFinite(x) )
+	{
+	  if( started )
+	    avg += alpha*(x - avg);
+	  else
+	    {
+	      avg = x;
+	      started = true;
+	    }
+	}
+      out[i] = avg;
+    }
+}
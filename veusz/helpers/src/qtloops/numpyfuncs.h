@@ -28,6 +28,18 @@ void binData(const Numpy1DObj& indata, int binning,
 	     int* numoutbins, double** outdata);
 
 
+// minimum or maximum of every binning points (ignoring non-finite values)
+void binDataExtremes(const Numpy1DObj& indata, int binning,
+		     bool findmax,
+		     int* numoutbins, double** outdata);
+
+// reduce 2D data in blocks of xbin by ybin pixels, ignoring non-finite
+// values. Output is numouty rows of numoutx columns.
+enum { BIN2D_SUM=0, BIN2D_MEAN=1, BIN2D_MIN=2, BIN2D_MAX=3, BIN2D_MEDIAN=4 };
+void binData2D(const Numpy2DObj& indata, int xbin, int ybin, int mode,
+	       int* numoutx, int* numouty, double** outdata);
+
+
 // rolling average calculation
 // weights is an optional weighting array
 void rollingAverage(const Numpy1DObj& indata,
@@ -35,4 +47,18 @@ void rollingAverage(const Numpy1DObj& indata,
 		    int width,
 		    int* numoutbins, double** outdata);
 
+// rolling (population) standard deviation, median and minimum or
+// maximum for width points either side of each point, ignoring
+// non-finite values
+void rollingStdDev(const Numpy1DObj& indata, int width,
+		   int* numoutbins, double** outdata);
+void rollingMedian(const Numpy1DObj& indata, int width,
+		   int* numoutbins, double** outdata);
+void rollingExtreme(const Numpy1DObj& indata, int width, bool findmax,
+		    int* numoutbins, double** outdata);
+
+// exponential moving average with smoothing factor alpha
+void exponentialMovingAverage(const Numpy1DObj& indata, double alpha,
+			      int* numoutbins, double** outdata);
+
 #endif
@@ -451,20 +451,160 @@ QPolygonF RotatedRectangle::makePolygon() const
   return poly;
 }
 
+namespace
+{
+  // maximum number of cells along each axis a rectangle can cover
+  // before it is tested against everything instead
+  const long MAX_RECT_CELLS = 16;
+
+  // do not put rectangles with coordinates beyond this many cells
+  // from the origin in the grid
+  const double MAX_CELL_INDEX = 1e9;
+
+  inline quint64 cellKey(long cx, long cy)
+  {
+    return (quint64(quint32(qint32(cx))) << 32) | quint32(qint32(cy));
+  }
+}
+
 RectangleOverlapTester::RectangleOverlapTester()
+  : _cellsize(0)
 {
 }
 
+RectangleOverlapTester::Bounds
+RectangleOverlapTester::polyBounds(const QPolygonF& poly)
+{
+  Bounds b;
+  b.x0 = b.x1 = poly[0].x();
+  b.y0 = b.y1 = poly[0].y();
+  for(auto const& pt : poly)
+    {
+      b.x0 = std::min(b.x0, pt.x());
+      b.x1 = std::max(b.x1, pt.x());
+      b.y0 = std::min(b.y0, pt.y());
+      b.y1 = std::max(b.y1, pt.y());
+    }
+  return b;
+}
+
+bool RectangleOverlapTester::cellRange(const Bounds& b,
+                                       long& cx0, long& cy0,
+                                       long& cx1, long& cy1) const
+{
+  if( _cellsize <= 0 )
+    return false;
+
+  const double fx0 = std::floor(b.x0 / _cellsize);
+  const double fy0 = std::floor(b.y0 / _cellsize);
+  const double fx1 = std::floor(b.x1 / _cellsize);
+  const double fy1 = std::floor(b.y1 / _cellsize);
+
+  // also catches nan and inf values
+  if( !(fx0 >= -MAX_CELL_INDEX && fx1 <= MAX_CELL_INDEX &&
+        fy0 >= -MAX_CELL_INDEX && fy1 <= MAX_CELL_INDEX) )
+    return false;
+
+  cx0 = long(fx0); cy0 = long(fy0);
+  cx1 = long(fx1); cy1 = long(fy1);
+  return true;
+}
+
+bool RectangleOverlapTester::overlapsItem(int idx, const QPolygonF& poly,
+                                          const Bounds& b) const
+{
+  // quick rejection using bounding boxes (touching counts as overlap)
+  const Bounds& ob = _bounds[idx];
+  if( b.x1 < ob.x0 || ob.x1 < b.x0 || b.y1 < ob.y0 || ob.y1 < b.y0 )
+    return false;
+
+  return doPolygonsIntersect(poly, _polys[idx]);
+}
+
+void RectangleOverlapTester::addRect(const RotatedRectangle& rect)
+{
+  const int idx = _rects.size();
+  const QPolygonF poly(rect.makePolygon());
+  const Bounds b = polyBounds(poly);
+
+  _rects.append(rect);
+  _polys.append(poly);
+  _bounds.append(b);
+
+  // choose cell size from size of first sensible rectangle
+  if( _cellsize <= 0 )
+    {
+      const double size = std::max(b.x1-b.x0, b.y1-b.y0);
+      if( std::isfinite(size) && size > 0 )
+        _cellsize = 2*size;
+    }
+
+  long cx0, cy0, cx1, cy1;
+  if( cellRange(b, cx0, cy0, cx1, cy1) &&
+      cx1-cx0 < MAX_RECT_CELLS && cy1-cy0 < MAX_RECT_CELLS )
+    {
+      for(long cy = cy0; cy <= cy1; ++cy)
+        for(long cx = cx0; cx <= cx1; ++cx)
+          _grid[cellKey(cx, cy)].append(idx);
+    }
+  else
+    {
+      _ungridded.append(idx);
+    }
+}
+
+void RectangleOverlapTester::reset()
+{
+  _rects.clear();
+  _polys.clear();
+  _bounds.clear();
+  _cellsize = 0;
+  _grid.clear();
+  _ungridded.clear();
+}
+
 bool RectangleOverlapTester::willOverlap(const RotatedRectangle& rect) const
 {
   const QPolygonF thispoly(rect.makePolygon());
+  const Bounds b = polyBounds(thispoly);
 
-  for(auto const &ir : _rects)
+  // look at all the rectangles if the test rectangle covers more
+  // cells than there are rectangles
+  long cx0, cy0, cx1, cy1;
+  if( !cellRange(b, cx0, cy0, cx1, cy1) ||
+      double(cx1-cx0+1)*double(cy1-cy0+1) > _rects.size() )
     {
-      if( doPolygonsIntersect(thispoly, ir.makePolygon()) )
-        return true;
+      for(int i = 0; i < _rects.size(); ++i)
+        if( overlapsItem(i, thispoly, b) )
+          return true;
+      return false;
     }
 
+  for(int idx : _ungridded)
+    if( overlapsItem(idx, thispoly, b) )
+      return true;
+
+  for(long cy = cy0; cy <= cy1; ++cy)
+    for(long cx = cx0; cx <= cx1; ++cx)
+      {
+        auto it = _grid.constFind(cellKey(cx, cy));
+        if( it == _grid.constEnd() )
+          continue;
+
+        for(int idx : it.value())
+          {
+            // rectangles can be in several cells, so only test
+            // them in the first cell shared with this rectangle
+            long ocx0, ocy0, ocx1, ocy1;
+            cellRange(_bounds[idx], ocx0, ocy0, ocx1, ocy1);
+            if( cx != std::max(cx0, ocx0) || cy != std::max(cy0, ocy0) )
+              continue;
+
+            if( overlapsItem(idx, thispoly, b) )
+              return true;
+          }
+      }
+
   return false;
 }
 
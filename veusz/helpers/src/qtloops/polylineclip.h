@@ -26,6 +26,7 @@
 #include <QPolygonF>
 #include <QVector>
 #include <QSizeF>
+#include <QHash>
 
 // clip a line made up of the points given, returning true
 // if is in region or false if not
@@ -104,19 +105,46 @@ private:
   QVector<QSizeF> _textsizes;
 };
 
+// test whether rotated rectangles overlap with previously added ones
+// rectangles are stored in a uniform grid of cells, so that only the
+// rectangles close to the one being tested are checked
 class RectangleOverlapTester
 {
 public:
   RectangleOverlapTester();
   bool willOverlap(const RotatedRectangle& rect) const;
-  void addRect(const RotatedRectangle& rect) { _rects.append(rect); };
-  void reset() { _rects.clear(); };
+  void addRect(const RotatedRectangle& rect);
+  void reset();
 
   // debug by drawing all the rectangles
   void debug(QPainter& painter) const;
 
+private:
+  // bounding box of polygon
+  struct Bounds
+  {
+    double x0, y0, x1, y1;
+  };
+  static Bounds polyBounds(const QPolygonF& poly);
+
+  // get range of grid cells covering bounds, returning false if
+  // the bounds cannot be put in the grid
+  bool cellRange(const Bounds& b, long& cx0, long& cy0,
+                 long& cx1, long& cy1) const;
+  bool overlapsItem(int idx, const QPolygonF& poly,
+                    const Bounds& b) const;
+
 private:
   QVector<RotatedRectangle> _rects;
+  QVector<QPolygonF> _polys;
+  QVector<Bounds> _bounds;
+
+  // size of grid cells (0 if not yet chosen)
+  double _cellsize;
+  // indices of rectangles in each cell
+  QHash<quint64, QVector<int> > _grid;
+  // indices of rectangles too large (or invalid) to put in grid
+  QVector<int> _ungridded;
 };
 
 #endif
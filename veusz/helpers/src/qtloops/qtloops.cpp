@@ -304,6 +304,116 @@ void plotBoxesToPainter(QPainter& painter,
     painter.drawRects(rects);
 }
 
+namespace
+{
+  // maximum absolute coordinate of path
+  qreal pathExtent(const QPainterPath& path)
+  {
+    if( path.isEmpty() )
+      return 0;
+    const QRectF r(path.boundingRect());
+    return std::max( std::max(fabs(r.left()), fabs(r.right())),
+		     std::max(fabs(r.top()), fabs(r.bottom())) );
+  }
+}
+
+void plotLineArrowsToPainter(QPainter& painter,
+			     const QPainterPath& leftpath, bool leftfill,
+			     const QPainterPath& rightpath, bool rightfill,
+			     const Numpy1DObj& x, const Numpy1DObj& y,
+			     const Numpy1DObj& length, const Numpy1DObj& angle,
+			     const Numpy1DObj* scaling,
+			     const QRectF* clip)
+{
+  int size = min(x.dim, y.dim, length.dim, angle.dim);
+  if( scaling != 0 )
+    size = std::min(size, scaling->dim);
+
+  // line is drawn with flat ends, markers with solid lines
+  const QPen origpen(painter.pen());
+  const QBrush origbrush(painter.brush());
+  QPen linepen(origpen);
+  linepen.setCapStyle(Qt::FlatCap);
+  QPen arrowpen(origpen);
+  arrowpen.setStyle(Qt::SolidLine);
+  arrowpen.setJoinStyle(Qt::MiterJoin);
+  const QBrush leftbrush( leftfill ? origbrush : QBrush() );
+  const QBrush rightbrush( rightfill ? origbrush : QBrush() );
+
+  // size of markers, to work out whether lines are visible
+  const qreal extent = std::max(pathExtent(leftpath), pathExtent(rightpath));
+  const qreal lw = origpen.widthF();
+
+  QRectF cliprect;
+  if( clip != 0 )
+    {
+      qreal x1, y1, x2, y2;
+      clip->getCoords(&x1, &y1, &x2, &y2);
+      cliprect.setCoords(x1, y1, x2, y2);
+    }
+
+  const QTransform origtrans(painter.worldTransform());
+
+  for(int i = 0; i < size; ++i)
+    {
+      const qreal x0 = x(i);
+      const qreal y0 = y(i);
+      const qreal len = length(i);
+      const qreal ang = angle(i);
+      const qreal scale = scaling != 0 ? (*scaling)(i) : 1;
+      if( len == 0 || ! isFinite(x0) || ! isFinite(y0) ||
+	  ! isFinite(len) || ! isFinite(ang) || ! isFinite(scale) )
+	continue;
+
+      if( clip != 0 )
+	{
+	  // bounding box of line and markers
+	  QTransform rot;
+	  rot.rotate(ang);
+	  const QPointF delta( rot.map(QPointF(len, 0)) );
+	  const qreal x1 = x0 + delta.x();
+	  const qreal y1 = y0 + delta.y();
+	  const qreal ext = extent*fabs(scale) + 2*lw;
+	  const QRectF bounds( QPointF(std::min(x0, x1)-ext,
+				       std::min(y0, y1)-ext),
+			       QPointF(std::max(x0, x1)+ext,
+				       std::max(y0, y1)+ext) );
+	  if( ! cliprect.intersects(bounds) )
+	    continue;
+	}
+
+      painter.translate(x0, y0);
+      painter.rotate(ang);
+
+      painter.setPen(arrowpen);
+      if( ! rightpath.isEmpty() )
+	{
+	  painter.setBrush(rightbrush);
+	  painter.translate(len, 0);
+	  painter.drawPath( scaling != 0 ? scalePath(rightpath, scale)
+			    : rightpath );
+	  painter.translate(-len, 0);
+	}
+      if( ! leftpath.isEmpty() )
+	{
+	  // plot reversed marker at start
+	  painter.setBrush(leftbrush);
+	  painter.scale(-1, 1);
+	  painter.drawPath( scaling != 0 ? scalePath(leftpath, scale)
+			    : leftpath );
+	  painter.scale(-1, 1);
+	}
+
+      painter.setPen(linepen);
+      painter.drawLine(QPointF(0, 0), QPointF(len, 0));
+
+      painter.setWorldTransform(origtrans);
+    }
+
+  painter.setPen(origpen);
+  painter.setBrush(origbrush);
+}
+
 void addCubicsToPainterPath(QPainterPath& path, const QPolygonF& poly)
 {
   QPointF lastpt(-999999, -999999);
@@ -67,6 +67,19 @@ void plotBoxesToPainter(QPainter& painter,
 			const Numpy1DObj& x2, const Numpy1DObj& y2,
 			const QRectF* clip = 0, bool autoexpand = true);
 
+// plot lines with optional markers at the ends (e.g. arrow heads)
+// each line starts at x,y and has the length and angle (degrees) given
+// leftpath is plotted reversed at the start and rightpath at the end
+// if scaling is not 0, the marker paths are scaled by its values
+// lines which do not overlap the clip rectangle are not drawn
+void plotLineArrowsToPainter(QPainter& painter,
+			     const QPainterPath& leftpath, bool leftfill,
+			     const QPainterPath& rightpath, bool rightfill,
+			     const Numpy1DObj& x, const Numpy1DObj& y,
+			     const Numpy1DObj& length, const Numpy1DObj& angle,
+			     const Numpy1DObj* scaling = 0,
+			     const QRectF* clip = 0);
+
 // add polygon to painter path as a cubic
 void addCubicsToPainterPath(QPainterPath& path, const QPolygonF& poly);
 
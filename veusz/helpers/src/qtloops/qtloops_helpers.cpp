@@ -161,3 +161,16 @@ PyObject* doubleArrayToNumpy(const double* d, int len)
 
   return n;
 }
+
+PyObject* intArrayToNumpy(const int* d, int len)
+{
+  npy_intp dims[1];
+  dims[0] = len;
+  PyObject* n = PyArray_SimpleNew(1, dims, NPY_INT);
+
+  int* pydata = (int*)PyArray_DATA((PyArrayObject*)(n));
+  for(int i = 0; i < len; ++i)
+    pydata[i] = d[i];
+
+  return n;
+}
@@ -110,5 +110,6 @@ class Numpy2DIntObj
 };
 
 PyObject* doubleArrayToNumpy(const double* d, int len);
+PyObject* intArrayToNumpy(const int* d, int len);
 
 #endif
@@ -4,11 +4,45 @@
 #include <limits>
 #include "fragment.h"
 #include "bsp.h"
+#include "parallel.h"
 
 #define EPS 1e-6
 
 namespace
 {
+  // Fragments being split. If separate is set, fragments made by
+  // splitting are added to a separate vector, so that several threads
+  // can split disjoint sets of fragments at the same time. Indices of
+  // base or more refer to the added fragments.
+  struct FragStore
+  {
+    FragStore(FragmentVector& _frags, bool separate)
+      : frags(_frags),
+        base(separate ? _frags.size() : EMPTY_BSP_IDX)
+    {}
+
+    Fragment& operator[](unsigned idx)
+    {
+      return idx < base ? frags[idx] : added[idx-base];
+    }
+
+    // add fragment, returning its index
+    unsigned add(const Fragment& f)
+    {
+      if(base == EMPTY_BSP_IDX)
+        {
+          frags.push_back(f);
+          return frags.size()-1;
+        }
+      added.push_back(f);
+      return base+added.size()-1;
+    }
+
+    FragmentVector& frags;
+    unsigned base;
+    FragmentVector added;
+  };
+
   // 2d triangle area squared (only considering X/Y)
   inline double triAreaSqd2D(const Vec3* pts)
   {
@@ -21,7 +55,7 @@ namespace
   // Find set of three points to define a plane (pts).
   // Needs to find points which are not the same return true if ok
   bool findPlane(const IdxVector& idxs, unsigned startidx,
-                 const FragmentVector& frags, Vec3* pts)
+                 FragStore& frags, Vec3* pts)
   {
     double maxtriarea2 = -1;
     unsigned besttri = EMPTY_BSP_IDX;
@@ -99,7 +133,7 @@ namespace
 
   // is path in front, on or behind plane?
   void handlePath(const Vec3& norm, const Vec3& plane0,
-                  FragmentVector& v, unsigned fidx,
+                  FragStore& v, unsigned fidx,
                   IdxVector& idxsame, IdxVector& idxfront, IdxVector& idxback)
   {
     int sign = dotsign(dot(norm, v[fidx].points[0]-plane0));
@@ -113,7 +147,7 @@ namespace
 
   // is line in front, on or behind plane
   void handleLine(const Vec3& norm, const Vec3& plane0,
-                  FragmentVector& fragvec, unsigned fidx,
+                  FragStore& fragvec, unsigned fidx,
                   IdxVector& idxsame, IdxVector& idxfront, IdxVector& idxback)
   {
     Fragment& f = fragvec[fidx];
@@ -145,14 +179,13 @@ namespace
 
         // write copy with -ve part
         fcpy.points[sign0 < 0 ? 1 : 0] = newpt;
-        idxback.push_back(fragvec.size());
-        fragvec.push_back(fcpy);
+        idxback.push_back(fragvec.add(fcpy));
       }
   }
 
   // is triangle in front, behind or on plane?
   void handleTriangle(const Vec3& norm, const Vec3& plane0,
-                      FragmentVector& fragvec, unsigned fidx,
+                      FragStore& fragvec, unsigned fidx,
                       IdxVector& idxsame, IdxVector& idxfront, IdxVector& idxback)
   {
     Fragment& f = fragvec[fidx];
@@ -195,8 +228,7 @@ namespace
 
         // then make a copy for the other side
         fcpy.points[(idx0+1)%3] = newpt;
-        (dots[(idx0+2)%3]>0 ? idxfront : idxback).push_back(fragvec.size());
-        fragvec.push_back(fcpy);
+        (dots[(idx0+2)%3]>0 ? idxfront : idxback).push_back(fragvec.add(fcpy));
       }
     else
       {
@@ -226,11 +258,9 @@ namespace
         // then add the other two on the other side
         fcpy1.points[diffidx] = newpt_p1;
         fcpy1.points[(diffidx+2)%3] = newpt_p2;
-        (dots[diffidx] < 0 ? idxfront : idxback).push_back(fragvec.size());
-        fragvec.push_back(fcpy1);
+        (dots[diffidx] < 0 ? idxfront : idxback).push_back(fragvec.add(fcpy1));
         fcpy2.points[diffidx] = newpt_p2;
-        (dots[diffidx] < 0 ? idxfront : idxback).push_back(fragvec.size());
-        fragvec.push_back(fcpy2);
+        (dots[diffidx] < 0 ? idxfront : idxback).push_back(fragvec.add(fcpy2));
       }
   }
 
@@ -273,140 +303,281 @@ namespace
     const FragmentVector& v;
   };
 
+  // Choose a plane from the fragments to_process[start:] and split
+  // them by it, adding the fragment indices on the plane to idxsame,
+  // and those in front and behind to idxfront and idxback. If there
+  // is no plane, or nothing is on the plane and the fragments are
+  // all on one side, every fragment is added to idxsame.
+  void splitFragments(FragStore& fragvec, const IdxVector& to_process,
+                      unsigned start, Vec3 viewdirn, IdxVector& idxsame,
+                      IdxVector& idxfront, IdxVector& idxback)
+  {
+    const unsigned to_process_size = to_process.size();
+    const unsigned nidxs = to_process_size-start;
+    const unsigned samesize = idxsame.size();
+    Vec3 planepts[3];
+
+    // if more than item to process then choose a plane, then split
+    if( nidxs > 1 && findPlane(to_process, start, fragvec, planepts) )
+      {
+        // norm of plane (making sure it points to observer)
+        Vec3 norm = cross(planepts[1]-planepts[0], planepts[2]-planepts[0]);
+        if(dot(norm, viewdirn) < 0)
+          norm = -norm;
+        // approximately normalise
+        norm *= 1./(std::abs(norm(0))+std::abs(norm(1))+std::abs(norm(2)));
+
+        for(unsigned i=start; i<to_process_size; ++i)
+          {
+            unsigned fidx = to_process[i];
+            switch(fragvec[fidx].type)
+              {
+              case Fragment::FR_PATH:
+                handlePath(norm, planepts[0], fragvec, fidx,
+                           idxsame, idxfront, idxback);
+                break;
+              case Fragment::FR_LINESEG:
+                handleLine(norm, planepts[0], fragvec, fidx,
+                           idxsame, idxfront, idxback);
+                break;
+              case Fragment::FR_TRIANGLE:
+                handleTriangle(norm, planepts[0], fragvec, fidx,
+                               idxsame, idxfront, idxback);
+                break;
+              default:
+                break;
+              }
+          }
+
+        if(idxsame.size() == samesize)
+          {
+            if(idxfront.empty() && !idxback.empty())
+              {
+                idxsame.insert(idxsame.end(), idxback.begin(), idxback.end());
+                idxback.resize(0);
+              }
+            else if(idxback.empty() && !idxfront.empty())
+              {
+                idxsame.insert(idxsame.end(), idxfront.begin(), idxfront.end());
+                idxfront.resize(0);
+              }
+          }
+      }
+    else
+      {
+        // single item to process or plane couldn't be found
+        idxsame.insert(idxsame.end(),
+                       to_process.begin()+start, to_process.end());
+      }
+  }
+
+  // This is a non-recursive BSP building routine. Fragment indices
+  // to examine are built up on the to_process vector. A stack of
+  // BSPStackItem items is used to keep track which BSP record the
+  // fragment indices belong to. The nodes are added to bsp_recs,
+  // with the root first.
+  void buildTree(FragStore& fragvec, IdxVector& to_process, Vec3 viewdirn,
+                 std::vector<BSPRecord>& bsp_recs, IdxVector& frag_idxs)
+  {
+    // initial record
+    bsp_recs.reserve(to_process.size());
+    bsp_recs.push_back(BSPRecord());
+    frag_idxs.reserve(to_process.size());
+    to_process.reserve(to_process.size()*2);
+
+    // these are where indices for the front and back side of the plane
+    IdxVector idxback;
+    IdxVector idxfront;
+    idxback.reserve(to_process.size());
+    idxfront.reserve(to_process.size());
+
+    // stack of items to process
+    std::vector<BSPStackItem> stack;
+    stack.reserve(128);
+    stack.push_back( BSPStackItem(0, to_process.size()) );
+
+    while( !stack.empty() )
+      {
+        BSPStackItem stackitem(stack.back());
+        stack.pop_back();
+
+        // this is the bsp record with which the items are associated
+        BSPRecord& rec = bsp_recs[stackitem.bspidx];
+        rec.minfragidxidx = frag_idxs.size(); // where the items get added
+
+        const unsigned start = to_process.size()-stackitem.nidxs;
+        splitFragments(fragvec, to_process, start, viewdirn,
+                       frag_idxs, idxfront, idxback);
+
+        // number added to this node
+        rec.nfrags = frag_idxs.size()-rec.minfragidxidx;
+        // remove items to process
+        to_process.resize(start);
+
+        // push_back invalidates rec, so we don't use it below
+        if(!idxfront.empty())
+          {
+            unsigned newbspidx = bsp_recs.size();
+            bsp_recs[stackitem.bspidx].frontidx = newbspidx;
+            bsp_recs.push_back(BSPRecord());
+            stack.push_back( BSPStackItem(newbspidx, idxfront.size()) );
+            to_process.insert(to_process.end(), idxfront.begin(), idxfront.end());
+            idxfront.resize(0);
+          }
+
+        if(!idxback.empty())
+          {
+            unsigned newbspidx = bsp_recs.size();
+            bsp_recs[stackitem.bspidx].backidx = newbspidx;
+            // add the record to be processed
+            bsp_recs.push_back(BSPRecord());
+            // new set of items to process
+            stack.push_back( BSPStackItem(newbspidx, idxback.size()) );
+            // and add onto to process list
+            to_process.insert(to_process.end(), idxback.begin(), idxback.end());
+            idxback.resize(0);
+          }
+
+      } // while !stack.empty()
+  }
+
+  // A set of fragments to build a subtree for, and the subtree built
+  struct BSPTask
+  {
+    BSPTask(unsigned _parentidx, bool _front)
+      : parentidx(_parentidx), front(_front), addedbase(EMPTY_BSP_IDX)
+    {}
+
+    // record the subtree is in front of or behind (or EMPTY_BSP_IDX
+    // for the root)
+    unsigned parentidx;
+    bool front;
+    // fragment indices in subtree
+    IdxVector idxs;
+
+    // subtree nodes, fragment indices and fragments made by
+    // splitting, with the index of the first of these
+    std::vector<BSPRecord> bsp_recs;
+    IdxVector frag_idxs;
+    FragmentVector added;
+    unsigned addedbase;
+  };
+
+  // minimum number of fragments in a subtree worth building in a
+  // separate thread
+  const unsigned min_thread_frags = 1024;
 }
 
-// This is a non-recursive BSP building routines. Fragment indices to
-// examine are built up on the to_process vector. A stack of
-// BSPStackItem items is used to keep track which BSP record the
-// fragment indices belong to.
+// Subtrees of the BSP tree are independent, so can be built in
+// separate threads. The first few nodes are split here until there
+// are enough subtrees to share between the threads. The subtrees are
+// then built and joined onto the tree. The tree is the same as if
+// it were built in a single thread, except for the order of the
+// records and of the fragments made by splitting.
 
-BSPBuilder::BSPBuilder(FragmentVector& fragvec, Vec3 viewdirn)
+BSPBuilder::BSPBuilder(FragmentVector& fragvec, Vec3 viewdirn,
+                       unsigned numthreads)
 {
-  // initial record
-  bsp_recs.reserve(fragvec.size());
-  bsp_recs.push_back(BSPRecord());
+  const unsigned nthreads = threadsForItems(numthreads, fragvec.size(),
+                                            min_thread_frags);
 
-  // add every non-empty fragment onto a list of fragments to process
-  IdxVector to_process;
-  to_process.reserve(fragvec.size()*2);
+  // initially, a subtree of every non-empty fragment
+  std::vector<BSPTask> tasks(1, BSPTask(EMPTY_BSP_IDX, false));
+  tasks[0].idxs.reserve(fragvec.size());
   for(unsigned i=0, s=fragvec.size(); i<s; ++i)
     {
       if(fragvec[i].type != Fragment::FR_NONE)
-        to_process.push_back(i);
+        tasks[0].idxs.push_back(i);
     }
 
-  // these are where indices for the front and back side of the plane
-  IdxVector idxback;
-  IdxVector idxfront;
-  idxback.reserve(fragvec.size());
-  idxfront.reserve(fragvec.size());
-  Vec3 planepts[3];
-
-  // stack of items to process
-  std::vector<BSPStackItem> stack;
-  stack.reserve(128);
-  stack.push_back( BSPStackItem(0, to_process.size()) );
-
-  while( !stack.empty() )
+  // attach a record to the tree in front of or behind its parent
+  auto linkRecord = [this](unsigned parentidx, bool front, unsigned idx)
     {
-      BSPStackItem stackitem(stack.back());
-      stack.pop_back();
-
-      // this is the bsp record with which the items are associated
-      BSPRecord& rec = bsp_recs[stackitem.bspidx];
-      rec.minfragidxidx = frag_idxs.size(); // where the items get added
-
-      // if more than item to process then choose a plane, then split
-      if( stackitem.nidxs > 1 &&
-          findPlane(to_process, to_process.size()-stackitem.nidxs,
-                    fragvec, planepts) )
+      if(parentidx != EMPTY_BSP_IDX)
+        (front ? bsp_recs[parentidx].frontidx :
+         bsp_recs[parentidx].backidx) = idx;
+    };
+
+  // split the largest subtree until there are enough of them
+  FragStore topstore(fragvec, false);
+  IdxVector idxfront, idxback;
+  while( nthreads > 1 && !tasks.empty() && tasks.size() < 4*nthreads )
+    {
+      auto largest = std::max_element
+        (tasks.begin(), tasks.end(),
+         [](const BSPTask& a, const BSPTask& b)
+         {
+           return a.idxs.size() < b.idxs.size();
+         });
+      if(largest->idxs.size() < min_thread_frags)
+        break;
+
+      BSPTask task(std::move(*largest));
+      tasks.erase(largest);
+
+      const unsigned recidx = bsp_recs.size();
+      bsp_recs.push_back(BSPRecord());
+      linkRecord(task.parentidx, task.front, recidx);
+
+      bsp_recs[recidx].minfragidxidx = frag_idxs.size();
+      splitFragments(topstore, task.idxs, 0, viewdirn,
+                     frag_idxs, idxfront, idxback);
+      bsp_recs[recidx].nfrags = frag_idxs.size()-bsp_recs[recidx].minfragidxidx;
+
+      if(!idxfront.empty())
         {
-          // norm of plane (making sure it points to observer)
-          Vec3 norm = cross(planepts[1]-planepts[0], planepts[2]-planepts[0]);
-          if(dot(norm, viewdirn) < 0)
-            norm = -norm;
-          // approximately normalise
-          norm *= 1./(std::abs(norm(0))+std::abs(norm(1))+std::abs(norm(2)));
-
-          unsigned to_process_size = to_process.size();
-          for(unsigned i=to_process_size-stackitem.nidxs; i<to_process_size; ++i)
-            {
-              unsigned fidx = to_process[i];
-              switch(fragvec[fidx].type)
-                {
-                  case Fragment::FR_PATH:
-                  handlePath(norm, planepts[0], fragvec, fidx,
-                             frag_idxs, idxfront, idxback);
-                  break;
-                case Fragment::FR_LINESEG:
-                  handleLine(norm, planepts[0], fragvec, fidx,
-                             frag_idxs, idxfront, idxback);
-                  break;
-                case Fragment::FR_TRIANGLE:
-                  handleTriangle(norm, planepts[0], fragvec, fidx,
-                                 frag_idxs, idxfront, idxback);
-                  break;
-                default:
-                  break;
-                }
-            }
-
-          // number added to this node
-          rec.nfrags = frag_idxs.size()-rec.minfragidxidx;
-          // remove items to process
-          to_process.resize(to_process_size-stackitem.nidxs);
+          tasks.push_back(BSPTask(recidx, true));
+          tasks.back().idxs.swap(idxfront);
+        }
+      if(!idxback.empty())
+        {
+          tasks.push_back(BSPTask(recidx, false));
+          tasks.back().idxs.swap(idxback);
+        }
+    }
 
-          if(rec.nfrags == 0)
+  // build the largest subtrees first
+  std::sort(tasks.begin(), tasks.end(),
+            [](const BSPTask& a, const BSPTask& b)
             {
-              if(idxfront.empty() && !idxback.empty())
-                {
-                  frag_idxs.insert(frag_idxs.end(), idxback.begin(), idxback.end());
-                  rec.nfrags = idxback.size();
-                  idxback.resize(0);
-                }
-              else if(idxback.empty() && !idxfront.empty())
+              return a.idxs.size() > b.idxs.size();
+            });
+  // (a single thread can add fragments directly)
+  const bool separate = nthreads > 1;
+  parallelItems(nthreads, tasks.size(),
+                [&fragvec, &tasks, &viewdirn, separate](std::size_t i)
                 {
-                  frag_idxs.insert(frag_idxs.end(), idxfront.begin(), idxfront.end());
-                  rec.nfrags = idxfront.size();
-                  idxfront.resize(0);
-                }
-            }
-
-          // push_back invalidates rec, so we don't use it below
-          if(!idxfront.empty())
-            {
-              unsigned newbspidx = bsp_recs.size();
-              bsp_recs[stackitem.bspidx].frontidx = newbspidx;
-              bsp_recs.push_back(BSPRecord());
-              stack.push_back( BSPStackItem(newbspidx, idxfront.size()) );
-              to_process.insert(to_process.end(), idxfront.begin(), idxfront.end());
-              idxfront.resize(0);
-            }
+                  BSPTask& task = tasks[i];
+                  FragStore store(fragvec, separate);
+                  buildTree(store, task.idxs, viewdirn,
+                            task.bsp_recs, task.frag_idxs);
+                  task.added.swap(store.added);
+                  task.addedbase = store.base;
+                });
+
+  // join subtrees onto tree, renumbering their records and the
+  // fragments made by splitting
+  for(auto& task : tasks)
+    {
+      const unsigned recoffset = bsp_recs.size();
+      const unsigned idxoffset = frag_idxs.size();
+      const unsigned fragoffset = fragvec.size();
 
-          if(!idxback.empty())
-            {
-              unsigned newbspidx = bsp_recs.size();
-              bsp_recs[stackitem.bspidx].backidx = newbspidx;
-              // add the record to be processed
-              bsp_recs.push_back(BSPRecord());
-              // new set of items to process
-              stack.push_back( BSPStackItem(newbspidx, idxback.size()) );
-              // and add onto to process list
-              to_process.insert(to_process.end(), idxback.begin(), idxback.end());
-              idxback.resize(0);
-            }
-        }
-      else
+      linkRecord(task.parentidx, task.front, recoffset);
+      for(BSPRecord rec : task.bsp_recs)
         {
-          // single item to process or plane couldn't be found
-          frag_idxs.insert(frag_idxs.end(),
-                           to_process.end()-stackitem.nidxs,
-                           to_process.end());
-          to_process.resize(to_process.size()-stackitem.nidxs);
-          rec.nfrags = stackitem.nidxs;
+          rec.minfragidxidx += idxoffset;
+          if(rec.frontidx != EMPTY_BSP_IDX)
+            rec.frontidx += recoffset;
+          if(rec.backidx != EMPTY_BSP_IDX)
+            rec.backidx += recoffset;
+          bsp_recs.push_back(rec);
         }
-
-    } // while !stack.empty()
+      for(unsigned idx : task.frag_idxs)
+        frag_idxs.push_back(idx < task.addedbase ? idx :
+                            idx-task.addedbase+fragoffset);
+      fragvec.insert(fragvec.end(), task.added.begin(), task.added.end());
+    }
 }
 
 namespace
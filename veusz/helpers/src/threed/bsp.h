@@ -56,8 +56,9 @@ class BSPBuilder
 {
 public:
   // construct the BSP tree from the fragments given and a particular
-  // viewing direction
-  BSPBuilder(FragmentVector& fragvec, Vec3 viewdirn);
+  // viewing direction, using up to numthreads threads (0 for the
+  // number of processors)
+  BSPBuilder(FragmentVector& fragvec, Vec3 viewdirn, unsigned numthreads=1);
 
   // return a vector of fragment indexes in drawing order
   IdxVector getFragmentIdxs(const FragmentVector& fragvec) const;
@@ -718,7 +718,9 @@ void TriangleFacing::getFragments(const Mat4& perspM, const Mat4& outerM, Fragme
 ObjectContainer::~ObjectContainer()
 {
   for(unsigned i=0, s=objects.size(); i<s; ++i)
-    delete objects[i];
+    if(std::find(sharedobjects.begin(), sharedobjects.end(), objects[i]) ==
+       sharedobjects.end())
+      delete objects[i];
 }
 
 void ObjectContainer::getFragments(const Mat4& perspM, const Mat4& outerM, FragmentVector& v)
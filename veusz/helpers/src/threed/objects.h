@@ -281,7 +281,7 @@ public:
 
 // container of objects with transformation matrix of children
 // Note: object pointers passed to object will be deleted when this
-// container is deleted
+// container is deleted, unless added with addSharedObject
 class ObjectContainer : public Object
 {
  public:
@@ -297,12 +297,22 @@ class ObjectContainer : public Object
     objects.push_back(obj);
   }
 
+  // add object which is not deleted by the container, so that it can
+  // be reused in other containers (it must be kept until this
+  // container is deleted)
+  void addSharedObject(Object* obj)
+  {
+    objects.push_back(obj);
+    sharedobjects.push_back(obj);
+  }
+
   // recursive set id of child objects
   void assignWidgetId(unsigned long long id);
 
  public:
   Mat4 objM;
   std::vector<Object*> objects;
+  std::vector<Object*> sharedobjects;
 };
 
 // container which only draws contents if the norm is pointing in +ve
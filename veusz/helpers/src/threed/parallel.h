@@ -0,0 +1,149 @@
+// -*-c++-*-
+
+//    Copyright (C) 2021 Jeremy S. Sanders
+//    Email: Jeremy Sanders <jeremy@jeremysanders.net>
+//
+//    This program is free software; you can redistribute it and/or modify
+//    it under the terms of the GNU General Public License as published by
+//    the Free Software Foundation; either version 2 of the License, or
+//    (at your option) any later version.
+//
+//    This program is distributed in the hope that it will be useful,
+//    but WITHOUT ANY WARRANTY; without even the implied warranty of
+//    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+//    GNU General Public License for more details.
+//
+//    You should have received a copy of the GNU General Public License along
+//    with this program; if not, write to the Free Software Foundation, Inc.,
+//    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+/////////////////////////////////////////////////////////////////////////////
+
+#ifndef PARALLEL_H
+#define PARALLEL_H
+
+// Helpers for splitting work between threads. The work functions
+// must not touch Python objects, as the threads do not hold the GIL.
+// If a thread cannot be started, its work is done in the calling
+// thread instead.
+
+#include <algorithm>
+#include <atomic>
+#include <cstddef>
+#include <system_error>
+#include <thread>
+#include <vector>
+
+// number of threads to use for nitems items, given the maximum number
+// of threads (0 for the number of processors) and the minimum number
+// of items worth giving to a thread
+inline unsigned threadsForItems(unsigned maxthreads, std::size_t nitems,
+                                std::size_t minitems)
+{
+  if(maxthreads == 0)
+    maxthreads = std::max(std::thread::hardware_concurrency(), 1u);
+  std::size_t n = std::min(std::size_t(maxthreads), nitems/minitems);
+  return unsigned(std::max(n, std::size_t(1)));
+}
+
+// call fn(start, end) for nthreads consecutive ranges covering 0 to n,
+// each in a separate thread
+template<class F> void parallelRanges(unsigned nthreads, std::size_t n,
+                                      const F& fn)
+{
+  if(nthreads <= 1)
+    {
+      fn(std::size_t(0), n);
+      return;
+    }
+
+  std::vector<std::thread> threads;
+  threads.reserve(nthreads-1);
+  for(unsigned t=1; t<nthreads; ++t)
+    {
+      const std::size_t start = n*t/nthreads;
+      const std::size_t end = n*(t+1)/nthreads;
+      try
+        {
+          threads.emplace_back(fn, start, end);
+        }
+      catch(const std::system_error&)
+        {
+          fn(start, end);
+        }
+    }
+
+  fn(std::size_t(0), n/nthreads);
+  for(auto& thread : threads)
+    thread.join();
+}
+
+// call fn(i) for i from 0 to n-1 using nthreads threads, where each
+// thread takes the next item when it has finished the last
+template<class F> void parallelItems(unsigned nthreads, std::size_t n,
+                                     const F& fn)
+{
+  std::atomic<std::size_t> next(0);
+  auto worker = [&next, n, &fn]()
+    {
+      for(std::size_t i=next++; i<n; i=next++)
+        fn(i);
+    };
+
+  std::vector<std::thread> threads;
+  nthreads = unsigned(std::min(std::size_t(nthreads), n));
+  for(unsigned t=1; t<nthreads; ++t)
+    {
+      try
+        {
+          threads.emplace_back(worker);
+        }
+      catch(const std::system_error&)
+        {
+          break;
+        }
+    }
+
+  worker();
+  for(auto& thread : threads)
+    thread.join();
+}
+
+// sort the items between first and last, by sorting ranges in
+// separate threads, then merging neighbouring pairs of ranges until
+// one is left
+template<class It> void parallelSort(unsigned nthreads, It first, It last)
+{
+  const std::size_t n = last-first;
+  nthreads = unsigned(std::max(std::min(std::size_t(nthreads), n),
+                               std::size_t(1)));
+
+  std::vector<std::size_t> bounds;
+  for(unsigned t=0; t<=nthreads; ++t)
+    bounds.push_back(n*t/nthreads);
+
+  parallelItems(nthreads, nthreads,
+                [first, &bounds](std::size_t i)
+                {
+                  std::sort(first+bounds[i], first+bounds[i+1]);
+                });
+
+  while(bounds.size() > 2)
+    {
+      parallelItems(nthreads, (bounds.size()-1)/2,
+                    [first, &bounds](std::size_t i)
+                    {
+                      std::inplace_merge(first+bounds[2*i],
+                                         first+bounds[2*i+1],
+                                         first+bounds[2*i+2]);
+                    });
+
+      std::vector<std::size_t> merged;
+      for(std::size_t i=0; i<bounds.size(); i+=2)
+        merged.push_back(bounds[i]);
+      if(merged.back() != n)
+        merged.push_back(n);
+      bounds.swap(merged);
+    }
+}
+
+#endif
@@ -16,8 +16,11 @@
 //    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 /////////////////////////////////////////////////////////////////////////////
 
+#include <algorithm>
 #include <cmath>
 #include <limits>
+#include <map>
+#include <tuple>
 #include <QtCore/QPointF>
 #include <QtGui/QPolygonF>
 #include <QtGui/QPen>
@@ -26,10 +29,13 @@
 #include <QtGui/QPixmap>
 #include <QtGui/QImage>
 #include <QtGui/QPainter>
+#include <QtGui/QTransform>
 
 #include "scene.h"
 #include "fragment.h"
 #include "bsp.h"
+#include "parallel.h"
+#include "zbuffer.h"
 
 namespace
 {
@@ -93,40 +99,105 @@ namespace
 
   unsigned init_fragments_size = 512;
 
+  // minimum number of fragments worth processing in a separate thread
+  const unsigned min_thread_frags = 8192;
+
   // This is a bit of a hack to avoid problems with the painter's
   // algorithm. This idea is to just break up lines with a length over
-  // the maximum into pieces smaller than maxlen.
-  void breakLongLines(FragmentVector& fragments, double maxlen)
+  // the maximum into pieces smaller than maxlen. Each thread collects
+  // its new pieces separately, and these are added in order at the
+  // end, so the result does not depend on the number of threads.
+  void breakLongLines(FragmentVector& fragments, double maxlen,
+                      unsigned numthreads)
   {
     const double maxlen2 = maxlen*maxlen;
-    const int size = fragments.size();
-    for(int ifrag=0; ifrag<size; ++ifrag)
+    const std::size_t size = fragments.size();
+    const unsigned nthreads = threadsForItems(numthreads, size,
+                                              min_thread_frags);
+    std::vector<FragmentVector> pieces(nthreads);
+
+    parallelItems(nthreads, nthreads,
+                  [&fragments, &pieces, maxlen2, size, nthreads](std::size_t t)
       {
-        Fragment& f=fragments[ifrag];
-        if(f.type == Fragment::FR_LINESEG)
+        FragmentVector& newfrags = pieces[t];
+        for(std::size_t ifrag=size*t/nthreads, end=size*(t+1)/nthreads;
+            ifrag<end; ++ifrag)
           {
-            const double len2 = (f.points[1]-f.points[0]).rad2();
-            if(len2 > maxlen2)
+            Fragment& f=fragments[ifrag];
+            if(f.type == Fragment::FR_LINESEG)
               {
-                const int nbits = int(std::sqrt(len2/maxlen2))+1;
-                const Vec3 delta = (f.points[1]-f.points[0])*(1./nbits);
-
-                // set original to be first segment
-                f.points[1] = f.points[0]+delta;
-
-                // add nbits-1 copies for next segments
-                Fragment tempf(f);
-                for(int ic=1; ic<nbits; ++ic)
+                const double len2 = (f.points[1]-f.points[0]).rad2();
+                if(len2 > maxlen2)
                   {
-                    tempf.points[0] = tempf.points[1];
-                    tempf.points[1] += delta;
-                    fragments.push_back(tempf);
+                    const int nbits = int(std::sqrt(len2/maxlen2))+1;
+                    const Vec3 delta = (f.points[1]-f.points[0])*(1./nbits);
+
+                    // set original to be first segment
+                    f.points[1] = f.points[0]+delta;
+
+                    // add nbits-1 copies for next segments
+                    Fragment tempf(f);
+                    for(int ic=1; ic<nbits; ++ic)
+                      {
+                        tempf.points[0] = tempf.points[1];
+                        tempf.points[1] += delta;
+                        newfrags.push_back(tempf);
+                      }
                   }
               }
           }
-      }
+      });
+
+    for(auto const& newfrags : pieces)
+      fragments.insert(fragments.end(), newfrags.begin(), newfrags.end());
   }
 
+  // maximum number of pixels in a z-buffer (before reducing the
+  // supersampling) and maximum size of output image
+  const double max_zbuffer_pixels = 16777216;
+  const int max_zbuffer_size = 8192;
+
+  // maximum number of cells in the grid for finding what was drawn
+  // at a point, and the number of pixels around the point to look
+  const double max_pick_cells = 65536;
+  const int pick_box = 3;
+
+  // rectangle on the screen covered by a fragment
+  struct PickRect
+  {
+    double x1, y1, x2, y2;
+  };
+
+  // fragment to be drawn into the z-buffer, where data is the
+  // premultiplied color for triangles and lines, or the image index
+  // for paths
+  struct ZBufferItem
+  {
+    ZBufferItem(unsigned _idx, unsigned _data)
+      : idx(_idx), data(_data)
+    {}
+    unsigned idx, data;
+  };
+
+  // paths with the same parameters, properties, colors and size in
+  // pixels are drawn with the same image
+  typedef std::tuple<const FragmentParameters*, const LineProp*,
+                     const SurfaceProp*, QRgb, QRgb, long> PathImageKey;
+
+  // depth of fragment for sorting in the painter's algorithm, ordered
+  // from the back to the front. Ties are broken by the index, so the
+  // order is the same however the sorting is done.
+  struct FragDepth
+  {
+    double depth;
+    unsigned idx;
+
+    bool operator<(const FragDepth& o) const
+    {
+      return depth > o.depth || (!(o.depth > depth) && idx < o.idx);
+    }
+  };
+
 }; // namespace
 
 void Scene::addLight(Vec3 posn, QColor col, double intensity)
@@ -227,6 +298,21 @@ void Scene::drawPath(QPainter* painter, const Fragment& frag,
     }
 }
 
+double Scene::pathExtent(const Fragment& frag, double pathscale,
+                         double linescale) const
+{
+  FragmentPathParameters* pars =
+    static_cast<FragmentPathParameters*>(frag.params);
+
+  const QRectF r = pars->path->controlPointRect();
+  double extent = std::max(std::max(std::abs(r.left()), std::abs(r.right())),
+                           std::max(std::abs(r.top()), std::abs(r.bottom())));
+  extent *= pathscale;
+  if(frag.lineprop != 0 && !frag.lineprop->hide)
+    extent += frag.lineprop->width*linescale*(pars->scaleline ? pathscale : 1);
+  return extent;
+}
+
 void Scene::doDrawing(QPainter* painter, const Mat3& screenM, double linescale,
                       const Camera& cam, Scene::DrawCallback* callback)
 {
@@ -435,50 +521,73 @@ void Scene::calcLighting()
   if(lights.empty())
     return;
 
-  for(auto &frag : fragments)
+  // each fragment is independent, so ranges are lit in separate threads
+  parallelRanges(threadsForItems(numthreads, fragments.size(), min_thread_frags),
+                 fragments.size(),
+                 [this](std::size_t start, std::size_t end)
     {
-      switch(frag.type)
+      for(std::size_t i=start; i<end; ++i)
         {
-        case Fragment::FR_TRIANGLE:
-          if(frag.surfaceprop != 0)
-            calcLightingTriangle(frag);
-          break;
-        case Fragment::FR_LINESEG:
-          if(frag.lineprop != 0)
-            calcLightingLine(frag);
-          break;
-        default:
-          break;
+          Fragment& frag = fragments[i];
+          switch(frag.type)
+            {
+            case Fragment::FR_TRIANGLE:
+              if(frag.surfaceprop != 0)
+                calcLightingTriangle(frag);
+              break;
+            case Fragment::FR_LINESEG:
+              if(frag.lineprop != 0)
+                calcLightingLine(frag);
+              break;
+            default:
+              break;
+            }
         }
-    }
+    });
 }
 
 void Scene::projectFragments(const Camera& cam)
 {
   // convert 3d to 2d coordinates using the Camera
-  for(auto& f : fragments)
-    for(unsigned pi=0, np=f.nPointsTotal(); pi<np; ++pi)
-      f.proj[pi] = calcProjVec(cam.perspM, f.points[pi]);
+  parallelRanges(threadsForItems(numthreads, fragments.size(), min_thread_frags),
+                 fragments.size(),
+                 [this, &cam](std::size_t start, std::size_t end)
+    {
+      for(std::size_t i=start; i<end; ++i)
+        {
+          Fragment& f = fragments[i];
+          for(unsigned pi=0, np=f.nPointsTotal(); pi<np; ++pi)
+            f.proj[pi] = calcProjVec(cam.perspM, f.points[pi]);
+        }
+    });
 }
 
 void Scene::renderPainters(const Camera& cam)
 {
   calcLighting();
 
-  breakLongLines(fragments, 0.25);
+  breakLongLines(fragments, 0.25, numthreads);
   projectFragments(cam);
 
   // simple painter's algorithm
-  draworder.reserve(fragments.size());
-  for(unsigned i=0; i<fragments.size(); ++i)
-    draworder.push_back(i);
+  const unsigned nthreads = threadsForItems(numthreads, fragments.size(),
+                                            min_thread_frags);
+  std::vector<FragDepth> depths(fragments.size());
+  parallelRanges(nthreads, fragments.size(),
+                 [this, &depths](std::size_t start, std::size_t end)
+    {
+      for(std::size_t i=start; i<end; ++i)
+        {
+          depths[i].depth = fragments[i].maxDepth();
+          depths[i].idx = i;
+        }
+    });
 
-  std::sort(draworder.begin(), draworder.end(),
-            [this](unsigned i, unsigned j)
-            {
-              return fragments[i].maxDepth() > fragments[j].maxDepth();
-            }
-            );
+  parallelSort(nthreads, depths.begin(), depths.end());
+
+  draworder.reserve(fragments.size());
+  for(auto const& d : depths)
+    draworder.push_back(d.idx);
 }
 
 void Scene::renderBSP(const Camera& cam)
@@ -507,7 +616,7 @@ void Scene::renderBSP(const Camera& cam)
         }
     }
 
-  BSPBuilder bsp(fragments, Vec3(0,0,1));
+  BSPBuilder bsp(fragments, Vec3(0,0,1), numthreads);
   draworder = bsp.getFragmentIdxs(fragments);
 
   //std::cout << "BSP recs size " << bsp.bsp_recs.size() << '\n';
@@ -516,6 +625,254 @@ void Scene::renderBSP(const Camera& cam)
   projectFragments(cam);
 }
 
+void Scene::renderZBuffer(const Camera& cam)
+{
+  // no ordering is required, as the depth buffer hides fragments
+  calcLighting();
+  projectFragments(cam);
+}
+
+void Scene::doZBufferDrawing(QPainter* painter, const Mat3& screenM,
+                             double linescale, const Camera& cam,
+                             double x1, double y1, double x2, double y2)
+{
+  if( !(x2 > x1) || !(y2 > y1) )
+    return;
+
+  // choose image size from the device pixels covered
+  const double devscale =
+    std::sqrt(std::abs(painter->combinedTransform().determinant()));
+  const int outwidth = std::min(std::max(int(std::ceil((x2-x1)*devscale)), 1),
+                                max_zbuffer_size);
+  const int outheight = std::min(std::max(int(std::ceil((y2-y1)*devscale)), 1),
+                                 max_zbuffer_size);
+  int ss = std::max(int(supersample), 1);
+  while( ss > 1 && double(outwidth)*outheight*ss*ss > max_zbuffer_pixels )
+    --ss;
+  ZBuffer zbuf(outwidth*ss, outheight*ss);
+
+  // scaling from screen to z-buffer pixels
+  const double sx = zbuf.width / (x2-x1);
+  const double sy = zbuf.height / (y2-y1);
+
+  // convert projected points to z-buffer pixels. Lines and paths are
+  // moved forward, as in the other modes.
+  parallelRanges(threadsForItems(numthreads, fragments.size(), min_thread_frags),
+                 fragments.size(),
+                 [this, &screenM, x1, y1, sx, sy](std::size_t start, std::size_t end)
+    {
+      for(std::size_t i=start; i<end; ++i)
+        {
+          Fragment& f = fragments[i];
+          const double delta =
+            f.type == Fragment::FR_LINESEG ? LINE_DELTA_DEPTH :
+            f.type == Fragment::FR_PATH ? 2*LINE_DELTA_DEPTH : 0;
+          for(unsigned pi=0, np=f.nPointsTotal(); pi<np; ++pi)
+            {
+              Vec2 p = projVecToScreen(screenM, f.proj[pi]);
+              f.proj[pi] = Vec3((p(0)-x1)*sx, (p(1)-y1)*sy, f.proj[pi](2)-delta);
+            }
+        }
+    });
+
+  // how to get back to the screen from the new projected points
+  Mat3 pixelM = identityM3();
+  pixelM(0,0) = 1/sx;
+  pixelM(1,1) = 1/sy;
+  projM = translateM3(x1, y1) * pixelM;
+
+  // distance to centre of plot
+  const double dist0 = vec4to3(cam.viewM*Vec4(0,0,0)).rad();
+
+  // Sort fragments into those drawn in any order, translucent ones,
+  // drawn afterwards, and paths with callbacks, drawn with the
+  // painter at the end. Paths are drawn using images made here.
+  std::vector<ZBufferItem> opaque, translucent;
+  std::vector<unsigned> callbacks;
+  std::vector<QImage> pathimages;
+  std::map<PathImageKey, unsigned> pathimagemap;
+
+  for(unsigned i=0, s=fragments.size(); i<s; ++i)
+    {
+      const Fragment& frag = fragments[i];
+      switch(frag.type)
+        {
+        case Fragment::FR_TRIANGLE:
+          if(frag.surfaceprop != 0 && !frag.surfaceprop->hide)
+            {
+              const QRgb col = qPremultiply(surfaceProp2QColor(frag).rgba());
+              if(qAlpha(col) == 255)
+                opaque.push_back(ZBufferItem(i, col));
+              else if(qAlpha(col) != 0)
+                translucent.push_back(ZBufferItem(i, col));
+            }
+          break;
+
+        case Fragment::FR_LINESEG:
+          if(frag.lineprop != 0 && !frag.lineprop->hide)
+            {
+              const QRgb col = qPremultiply
+                (frag.usecalccolor ? frag.calccolor :
+                 frag.lineprop->color(frag.index).rgba());
+              if(qAlpha(col) == 255)
+                opaque.push_back(ZBufferItem(i, col));
+              else if(qAlpha(col) != 0)
+                translucent.push_back(ZBufferItem(i, col));
+            }
+          break;
+
+        case Fragment::FR_PATH:
+          {
+            FragmentPathParameters* pars =
+              static_cast<FragmentPathParameters*>(frag.params);
+            if(pars->runcallback)
+              {
+                callbacks.push_back(i);
+                break;
+              }
+
+            // size of path in pixels, to nearest quarter pixel
+            double scale = frag.pathsize*linescale;
+            if(pars->scalepersp)
+              scale *= dist0 / frag.points[0].rad();
+            const long qsize = std::lround(scale*sx*4);
+            if( !std::isfinite(scale) || qsize <= 0 )
+              break;
+
+            const QRgb linecol =
+              frag.lineprop == 0 || frag.lineprop->hide ? 0 :
+              frag.usecalccolor ? frag.calccolor :
+              frag.lineprop->color(frag.index).rgba();
+            const QRgb fillcol =
+              frag.surfaceprop == 0 || frag.surfaceprop->hide ? 0 :
+              surfaceProp2QColor(frag).rgba();
+            const PathImageKey key(frag.params, frag.lineprop, frag.surfaceprop,
+                                   linecol, fillcol, qsize);
+
+            auto it = pathimagemap.find(key);
+            if(it == pathimagemap.end())
+              {
+                // draw path at the quantized size into an image
+                // large enough to hold it
+                Fragment pathfrag(frag);
+                pathfrag.pathsize = qsize/(4*sx*linescale);
+                const double pathscale = pathfrag.pathsize*linescale;
+
+                const double extent = pathExtent(pathfrag, pathscale, linescale);
+                const int size = 2*int(std::ceil(extent*std::max(sx, sy)))+3;
+
+                QImage img(size, size, QImage::Format_ARGB32_Premultiplied);
+                img.fill(0);
+                QPainter pathpainter(&img);
+                pathpainter.setRenderHint(QPainter::Antialiasing);
+                pathpainter.translate(size*0.5, size*0.5);
+                pathpainter.scale(sx, sy);
+                pathpainter.setPen(lineProp2QPen(pathfrag, linescale));
+                pathpainter.setBrush(surfaceProp2QBrush(pathfrag));
+                const QPointF origin(0, 0);
+                drawPath(&pathpainter, pathfrag, origin, origin, origin,
+                         linescale, 1);
+                pathpainter.end();
+
+                it = pathimagemap.insert
+                  (std::make_pair(key, unsigned(pathimages.size()))).first;
+                pathimages.push_back(img);
+              }
+            opaque.push_back(ZBufferItem(i, it->second));
+          }
+          break;
+
+        default:
+          break;
+        }
+    }
+
+  // translucent fragments are blended from back to front
+  std::sort(translucent.begin(), translucent.end(),
+            [this](const ZBufferItem& a, const ZBufferItem& b)
+            {
+              return FragDepth{fragments[a.idx].maxDepth(), a.idx} <
+                FragDepth{fragments[b.idx].maxDepth(), b.idx};
+            });
+
+  // threads draw separate bands of rows, each drawing all the
+  // fragments in the same order, so the image does not depend on the
+  // number of threads
+  auto drawItem = [this, &zbuf, &pathimages, linescale, sx]
+    (const ZBufferItem& item, int row1, int row2)
+    {
+      const Fragment& frag = fragments[item.idx];
+      switch(frag.type)
+        {
+        case Fragment::FR_TRIANGLE:
+          zbuf.drawTriangle(frag.proj, item.data, row1, row2);
+          break;
+        case Fragment::FR_LINESEG:
+          zbuf.drawLine(frag.proj[0], frag.proj[1],
+                        frag.lineprop->width*linescale*sx, item.data,
+                        row1, row2);
+          break;
+        case Fragment::FR_PATH:
+          {
+            const QImage& img = pathimages[item.data];
+            const double x = frag.proj[0](0) - img.width()*0.5;
+            const double y = frag.proj[0](1) - img.height()*0.5;
+            if(std::abs(x) < 1e9 && std::abs(y) < 1e9)
+              zbuf.drawImage(img, int(std::floor(x+0.5)), int(std::floor(y+0.5)),
+                             frag.proj[0](2), row1, row2);
+          }
+          break;
+        default:
+          break;
+        }
+    };
+
+  parallelRanges(threadsForItems(numthreads, zbuf.height, 16), zbuf.height,
+                 [&opaque, &translucent, &drawItem](std::size_t row1, std::size_t row2)
+    {
+      for(auto const& item : opaque)
+        drawItem(item, int(row1), int(row2));
+      for(auto const& item : translucent)
+        drawItem(item, int(row1), int(row2));
+    });
+
+  painter->save();
+  painter->setRenderHint(QPainter::SmoothPixmapTransform);
+  painter->drawImage(QRectF(x1, y1, x2-x1, y2-y1), zbuf.makeImage(ss));
+  painter->restore();
+
+  // Draw paths with callbacks (e.g. text) from back to front, if
+  // they are not hidden at their position
+  std::sort(callbacks.begin(), callbacks.end(),
+            [this](unsigned a, unsigned b)
+            {
+              return FragDepth{fragments[a].maxDepth(), a} <
+                FragDepth{fragments[b].maxDepth(), b};
+            });
+
+  QPointF projpts[3];
+  for(unsigned idx : callbacks)
+    {
+      const Fragment& frag = fragments[idx];
+      const double px = frag.proj[0](0);
+      const double py = frag.proj[0](1);
+      if(px >= 0 && py >= 0 && px < zbuf.width && py < zbuf.height &&
+         zbuf.depths[int(py)*zbuf.width+int(px)] < frag.proj[0](2))
+        continue;
+
+      for(unsigned pi=0; pi<3; ++pi)
+        {
+          projpts[pi].setX(frag.proj[pi](0)/sx + x1);
+          projpts[pi].setY(frag.proj[pi](1)/sy + y1);
+        }
+
+      painter->setPen(lineProp2QPen(frag, linescale));
+      painter->setBrush(surfaceProp2QBrush(frag));
+      drawPath(painter, frag, projpts[0], projpts[1], projpts[2],
+               linescale, dist0 / frag.points[0].rad());
+    }
+}
+
 void Scene::render(Object* root,
                    QPainter* painter, const Camera& cam,
                    double x1, double y1, double x2, double y2,
@@ -581,6 +938,300 @@ unsigned long long Scene::idPixel(Object* root,
   return callback.lastwidgetid;
 }
 
+void Scene::makePickGrid()
+{
+  // In the z-buffer mode, the nearest fragment was drawn. Otherwise
+  // the fragments were drawn in order.
+  const bool usedepth = mode == RENDER_ZBUFFER;
+  const unsigned nitems = usedepth ? fragments.size() : draworder.size();
+
+  // find rectangles on screen covered by fragments
+  std::vector<PickRect> rects(nitems);
+  pickcallbacks.clear();
+  for(unsigned i=0; i<nitems; ++i)
+    {
+      const Fragment& frag = fragments[usedepth ? i : draworder[i]];
+      PickRect& r = rects[i];
+
+      // margin around points
+      double extent;
+      switch(frag.type)
+        {
+        case Fragment::FR_TRIANGLE:
+          extent = frag.surfaceprop != 0 && !frag.surfaceprop->hide ? 0 : -1;
+          break;
+        case Fragment::FR_LINESEG:
+          extent = frag.lineprop != 0 && !frag.lineprop->hide ?
+            0.5*frag.lineprop->width*lastlinescale : -1;
+          break;
+        case Fragment::FR_PATH:
+          {
+            FragmentPathParameters* pars =
+              static_cast<FragmentPathParameters*>(frag.params);
+            if(pars->runcallback)
+              {
+                // these are found by drawing them
+                pickcallbacks.push_back(i);
+                extent = -1;
+                break;
+              }
+            double scale = frag.pathsize*lastlinescale;
+            if(pars->scalepersp)
+              scale *= lastdist0 / frag.points[0].rad();
+            extent = pathExtent(frag, scale, lastlinescale);
+          }
+          break;
+        default:
+          extent = -1;
+          break;
+        }
+
+      r.x1 = r.y1 = std::numeric_limits<double>::infinity();
+      r.x2 = r.y2 = -std::numeric_limits<double>::infinity();
+      if(!(extent >= 0))
+        continue;
+      for(unsigned pi=0, np=frag.nPointsVisible(); pi<np; ++pi)
+        {
+          const Vec2 p = projVecToScreen(projM, frag.proj[pi]);
+          r.x1 = std::min(r.x1, p(0)-extent);
+          r.y1 = std::min(r.y1, p(1)-extent);
+          r.x2 = std::max(r.x2, p(0)+extent);
+          r.y2 = std::max(r.y2, p(1)+extent);
+        }
+    }
+
+  if(usedepth)
+    std::sort(pickcallbacks.begin(), pickcallbacks.end(),
+              [this](unsigned a, unsigned b)
+              {
+                return FragDepth{fragments[a].maxDepth(), a} <
+                  FragDepth{fragments[b].maxDepth(), b};
+              });
+
+  // Make cells the average size of the fragments, so each is listed
+  // in a few cells, but with roughly no more cells than fragments,
+  // within limits.
+  const double w = lastx2-lastx1;
+  const double h = lasty2-lasty1;
+  double sumsize = 0;
+  unsigned nrects = 0;
+  for(auto const& r : rects)
+    if(r.x2 >= r.x1)
+      {
+        sumsize += std::min(std::max(r.x2-r.x1, r.y2-r.y1), std::max(w, h));
+        ++nrects;
+      }
+  const double ncells = clip(double(nrects), 1., max_pick_cells);
+  gridcell = std::sqrt(w*h/ncells);
+  if(nrects > 0 && std::isfinite(sumsize))
+    gridcell = std::max(gridcell, sumsize/nrects);
+  gridx0 = lastx1;
+  gridy0 = lasty1;
+  gridnx = clip(int(std::ceil(w/gridcell)), 1, int(max_pick_cells));
+  gridny = clip(int(std::ceil(h/gridcell)), 1, int(max_pick_cells));
+
+  // count fragments in each cell, then list them
+  gridstart.assign(std::size_t(gridnx)*gridny+1, 0);
+  for(int pass=0; pass<2; ++pass)
+    {
+      std::vector<unsigned> next;
+      if(pass == 1)
+        {
+          for(std::size_t c=1; c<gridstart.size(); ++c)
+            gridstart[c] += gridstart[c-1];
+          griditems.resize(gridstart.back());
+          next.assign(gridstart.begin(), gridstart.end()-1);
+        }
+
+      for(unsigned i=0; i<nitems; ++i)
+        {
+          const PickRect& r = rects[i];
+          int cx1, cy1, cx2, cy2;
+          if(!gridCells(r.x1, r.y1, r.x2, r.y2, cx1, cy1, cx2, cy2))
+            continue;
+          for(int cy=cy1; cy<=cy2; ++cy)
+            for(int cx=cx1; cx<=cx2; ++cx)
+              {
+                const std::size_t c = std::size_t(cy)*gridnx+cx;
+                if(pass == 0)
+                  ++gridstart[c+1];
+                else
+                  griditems[next[c]++] = i;
+              }
+        }
+    }
+
+  gridmade = true;
+}
+
+bool Scene::gridCells(double x1, double y1, double x2, double y2,
+                      int& cx1, int& cy1, int& cx2, int& cy2) const
+{
+  const double fx1 = (x1-gridx0)/gridcell;
+  const double fy1 = (y1-gridy0)/gridcell;
+  const double fx2 = (x2-gridx0)/gridcell;
+  const double fy2 = (y2-gridy0)/gridcell;
+  if( !(fx2 >= 0) || !(fy2 >= 0) || !(fx1 < gridnx) || !(fy1 < gridny) ||
+      !std::isfinite(fx1+fy1+fx2+fy2) )
+    return false;
+
+  cx1 = int(std::max(fx1, 0.));
+  cy1 = int(std::max(fy1, 0.));
+  cx2 = int(std::min(fx2, gridnx-1.));
+  cy2 = int(std::min(fy2, gridny-1.));
+  return true;
+}
+
+unsigned Scene::pickFragment(double x1, double y1, double scaling,
+                             int width, int height, float* depth)
+{
+  // fragments in nearby cells, allowing for the minimum line width
+  const double margin = 1/scaling;
+  std::vector<unsigned> items;
+  int cx1, cy1, cx2, cy2;
+  if(gridCells(x1-margin, y1-margin,
+               x1+width/scaling+margin, y1+height/scaling+margin,
+               cx1, cy1, cx2, cy2))
+    {
+      for(int cy=cy1; cy<=cy2; ++cy)
+        for(int cx=cx1; cx<=cx2; ++cx)
+          {
+            const std::size_t c = std::size_t(cy)*gridnx+cx;
+            items.insert(items.end(), griditems.begin()+gridstart[c],
+                         griditems.begin()+gridstart[c+1]);
+          }
+      std::sort(items.begin(), items.end());
+      items.erase(std::unique(items.begin(), items.end()), items.end());
+    }
+
+  // Draw the fragments in order. In the z-buffer mode the nearest
+  // is found, otherwise the depth is minus the position in the
+  // order, so the last drawn is found.
+  const bool usedepth = mode == RENDER_ZBUFFER;
+  const Mat3 M = scaleM3(scaling) * translateM3(-x1, -y1) * projM;
+  IdBuffer buf(width, height);
+  for(unsigned i : items)
+    {
+      const unsigned idx = usedepth ? i : draworder[i];
+      const Fragment& frag = fragments[idx];
+
+      Vec3 pts[3];
+      for(unsigned pi=0, np=frag.nPointsTotal(); pi<np; ++pi)
+        {
+          const Vec2 p = projVecToScreen(M, frag.proj[pi]);
+          pts[pi] = Vec3(p(0), p(1), usedepth ? frag.proj[pi](2) : -double(i));
+        }
+
+      switch(frag.type)
+        {
+        case Fragment::FR_TRIANGLE:
+          buf.drawTriangle(pts, idx, 0, height);
+          break;
+        case Fragment::FR_LINESEG:
+          buf.drawLine(pts[0], pts[1], frag.lineprop->width*lastlinescale*scaling,
+                       idx, 0, height);
+          break;
+        case Fragment::FR_PATH:
+          {
+            FragmentPathParameters* pars =
+              static_cast<FragmentPathParameters*>(frag.params);
+            double scale = frag.pathsize*lastlinescale;
+            if(pars->scalepersp)
+              scale *= lastdist0 / frag.points[0].rad();
+            const double extent = pathExtent(frag, scale, lastlinescale)*scaling;
+            buf.drawRect(pts[0](0)-extent, pts[0](1)-extent,
+                         pts[0](0)+extent, pts[0](1)+extent,
+                         pts[0](2), idx, 0, height);
+          }
+          break;
+        default:
+          break;
+        }
+    }
+
+  return buf.nearest(0, 0, width, height, depth);
+}
+
+bool Scene::pathDrawnAt(QPainter* painter, const Fragment& frag,
+                        double scaling, int x, int y)
+{
+  QImage img(2*pick_box+1, 2*pick_box+1, QImage::Format_ARGB32_Premultiplied);
+  img.fill(0);
+
+  QPointF projpts[3];
+  for(unsigned pi=0; pi<3; ++pi)
+    {
+      const Vec2 p = projVecToScreen(projM, frag.proj[pi]);
+      projpts[pi].setX(p(0));
+      projpts[pi].setY(p(1));
+    }
+
+  // draw with (x, y) at the centre of the image
+  painter->begin(&img);
+  painter->translate(pick_box-x, pick_box-y);
+  painter->scale(scaling, scaling);
+  painter->setPen(lineProp2QPen(frag, lastlinescale));
+  painter->setBrush(surfaceProp2QBrush(frag));
+  drawPath(painter, frag, projpts[0], projpts[1], projpts[2],
+           lastlinescale, lastdist0 / frag.points[0].rad());
+  painter->end();
+
+  for(int iy=0; iy<img.height(); ++iy)
+    {
+      const QRgb* line = reinterpret_cast<const QRgb*>(img.constScanLine(iy));
+      for(int ix=0; ix<img.width(); ++ix)
+        if(line[ix] != 0)
+          return true;
+    }
+  return false;
+}
+
+unsigned long long Scene::pickWidget(QPainter* painter, double scaling,
+                                     int x, int y)
+{
+  if(!lastvalid || !(lastx2 > lastx1) || !(lasty2 > lasty1))
+    return 0;
+
+  if(!gridmade)
+    makePickGrid();
+
+  // fragment drawn nearest the front in the pixels around (x, y)
+  float depth;
+  const unsigned nearest = pickFragment
+    ((x-pick_box)/scaling, (y-pick_box)/scaling, scaling,
+     2*pick_box+1, 2*pick_box+1, &depth);
+  const Fragment* found = nearest == IdBuffer::NO_ID ? 0 : &fragments[nearest];
+
+  // Paths with callbacks (e.g. text) can only be found by drawing
+  // them, starting with the last drawn. Without depths, those drawn
+  // before the fragment found are hidden. With depths, they are
+  // hidden if something nearer was drawn at their position.
+  const bool usedepth = mode == RENDER_ZBUFFER;
+  for(auto it=pickcallbacks.rbegin(); it!=pickcallbacks.rend(); ++it)
+    {
+      const Fragment& frag = fragments[usedepth ? *it : draworder[*it]];
+      if(usedepth)
+        {
+          const Vec2 p = projVecToScreen(projM, frag.proj[0]);
+          float anchordepth;
+          pickFragment(p(0)-0.5/scaling, p(1)-0.5/scaling, scaling, 1, 1,
+                       &anchordepth);
+          if(anchordepth < frag.proj[0](2))
+            continue;
+        }
+      else if(found != 0 && -double(*it) > depth)
+        break;
+
+      if(pathDrawnAt(painter, frag, scaling, x, y))
+        {
+          found = &frag;
+          break;
+        }
+    }
+
+  return found != 0 && found->object != 0 ? found->object->widgetid : 0;
+}
+
 void Scene::render_internal(Object* root,
                             QPainter* painter, const Camera& cam,
                             double x1, double y1, double x2, double y2,
@@ -602,6 +1253,13 @@ void Scene::render_internal(Object* root,
     case RENDER_PAINTERS:
       renderPainters(cam);
       break;
+    case RENDER_ZBUFFER:
+      // finding drawn fragments needs them drawn separately
+      if(callback == 0)
+        renderZBuffer(cam);
+      else
+        renderPainters(cam);
+      break;
     default:
       break;
     }
@@ -614,7 +1272,18 @@ void Scene::render_internal(Object* root,
   double linescale = std::max(std::abs(x2-x1), std::abs(y2-y1)) * (1./1000);
 
   // finally draw items
-  doDrawing(painter, screenM, linescale, cam, callback);
+  projM = screenM;
+  if(mode == RENDER_ZBUFFER && callback == 0)
+    doZBufferDrawing(painter, screenM, linescale, cam, x1, y1, x2, y2);
+  else
+    doDrawing(painter, screenM, linescale, cam, callback);
+
+  // keep details of what was drawn for pickWidget
+  lastvalid = callback == 0;
+  lastx1 = x1; lasty1 = y1; lastx2 = x2; lasty2 = y2;
+  lastlinescale = linescale;
+  lastdist0 = vec4to3(cam.viewM*Vec4(0,0,0)).rad();
+  gridmade = false;
 
   // don't decrease size of fragments unnecessarily, unless it is large
   init_fragments_size = fragments.size();
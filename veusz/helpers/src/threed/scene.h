@@ -30,7 +30,7 @@
 class Scene
 {
 public:
-  enum RenderMode {RENDER_PAINTERS, RENDER_BSP};
+  enum RenderMode {RENDER_PAINTERS, RENDER_BSP, RENDER_ZBUFFER};
 
 private:
   // internal light color and position
@@ -52,13 +52,22 @@ private:
 
 public:
   Scene(RenderMode _mode)
-    : mode(_mode)
+    : mode(_mode), numthreads(0), supersample(2), lastvalid(false),
+      gridmade(false)
   {
   }
 
   // add a light to a list
   void addLight(Vec3 posn, QColor col, double intensity);
 
+  // set maximum number of threads to use for rendering (0 for the
+  // number of processors)
+  void setNumThreads(unsigned n) { numthreads = n; }
+
+  // set number of samples along each axis for each pixel in the
+  // RENDER_ZBUFFER mode
+  void setSupersample(unsigned n) { supersample = n; }
+
   // render scene to painter in coordinate range given
   // (if scale<=0 then automatic scaling)
   void render(Object* root,
@@ -70,6 +79,12 @@ public:
                              double x1, double y1, double x2, double y2, double scale,
                              double scaling, int x, int y);
 
+  // find widget id of pixel painted at (x, y) by the last call to
+  // render, without drawing the scene again. The painter (which
+  // should not be active) is used to draw paths with callbacks.
+  unsigned long long pickWidget(QPainter* painter, double scaling,
+                                int x, int y);
+
 public:
   // last screen matrix
   Mat3 screenM;
@@ -90,9 +105,19 @@ private:
                 QPointF pt1, QPointF pt2, QPointF pt3,
                 double linescale, double distscale);
 
+  // size of path around its origin, given its scale
+  double pathExtent(const Fragment& frag, double pathscale,
+                    double linescale) const;
+
+  // rasterize fragments into a depth-buffered image and draw it
+  void doZBufferDrawing(QPainter* painter, const Mat3& screenM,
+                        double linescale, const Camera& cam,
+                        double x1, double y1, double x2, double y2);
+
   // different rendering modes
   void renderPainters(const Camera& cam);
   void renderBSP(const Camera& cam);
+  void renderZBuffer(const Camera& cam);
 
   // render scene to painter in coordinate range given
   // (if scale<=0 then automatic scaling)
@@ -101,6 +126,25 @@ private:
                        double x1, double y1, double x2, double y2, double scale,
                        DrawCallback* callback=0);
 
+  // make grid listing fragments drawn in each cell by the last render
+  void makePickGrid();
+
+  // get the range of grid cells covering a rectangle on the screen,
+  // returning false if none
+  bool gridCells(double x1, double y1, double x2, double y2,
+                 int& cx1, int& cy1, int& cx2, int& cy2) const;
+
+  // find the fragment drawn at the front by the last render in the
+  // pixels of a buffer of the size given, with its top left at (x1,
+  // y1) on the screen, and scaling from screen to buffer pixels.
+  // Returns its index or IdBuffer::NO_ID, and its depth.
+  unsigned pickFragment(double x1, double y1, double scaling,
+                        int width, int height, float* depth);
+
+  // does drawing the path fragment change the pixels around (x, y)?
+  bool pathDrawnAt(QPainter* painter, const Fragment& frag,
+                   double scaling, int x, int y);
+
   // create pens/brushes
   QPen lineProp2QPen(const Fragment& frag, double linescale) const;
   QColor surfaceProp2QColor(const Fragment& frag) const;
@@ -109,9 +153,30 @@ private:
 
 private:
   RenderMode mode;
+  unsigned numthreads;
+  unsigned supersample;
   FragmentVector fragments;
   std::vector<unsigned> draworder;
   std::vector<Light> lights;
+
+  // details of the last render, kept to find what was drawn, where
+  // projM converts the projected points of the fragments to the
+  // screen
+  bool lastvalid;
+  Mat3 projM;
+  double lastx1, lasty1, lastx2, lasty2, lastlinescale, lastdist0;
+
+  // grid of gridnx*gridny cells of size gridcell, starting at
+  // (gridx0, gridy0), listing the fragments drawn in each by their
+  // position in draworder (or fragment index in the z-buffer
+  // mode). Cell i lists griditems[gridstart[i]] to
+  // griditems[gridstart[i+1]-1], in drawing order.
+  bool gridmade;
+  int gridnx, gridny;
+  double gridx0, gridy0, gridcell;
+  std::vector<unsigned> gridstart, griditems;
+  // paths with callbacks, in drawing order
+  std::vector<unsigned> pickcallbacks;
 };
 
 #endif
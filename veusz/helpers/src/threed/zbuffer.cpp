@@ -0,0 +1,273 @@
+//    Copyright (C) 2021 Jeremy S. Sanders
+//    Email: Jeremy Sanders <jeremy@jeremysanders.net>
+//
+//    This program is free software; you can redistribute it and/or modify
+//    it under the terms of the GNU General Public License as published by
+//    the Free Software Foundation; either version 2 of the License, or
+//    (at your option) any later version.
+//
+//    This program is distributed in the hope that it will be useful,
+//    but WITHOUT ANY WARRANTY; without even the implied warranty of
+//    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+//    GNU General Public License for more details.
+//
+//    You should have received a copy of the GNU General Public License along
+//    with this program; if not, write to the Free Software Foundation, Inc.,
+//    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+/////////////////////////////////////////////////////////////////////////////
+
+#include <algorithm>
+#include <cmath>
+#include <limits>
+#include "zbuffer.h"
+
+namespace
+{
+  // Fill convex polygon with npts points (3 or 4), given as x, y, z
+  // triples. Pixels are drawn if their centres are inside the
+  // polygon, with the depth interpolated over the plane of the first
+  // three points.
+  template<class PlotFn> void fillConvex(const double (*pts)[3], int npts,
+                                         int width, int row1, int row2,
+                                         PlotFn plot)
+  {
+    double minx = pts[0][0], maxx = pts[0][0];
+    double miny = pts[0][1], maxy = pts[0][1];
+    double area = 0;
+    for(int i=0; i<npts; ++i)
+      {
+        const double* p = pts[i];
+        const double* q = pts[(i+1)%npts];
+        if(!std::isfinite(p[0]) || !std::isfinite(p[1]) || !std::isfinite(p[2]))
+          return;
+        minx = std::min(minx, p[0]); maxx = std::max(maxx, p[0]);
+        miny = std::min(miny, p[1]); maxy = std::max(maxy, p[1]);
+        area += p[0]*q[1]-q[0]*p[1];
+      }
+    if(area == 0)
+      return;
+    const double sign = area > 0 ? 1 : -1;
+
+    // rows with centres in the polygon
+    const int iy1 = std::max(int(std::ceil(std::max(miny, double(row1)-1)-0.5)), row1);
+    const int iy2 = std::min(int(std::floor(std::min(maxy, double(row2)+1)-0.5))+1, row2);
+    if(iy1 >= iy2 || maxx < 0 || minx > width)
+      return;
+
+    // inside of edge i is where ea[i]*x+eb[i]*y+ec[i] >= 0
+    double ea[4], eb[4], ec[4];
+    for(int i=0; i<npts; ++i)
+      {
+        const double* p = pts[i];
+        const double* q = pts[(i+1)%npts];
+        ea[i] = -(q[1]-p[1])*sign;
+        eb[i] = (q[0]-p[0])*sign;
+        ec[i] = -(ea[i]*p[0]+eb[i]*p[1]);
+      }
+
+    // depth is za*x+zb*y+zc
+    const double dx1 = pts[1][0]-pts[0][0], dy1 = pts[1][1]-pts[0][1];
+    const double dx2 = pts[2][0]-pts[0][0], dy2 = pts[2][1]-pts[0][1];
+    const double dz1 = pts[1][2]-pts[0][2], dz2 = pts[2][2]-pts[0][2];
+    const double det = dx1*dy2-dx2*dy1;
+    if(det == 0)
+      return;
+    const double za = (dz1*dy2-dz2*dy1)/det;
+    const double zb = (dx1*dz2-dx2*dz1)/det;
+    const double zc = pts[0][2]-za*pts[0][0]-zb*pts[0][1];
+
+    for(int y=iy1; y<iy2; ++y)
+      {
+        const double yc = y+0.5;
+
+        // range of x where pixel centre is inside every edge
+        double xl = minx, xr = maxx;
+        bool empty = false;
+        for(int i=0; i<npts; ++i)
+          {
+            const double c = eb[i]*yc+ec[i];
+            if(ea[i] > 0)
+              xl = std::max(xl, -c/ea[i]);
+            else if(ea[i] < 0)
+              xr = std::min(xr, -c/ea[i]);
+            else if(c < 0)
+              empty = true;
+          }
+        if(empty || xl > xr)
+          continue;
+
+        const int ix1 = std::max(int(std::ceil(std::max(xl, -1.)-0.5)), 0);
+        const int ix2 = std::min(int(std::floor(std::min(xr, double(width)+1)-0.5))+1,
+                                 width);
+        double z = za*(ix1+0.5)+zb*yc+zc;
+        for(int x=ix1; x<ix2; ++x, z+=za)
+          plot(y*width+x, z);
+      }
+  }
+
+  // Get the corners of a rectangle around a line with the width
+  // given, at least a pixel wide, with square ends. Returns false if
+  // the line is not finite.
+  bool lineRect(const Vec3& pt1, const Vec3& pt2, double linewidth,
+                double (*rect)[3])
+  {
+    const double hw = 0.5*std::max(linewidth, 1.);
+    const double dx = pt2(0)-pt1(0);
+    const double dy = pt2(1)-pt1(1);
+    const double len = std::sqrt(dx*dx+dy*dy);
+    if(!std::isfinite(len))
+      return false;
+
+    // vectors along and perpendicular to line, with length hw
+    const double ux = len>0 ? dx*hw/len : hw;
+    const double uy = len>0 ? dy*hw/len : 0;
+
+    const double corners[4][3] = {
+      {pt1(0)-ux-uy, pt1(1)-uy+ux, pt1(2)},
+      {pt2(0)+ux-uy, pt2(1)+uy+ux, pt2(2)},
+      {pt2(0)+ux+uy, pt2(1)+uy-ux, pt2(2)},
+      {pt1(0)-ux+uy, pt1(1)-uy-ux, pt1(2)}
+    };
+    std::copy(&corners[0][0], &corners[0][0]+12, &rect[0][0]);
+    return true;
+  }
+}
+
+ZBuffer::ZBuffer(int _width, int _height)
+  : width(_width), height(_height),
+    colors(std::size_t(_width)*_height, 0),
+    depths(std::size_t(_width)*_height, std::numeric_limits<float>::infinity())
+{
+}
+
+void ZBuffer::drawTriangle(const Vec3* pts, QRgb col, int row1, int row2)
+{
+  const double tri[3][3] = {
+    {pts[0](0), pts[0](1), pts[0](2)},
+    {pts[1](0), pts[1](1), pts[1](2)},
+    {pts[2](0), pts[2](1), pts[2](2)}
+  };
+  fillConvex(tri, 3, width, row1, row2,
+             [this, col](int idx, double z) { plot(idx, z, col); });
+}
+
+void ZBuffer::drawLine(const Vec3& pt1, const Vec3& pt2, double linewidth,
+                       QRgb col, int row1, int row2)
+{
+  double rect[4][3];
+  if(lineRect(pt1, pt2, linewidth, rect))
+    fillConvex(rect, 4, width, row1, row2,
+               [this, col](int idx, double z) { plot(idx, z, col); });
+}
+
+void ZBuffer::drawImage(const QImage& img, int x, int y, double z,
+                        int row1, int row2)
+{
+  const int ix1 = std::max(x, 0);
+  const int ix2 = std::min(x+img.width(), width);
+  const int iy1 = std::max(y, row1);
+  const int iy2 = std::min(y+img.height(), row2);
+
+  for(int iy=iy1; iy<iy2; ++iy)
+    {
+      const QRgb* line = reinterpret_cast<const QRgb*>(img.constScanLine(iy-y));
+      for(int ix=ix1; ix<ix2; ++ix)
+        {
+          const QRgb col = line[ix-x];
+          if(qAlpha(col) != 0)
+            plot(iy*width+ix, z, col);
+        }
+    }
+}
+
+QImage ZBuffer::makeImage(int supersample) const
+{
+  const int outwidth = width/supersample;
+  const int outheight = height/supersample;
+  const unsigned npix = supersample*supersample;
+
+  QImage img(outwidth, outheight, QImage::Format_ARGB32_Premultiplied);
+  for(int oy=0; oy<outheight; ++oy)
+    {
+      QRgb* line = reinterpret_cast<QRgb*>(img.scanLine(oy));
+      for(int ox=0; ox<outwidth; ++ox)
+        {
+          unsigned r=0, g=0, b=0, a=0;
+          for(int sy=0; sy<supersample; ++sy)
+            {
+              const QRgb* in = &colors[std::size_t(oy*supersample+sy)*width +
+                                       ox*supersample];
+              for(int sx=0; sx<supersample; ++sx)
+                {
+                  r += qRed(in[sx]); g += qGreen(in[sx]);
+                  b += qBlue(in[sx]); a += qAlpha(in[sx]);
+                }
+            }
+          line[ox] = qRgba((r+npix/2)/npix, (g+npix/2)/npix,
+                           (b+npix/2)/npix, (a+npix/2)/npix);
+        }
+    }
+  return img;
+}
+
+constexpr unsigned IdBuffer::NO_ID;
+
+IdBuffer::IdBuffer(int _width, int _height)
+  : width(_width), height(_height),
+    ids(std::size_t(_width)*_height, NO_ID),
+    depths(std::size_t(_width)*_height, std::numeric_limits<float>::infinity())
+{
+}
+
+void IdBuffer::drawTriangle(const Vec3* pts, unsigned id, int row1, int row2)
+{
+  const double tri[3][3] = {
+    {pts[0](0), pts[0](1), pts[0](2)},
+    {pts[1](0), pts[1](1), pts[1](2)},
+    {pts[2](0), pts[2](1), pts[2](2)}
+  };
+  fillConvex(tri, 3, width, row1, row2,
+             [this, id](int idx, double z) { plot(idx, z, id); });
+}
+
+void IdBuffer::drawLine(const Vec3& pt1, const Vec3& pt2, double linewidth,
+                        unsigned id, int row1, int row2)
+{
+  double rect[4][3];
+  if(lineRect(pt1, pt2, linewidth, rect))
+    fillConvex(rect, 4, width, row1, row2,
+               [this, id](int idx, double z) { plot(idx, z, id); });
+}
+
+void IdBuffer::drawRect(double x1, double y1, double x2, double y2, double z,
+                        unsigned id, int row1, int row2)
+{
+  // at least a pixel in size
+  const double cx = 0.5*(x1+x2), cy = 0.5*(y1+y2);
+  const double hw = std::max(0.5*(x2-x1), 0.5);
+  const double hh = std::max(0.5*(y2-y1), 0.5);
+  const double rect[4][3] = {
+    {cx-hw, cy-hh, z}, {cx+hw, cy-hh, z}, {cx+hw, cy+hh, z}, {cx-hw, cy+hh, z}
+  };
+  fillConvex(rect, 4, width, row1, row2,
+             [this, id](int idx, double z) { plot(idx, z, id); });
+}
+
+unsigned IdBuffer::nearest(int x1, int y1, int x2, int y2, float* depth) const
+{
+  unsigned id = NO_ID;
+  float mindepth = std::numeric_limits<float>::infinity();
+  for(int y=std::max(y1, 0); y<std::min(y2, height); ++y)
+    for(int x=std::max(x1, 0); x<std::min(x2, width); ++x)
+      {
+        const std::size_t idx = std::size_t(y)*width+x;
+        if(ids[idx] != NO_ID && depths[idx] < mindepth)
+          {
+            id = ids[idx];
+            mindepth = depths[idx];
+          }
+      }
+  if(depth != 0)
+    *depth = mindepth;
+  return id;
+}
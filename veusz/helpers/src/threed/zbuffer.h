@@ -0,0 +1,137 @@
+// -*-c++-*-
+
+//    Copyright (C) 2021 Jeremy S. Sanders
+//    Email: Jeremy Sanders <jeremy@jeremysanders.net>
+//
+//    This program is free software; you can redistribute it and/or modify
+//    it under the terms of the GNU General Public License as published by
+//    the Free Software Foundation; either version 2 of the License, or
+//    (at your option) any later version.
+//
+//    This program is distributed in the hope that it will be useful,
+//    but WITHOUT ANY WARRANTY; without even the implied warranty of
+//    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+//    GNU General Public License for more details.
+//
+//    You should have received a copy of the GNU General Public License along
+//    with this program; if not, write to the Free Software Foundation, Inc.,
+//    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+/////////////////////////////////////////////////////////////////////////////
+
+#ifndef ZBUFFER_H
+#define ZBUFFER_H
+
+#include <vector>
+#include <QtGui/QRgb>
+#include <QtGui/QImage>
+#include "mmaths.h"
+
+// This class rasterizes triangles, lines and images into a color
+// image with a depth buffer, for drawing scenes with very many
+// fragments. Coordinates are in pixels, with the depth in z, where
+// smaller z values are nearer to the viewer. Colors are premultiplied
+// ARGB. Opaque pixels are drawn if they are nearer than those already
+// drawn, and set the depth. Translucent pixels nearer than the
+// opaque ones are blended over the image, so should be drawn last,
+// from back to front.
+//
+// Drawing is restricted to the rows from row1 to row2-1, so that
+// separate bands of rows can be drawn in different threads.
+
+class ZBuffer
+{
+public:
+  ZBuffer(int _width, int _height);
+
+  // draw triangle given by three points
+  void drawTriangle(const Vec3* pts, QRgb col, int row1, int row2);
+
+  // draw line between two points with the width given, with square
+  // ends
+  void drawLine(const Vec3& pt1, const Vec3& pt2, double linewidth, QRgb col,
+                int row1, int row2);
+
+  // draw image at a fixed depth, with its top left at x, y
+  void drawImage(const QImage& img, int x, int y, double z,
+                 int row1, int row2);
+
+  // return image averaging blocks of supersample*supersample pixels
+  QImage makeImage(int supersample) const;
+
+public:
+  int width, height;
+  std::vector<QRgb> colors;
+  std::vector<float> depths;
+
+private:
+  inline void plot(int idx, double z, QRgb col)
+  {
+    if(z < depths[idx])
+      {
+        const unsigned alpha = qAlpha(col);
+        if(alpha == 255)
+          {
+            colors[idx] = col;
+            depths[idx] = float(z);
+          }
+        else
+          colors[idx] = blend(col, colors[idx]);
+      }
+  }
+
+  // premultiplied color col drawn over bg
+  static inline QRgb blend(QRgb col, QRgb bg)
+  {
+    const unsigned inv = 255-qAlpha(col);
+    return qRgba(qRed(col) + (qRed(bg)*inv+127)/255,
+                 qGreen(col) + (qGreen(bg)*inv+127)/255,
+                 qBlue(col) + (qBlue(bg)*inv+127)/255,
+                 qAlpha(col) + (qAlpha(bg)*inv+127)/255);
+  }
+};
+
+// This class records which item is nearest to the viewer at each
+// pixel, for finding what was drawn at a position. Items are given by
+// an id, and are drawn with depths as in ZBuffer, but with no
+// blending.
+
+class IdBuffer
+{
+public:
+  // id where nothing has been drawn
+  static constexpr unsigned NO_ID = unsigned(-1);
+
+  IdBuffer(int _width, int _height);
+
+  // draw triangle given by three points
+  void drawTriangle(const Vec3* pts, unsigned id, int row1, int row2);
+
+  // draw line between two points with the width given
+  void drawLine(const Vec3& pt1, const Vec3& pt2, double linewidth,
+                unsigned id, int row1, int row2);
+
+  // draw rectangle at a fixed depth
+  void drawRect(double x1, double y1, double x2, double y2, double z,
+                unsigned id, int row1, int row2);
+
+  // return the id of the nearest item in pixels x1 to x2-1 and y1 to
+  // y2-1 (or NO_ID if none), and optionally its depth
+  unsigned nearest(int x1, int y1, int x2, int y2, float* depth=0) const;
+
+public:
+  int width, height;
+  std::vector<unsigned> ids;
+  std::vector<float> depths;
+
+private:
+  inline void plot(int idx, double z, unsigned id)
+  {
+    if(z < depths[idx])
+      {
+        ids[idx] = id;
+        depths[idx] = float(z);
+      }
+  }
+};
+
+#endif
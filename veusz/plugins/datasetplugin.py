@@ -19,6 +19,8 @@
 """Plugins for creating datasets."""
 
 import re
+import os
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as N
 
@@ -457,7 +459,7 @@ class DatasetPluginManager:
 
         if self.document.changeset == self.changeset:
             return
-        self.changeset = self.document.changeset
+        self.markUpdated()
 
         # run the plugin with its parameters
         try:
@@ -466,10 +468,119 @@ class DatasetPluginManager:
             # this is for immediate notification
             if raiseerrors:
                 raise
+            self.handleError(ex)
+
+    def markUpdated(self):
+        """Record that the outputs are for the current document."""
+        self.changeset = self.document.changeset
+        for ds in self.veuszdatasets:
+            ds.updateVersion()
+
+    def handleError(self, ex):
+        """Log an error from the plugin and null outputs."""
+        self.document.log( str(ex) )
+        self.nullDatasets()
+
+    def inputDatasetNames(self):
+        """Return names of datasets given in dataset fields, which
+        are not outputs of the plugin."""
+        names = []
+        for pluginfield in self.plugin.fields:
+            val = self.fields.get(pluginfield.name)
+            if isinstance(pluginfield, field.FieldDataset):
+                names.append(val)
+            elif isinstance(pluginfield, field.FieldDatasetMulti):
+                names += list(val)
+        return [
+            n for n in names
+            if isinstance(n, str) and n.strip() and
+            n not in self.datasetnames
+        ]
+
+# datasets which are not evaluated lazily, so can be read from threads
+_staticdatasettypes = (
+    datasets.Dataset, datasets.DatasetRange, datasets.Dataset2D,
+    datasets.DatasetND, datasets.DatasetText, datasets.DatasetDateTime,
+)
+
+def _runPluginThread(manager):
+    """Run plugin in a worker thread, returning any plugin error."""
+    try:
+        manager.plugin.updateDatasets(manager.fields, manager.helper)
+    except DatasetPluginException as ex:
+        return ex
+    return None
+
+def updateDatasetPlugins(doc, maxthreads=None):
+    """Update out-of-date dataset plugins in the document, running
+    plugins which do not depend on each other in parallel.
+
+    Only plugins marked as threadsafe, whose inputs are static
+    datasets or the outputs of other plugins, are updated here. Other
+    plugins are left to be updated when their datasets are used.
+    """
+
+    managers = set()
+    for ds in doc.data.values():
+        manager = getattr(ds, 'pluginmanager', None)
+        if manager is not None and manager.changeset != doc.changeset:
+            managers.add(manager)
+    if len(managers) < 2:
+        return
+
+    # find the other plugins each plugin depends on
+    deps = {}
+    for manager in managers:
+        if not manager.plugin.threadsafe:
+            continue
+        mdeps = set()
+        for name in manager.inputDatasetNames():
+            ds = doc.data.get(name)
+            inmanager = getattr(ds, 'pluginmanager', None)
+            if inmanager is not None:
+                if inmanager.changeset != doc.changeset:
+                    mdeps.add(inmanager)
+            elif ds is not None and not isinstance(ds, _staticdatasettypes):
+                # lazily evaluated dataset
+                break
+        else:
+            deps[manager] = mdeps
+
+    if maxthreads is None:
+        maxthreads = os.cpu_count() or 1
+
+    pending = set(deps)
+    with ThreadPoolExecutor(max_workers=max(maxthreads, 1)) as executor:
+        while pending:
+            # drop plugins depending on ones which cannot be done here
+            for manager in list(pending):
+                if any(d not in deps for d in deps[manager]):
+                    del deps[manager]
+                    pending.discard(manager)
+                    break
+            else:
+                # run plugins which have their inputs ready
+                wave = [m for m in pending if not (deps[m] & pending)]
+                if not wave:
+                    # circular dependency
+                    break
+                for manager in wave:
+                    manager.markUpdated()
+                futures = [
+                    (m, executor.submit(_runPluginThread, m)) for m in wave]
+
+                for manager, future in futures:
+                    pending.discard(manager)
+                    try:
+                        ex = future.result()
+                    except Exception:
+                        # rerun when used, so the error is raised normally
+                        manager.changeset = -1
+                        del deps[manager]
+                    else:
+                        if ex is not None:
+                            manager.handleError(ex)
 
-            # otherwise if there's an error, then log and null outputs
-            self.document.log( str(ex) )
-            self.nullDatasets()
 
 class DatasetPlugin:
     """Base class for defining dataset plugins."""
@@ -486,6 +597,11 @@ class DatasetPlugin:
     # if the plugin takes no parameters, set this to False
     has_parameters = True
 
+    # set this to True if updateDatasets only reads the datasets named
+    # in its FieldDataset and FieldDatasetMulti fields, so that it can
+    # be run in a background thread alongside other plugins
+    threadsafe = False
+
     def __init__(self):
         """Override this to declare a list of input fields if required."""
         self.fields = []
@@ -514,6 +630,8 @@ class DatasetPlugin:
 class _OneOutputDatasetPlugin(DatasetPlugin):
     """Simplify plugins which create one output with field ds_out."""
 
+    threadsafe = True
+
     def getDatasets(self, fields):
         """Returns single output dataset (self.dsout)."""
         if fields['ds_out'].strip() == '':
@@ -865,6 +983,7 @@ class PartsDatasetPlugin(DatasetPlugin):
 
     menu = (_('Split'), _('Parts'),)
     name = 'Parts'
+    threadsafe = True
     description_short = _('Split dataset into equal-size parts')
     description_full = _(
         'Split dataset into equal-size parts. '
@@ -1344,6 +1463,7 @@ class ExtremesDatasetPlugin(DatasetPlugin):
 
     menu = (_('Compute'), _('Dataset extremes'),)
     name = 'Extremes'
+    threadsafe = True
     description_short = _('Compute extreme values of input datasets')
     description_full = _(
         'Compute extreme values of input datasets. Creates '
@@ -1472,6 +1592,7 @@ class DemultiplexPlugin(DatasetPlugin):
 
     menu = (_('Split'), _('Element by element'),)
     name = 'Demultiplex'
+    threadsafe = True
     description_short = _('Split dataset into multiple datasets element-by-element')
     description_full = _(
         'Split dataset into multiple datasets on an '
@@ -1517,6 +1638,7 @@ class PolarToCartesianPlugin(DatasetPlugin):
 
     menu = (_('Convert'), _('Polar to Cartesian'),)
     name = 'PolarToCartesian'
+    threadsafe = True
     description_short = _('Convert r,theta coordinates to x,y coordinates')
     description_full = _(
         'Convert r,theta coordinates to x,y coordinates.\n'
@@ -1564,6 +1686,8 @@ class FilterDatasetPlugin(_OneOutputDatasetPlugin):
 
     menu = (_('Filter'), _('Expression'),)
     name = 'FilterExpression'
+    # filter expression may refer to any dataset
+    threadsafe = False
     description_short = _('Filter a dataset using an expression')
     description_full = _(
         'Filter a dataset using an expression, '
@@ -1653,6 +1777,148 @@ class MovingAveragePlugin(_OneOutputDatasetPlugin):
         data = qtloops.rollingAverage(ds_in.data, weights, width)
         self.dsout.update(data=data)
 
+class MovingMedianPlugin(_OneOutputDatasetPlugin):
+    """Compute moving median for dataset."""
+
+    menu = (_('Filtering'), _('Moving Median'),)
+    name = 'MovingMedian'
+    description_short = _('Compute moving median for regularly spaced data')
+    description_full = _(
+        'Compute moving median for regularly spaced data. '
+        'Median is computed either\nside of each data point '
+        'by number of points given.')
+
+    def __init__(self):
+        """Define fields."""
+        self.fields = [
+            field.FieldDataset('ds_in', _('Input dataset')),
+            field.FieldInt(
+                'width', _('Points either side of point to use'),
+                default=1, minval=0),
+            field.FieldDataset('ds_out', _('Output dataset')),
+        ]
+
+    def updateDatasets(self, fields, helper):
+        """Compute moving median of dataset."""
+        ds_in = helper.getDataset(fields['ds_in'])
+        data = qtloops.rollingMedian(ds_in.data, fields['width'])
+        self.dsout.update(data=data)
+
+class MovingStdDevPlugin(_OneOutputDatasetPlugin):
+    """Compute moving standard deviation for dataset."""
+
+    menu = (_('Filtering'), _('Moving Standard Deviation'),)
+    name = 'MovingStdDev'
+    description_short = _(
+        'Compute moving standard deviation for regularly spaced data')
+    description_full = _(
+        'Compute moving standard deviation for regularly spaced data. '
+        'Standard deviation is computed either\nside of each data point '
+        'by number of points given. Optionally the moving average is '
+        'output with the standard deviation as error bars.')
+
+    def __init__(self):
+        """Define fields."""
+        self.fields = [
+            field.FieldDataset('ds_in', _('Input dataset')),
+            field.FieldInt(
+                'width', _('Points either side of point to use'),
+                default=1, minval=0),
+            field.FieldBool(
+                'errorbars', _('Output average with error bars'),
+                default=False),
+            field.FieldDataset('ds_out', _('Output dataset')),
+        ]
+
+    def updateDatasets(self, fields, helper):
+        """Compute moving standard deviation of dataset."""
+        ds_in = helper.getDataset(fields['ds_in'])
+        width = fields['width']
+        stddev = qtloops.rollingStdDev(ds_in.data, width)
+        if fields['errorbars']:
+            mean = qtloops.rollingAverage(ds_in.data, None, width)
+            self.dsout.update(data=mean, serr=stddev)
+        else:
+            self.dsout.update(data=stddev)
+
+class MovingExtremesPlugin(DatasetPlugin):
+    """Compute moving minimum and maximum for dataset."""
+
+    menu = (_('Filtering'), _('Moving Extremes'),)
+    name = 'MovingExtremes'
+    threadsafe = True
+    description_short = _(
+        'Compute moving minimum and maximum for regularly spaced data')
+    description_full = _(
+        'Compute moving minimum and maximum for regularly spaced data. '
+        'Extremes are computed either\nside of each data point '
+        'by number of points given.')
+
+    def __init__(self):
+        """Define fields."""
+        self.fields = [
+            field.FieldDataset('ds_in', _('Input dataset')),
+            field.FieldInt(
+                'width', _('Points either side of point to use'),
+                default=1, minval=0),
+            field.FieldDataset('ds_min', _('Output minimum dataset (optional)')),
+            field.FieldDataset('ds_max', _('Output maximum dataset (optional)')),
+        ]
+
+    def getDatasets(self, fields):
+        """Returns output datasets."""
+        dsout = []
+        self.dsmin = self.dsmax = None
+        if fields['ds_min'] != '':
+            self.dsmin = Dataset1D(fields['ds_min'])
+            dsout.append(self.dsmin)
+        if fields['ds_max'] != '':
+            self.dsmax = Dataset1D(fields['ds_max'])
+            dsout.append(self.dsmax)
+        if not dsout:
+            raise DatasetPluginException(_('Provide at least one output dataset'))
+        return dsout
+
+    def updateDatasets(self, fields, helper):
+        """Compute moving extremes of dataset."""
+        ds_in = helper.getDataset(fields['ds_in'])
+        width = fields['width']
+        if self.dsmin is not None:
+            self.dsmin.update(
+                data=qtloops.rollingExtreme(ds_in.data, width, False))
+        if self.dsmax is not None:
+            self.dsmax.update(
+                data=qtloops.rollingExtreme(ds_in.data, width, True))
+
+class ExponentialMovingAveragePlugin(_OneOutputDatasetPlugin):
+    """Compute exponential moving average for dataset."""
+
+    menu = (_('Filtering'), _('Exponential Moving Average'),)
+    name = 'ExponentialMovingAverage'
+    description_short = _(
+        'Compute exponential moving average for regularly spaced data')
+    description_full = _(
+        'Compute exponential moving average for regularly spaced data. '
+        'Each output value is the previous output plus the smoothing '
+        'factor multiplied by the difference between the input value '
+        'and the previous output. Non-finite input values are skipped.')
+
+    def __init__(self):
+        """Define fields."""
+        self.fields = [
+            field.FieldDataset('ds_in', _('Input dataset')),
+            field.FieldFloat(
+                'alpha', _('Smoothing factor (0 to 1)'),
+                default=0.1, minval=0., maxval=1.),
+            field.FieldDataset('ds_out', _('Output dataset')),
+        ]
+
+    def updateDatasets(self, fields, helper):
+        """Compute exponential moving average of dataset."""
+        ds_in = helper.getDataset(fields['ds_in'])
+        data = qtloops.exponentialMovingAverage(ds_in.data, fields['alpha'])
+        self.dsout.update(data=data)
+
 class LinearInterpolatePlugin(_OneOutputDatasetPlugin):
     """Do linear interpolation of data."""
 
@@ -1699,6 +1965,7 @@ class ReBinXYPlugin(DatasetPlugin):
 
     menu = (_('Filtering'), _('Bin X,Y'))
     name = 'RebinXY'
+    threadsafe = True
     description_short = 'Bin every N datapoints'
     description_full = (
         'Given dataset Y (and optionally X), for every N '
@@ -1802,6 +2069,249 @@ class ReBinXYPlugin(DatasetPlugin):
             self.dssout[1].update(data=0.5*(minbin+maxbin),
                                   serr=0.5*(maxbin-minbin))
 
+class EnvelopePlugin(DatasetPlugin):
+    """Compute minimum and maximum of every N datapoints."""
+
+    menu = (_('Filtering'), _('Envelope'))
+    name = 'Envelope'
+    threadsafe = True
+    description_short = _('Minimum and maximum of every N datapoints')
+    description_full = _(
+        'Given dataset Y (and optionally X), for every N datapoints '
+        'calculate the minimum and maximum of Y, giving an envelope '
+        'which can be plotted instead of a large dataset. For X, the '
+        'mean of the datapoints is calculated.')
+
+    def __init__(self):
+        """Define fields."""
+        self.fields = [
+            field.FieldDataset('ds_y', _('Input dataset Y')),
+            field.FieldDataset('ds_x', _('Input dataset X (optional)')),
+            field.FieldInt(
+                'binsize', _('Bin size (N)'), minval=1, default=100),
+            field.FieldDataset('ds_min', _('Output minimum dataset (optional)')),
+            field.FieldDataset('ds_max', _('Output maximum dataset (optional)')),
+            field.FieldDataset('ds_errorbar', _(
+                'Output range as error bars in dataset (optional)')),
+            field.FieldDataset('ds_xout', _("Output X' (optional)")),
+        ]
+
+    def getDatasets(self, fields):
+        """Return output datasets"""
+        dsout = []
+        self.dsmin = self.dsmax = self.dserror = self.dsxout = None
+        if fields['ds_min'] != '':
+            self.dsmin = Dataset1D(fields['ds_min'])
+            dsout.append(self.dsmin)
+        if fields['ds_max'] != '':
+            self.dsmax = Dataset1D(fields['ds_max'])
+            dsout.append(self.dsmax)
+        if fields['ds_errorbar'] != '':
+            self.dserror = Dataset1D(fields['ds_errorbar'])
+            dsout.append(self.dserror)
+        if not dsout:
+            raise DatasetPluginException(_('Provide at least one output dataset'))
+        if fields['ds_xout'] != '':
+            if fields['ds_x'] == '':
+                raise DatasetPluginException(_('Invalid input X dataset name'))
+            self.dsxout = Dataset1D(fields['ds_xout'])
+            dsout.append(self.dsxout)
+        return dsout
+
+    def updateDatasets(self, fields, helper):
+        """Compute envelope."""
+
+        binsize = fields['binsize']
+        dsy = helper.getDataset(fields['ds_y'])
+        minvals = qtloops.binDataExtremes(dsy.data, binsize, False)
+        maxvals = qtloops.binDataExtremes(dsy.data, binsize, True)
+
+        if self.dsmin is not None:
+            self.dsmin.update(data=minvals)
+        if self.dsmax is not None:
+            self.dsmax.update(data=maxvals)
+        if self.dserror is not None:
+            mid = 0.5*(minvals+maxvals)
+            self.dserror.update(data=mid, nerr=minvals-mid, perr=maxvals-mid)
+        if self.dsxout is not None:
+            dsx = helper.getDataset(fields['ds_x'])
+            self.dsxout.update(data=qtloops.binData(dsx.data, binsize, True))
+
+class Downsample2DPlugin(DatasetPlugin):
+    """Reduce size of 2D dataset by combining blocks of pixels."""
+
+    menu = (_('Filtering'), _('Downsample 2D'))
+    name = 'Downsample2D'
+    threadsafe = True
+    description_short = _('Combine blocks of pixels in a 2D dataset')
+    description_full = _(
+        'Reduce the size of a 2D dataset by combining blocks of pixels, '
+        'using their mean, sum, minimum, maximum or median. '
+        'Non-finite values are ignored.')
+
+    # modes in qtloops.binData2D
+    modes = {'mean': 1, 'sum': 0, 'minimum': 2, 'maximum': 3, 'median': 4}
+
+    def __init__(self):
+        """Define fields."""
+        self.fields = [
+            field.FieldDataset('ds_in', _('Input 2D dataset'), dims=2),
+            field.FieldInt(
+                'xfactor', _('Number of pixels to combine in x'),
+                minval=1, default=2),
+            field.FieldInt(
+                'yfactor', _('Number of pixels to combine in y'),
+                minval=1, default=2),
+            field.FieldCombo(
+                'mode', _('Mode of combining'),
+                items=('mean', 'sum', 'minimum', 'maximum', 'median'),
+                default='mean', editable=False),
+            field.FieldDataset('ds_out', _('Output 2D dataset'), dims=2),
+        ]
+
+    def getDatasets(self, fields):
+        """Returns single output dataset (self.dsout)."""
+        if fields['ds_out'] == '':
+            raise DatasetPluginException(_('Invalid output dataset name'))
+        self.dsout = Dataset2D(fields['ds_out'])
+        return [self.dsout]
+
+    @staticmethod
+    def _outEdges(edges, factor):
+        """Get edges of combined pixels."""
+        out = edges[::factor]
+        if (len(edges)-1) % factor != 0:
+            out = N.append(out, edges[-1])
+        return out
+
+    def updateDatasets(self, fields, helper):
+        """Do downsampling."""
+
+        ds = helper.getDataset(fields['ds_in'], dimensions=2)
+        xfact, yfact = fields['xfactor'], fields['yfactor']
+        mode = self.modes.get(fields['mode'])
+        if mode is None:
+            raise DatasetPluginException(_('Invalid mode'))
+
+        ny, nx = ds.data.shape
+        out = qtloops.binData2D(ds.data, xfact, yfact, mode)
+        out = out.reshape((ny+yfact-1)//yfact, (nx+xfact-1)//xfact)
+
+        # compute coordinates of output pixels
+        inds = datasets.Dataset2D(
+            ds.data, xrange=ds.rangex, yrange=ds.rangey,
+            xedge=ds.xedge, yedge=ds.yedge, xcent=ds.xcent, ycent=ds.ycent)
+        xedge, yedge = inds.getPixelEdges()
+        xedge = self._outEdges(xedge, xfact)
+        yedge = self._outEdges(yedge, yfact)
+
+        if inds.isLinearImage() and nx % xfact == 0 and ny % yfact == 0:
+            self.dsout.update(
+                out, rangex=(xedge[0], xedge[-1]), rangey=(yedge[0], yedge[-1]))
+        else:
+            self.dsout.update(out, xedge=xedge, yedge=yedge)
+
+class ResampleDatePlugin(DatasetPlugin):
+    """Combine values in regular time intervals."""
+
+    menu = (_('Filtering'), _('Resample in time'))
+    name = 'ResampleDate'
+    threadsafe = True
+    description_short = _('Combine values in regular time intervals')
+    description_full = _(
+        'Given a date-time dataset and a dataset of values, combine the '
+        'values in regular time intervals, using their mean, sum, '
+        'minimum, maximum, count, first or last value. Intervals are '
+        'aligned to multiples of the interval since the date-time epoch. '
+        'Output dates are the start of each interval containing values.')
+
+    # length of units in seconds
+    units = {
+        'seconds': 1., 'minutes': 60., 'hours': 3600.,
+        'days': 86400., 'weeks': 7*86400.,
+    }
+
+    def __init__(self):
+        """Define fields."""
+        self.fields = [
+            field.FieldDataset('ds_date', _('Input date-time dataset')),
+            field.FieldDataset('ds_in', _('Input values dataset')),
+            field.FieldFloat(
+                'interval', _('Interval'), default=1., minval=0.),
+            field.FieldCombo(
+                'units', _('Interval units'),
+                items=('seconds', 'minutes', 'hours', 'days', 'weeks'),
+                default='hours', editable=False),
+            field.FieldCombo(
+                'mode', _('Mode of combining'),
+                items=(
+                    'mean', 'sum', 'minimum', 'maximum',
+                    'count', 'first', 'last'),
+                default='mean', editable=False),
+            field.FieldDataset('ds_dateout', _('Output date-time dataset')),
+            field.FieldDataset('ds_out', _('Output values dataset')),
+        ]
+
+    def getDatasets(self, fields):
+        """Return output datasets"""
+        if fields['ds_dateout'] == '' or fields['ds_out'] == '':
+            raise DatasetPluginException(_('Invalid output dataset name'))
+        self.dsdateout = DatasetDateTime(fields['ds_dateout'])
+        self.dsout = Dataset1D(fields['ds_out'])
+        return [self.dsdateout, self.dsout]
+
+    def updateDatasets(self, fields, helper):
+        """Do resampling."""
+
+        interval = fields['interval'] * self.units.get(fields['units'], 1.)
+        if interval <= 0:
+            raise DatasetPluginException(_('Interval must be positive'))
+
+        dates = helper.getDataset(fields['ds_date']).data
+        vals = helper.getDataset(fields['ds_in']).data
+        minlen = min(len(dates), len(vals))
+        dates, vals = dates[:minlen], vals[:minlen]
+
+        ok = N.isfinite(dates) & N.isfinite(vals)
+        bins = N.floor(dates[ok] * (1./interval))
+        vals = vals[ok]
+
+        if len(bins) == 0:
+            self.dsdateout.update(data=[])
+            self.dsout.update(data=[])
+            return
+
+        # data are normally already in date order
+        if N.any(bins[1:] < bins[:-1]):
+            order = N.argsort(bins, kind='stable')
+            bins, vals = bins[order], vals[order]
+
+        # first index and number of items in each interval
+        starts = N.flatnonzero(
+            N.concatenate(([True], bins[1:] != bins[:-1])))
+        counts = N.diff(N.append(starts, len(bins)))
+
+        m = fields['mode']
+        if m == 'mean':
+            out = N.add.reduceat(vals, starts) / counts
+        elif m == 'sum':
+            out = N.add.reduceat(vals, starts)
+        elif m == 'minimum':
+            out = N.minimum.reduceat(vals, starts)
+        elif m == 'maximum':
+            out = N.maximum.reduceat(vals, starts)
+        elif m == 'count':
+            out = counts.astype(N.float64)
+        elif m == 'first':
+            out = vals[starts]
+        elif m == 'last':
+            out = vals[starts+counts-1]
+        else:
+            raise DatasetPluginException(_('Invalid mode'))
+
+        self.dsdateout.update(data=bins[starts]*interval)
+        self.dsout.update(data=out)
+
 class SortPlugin(_OneOutputDatasetPlugin):
     """Sort a dataset."""
 
@@ -1890,6 +2400,7 @@ class Histogram2D(DatasetPlugin):
 
     menu = (_('Compute'), _('2D histogram'),)
     name = 'Histogram 2D'
+    threadsafe = True
     description_short = _('Compute 2D histogram.')
     description_full = _(
         'Given two 1D datasets, compute a 2D histogram. '
@@ -1995,6 +2506,7 @@ class ConvertNumbersToText(DatasetPlugin):
 
     menu = (_('Convert'), _('Numbers to Text'),)
     name = 'NumbersToText'
+    threadsafe = True
     description_short = _('Convert numeric dataset to text')
     description_full = _(
         'Given a 1D numeric dataset, create a text dataset '
@@ -2182,6 +2694,7 @@ class ReshapeDatasetPlugin(DatasetPlugin):
 
     menu = (_('Convert'), _('Reshape'))
     name = 'Reshape'
+    threadsafe = True
     description_short = _('Reshape to an aribtrary n-dimensional dataset')
     description_full = _(
         'Take a dataset with aribtrary shape and reshape into an '
@@ -2260,8 +2773,15 @@ datasetpluginregistry += [
     FilterDatasetPlugin,
 
     MovingAveragePlugin,
+    MovingMedianPlugin,
+    MovingStdDevPlugin,
+    MovingExtremesPlugin,
+    ExponentialMovingAveragePlugin,
     LinearInterpolatePlugin,
     ReBinXYPlugin,
+    EnvelopePlugin,
+    Downsample2DPlugin,
+    ResampleDatePlugin,
 
     SortPlugin,
     SortTextPlugin,
@@ -19,18 +19,21 @@
 ###############################################################################
 
 from .version import *
-from .textrender import Renderer, FontMetrics, latexEscape
+from .textrender import Renderer, FontMetrics, latexEscape, renderLabels
 from .safe_eval import compileChecked, SafeEvalException
 from .fitlm import fitLM
 
 from .utilfuncs import *
 from .points import getPointPainterPath, MarkerCodes, plotMarkers, \
-    plotMarker, ArrowCodes, plotLineArrow
+    plotMarker, ArrowCodes, plotLineArrow, plotLineArrows
 from .action import *
 from .dates import *
 from .formatting import *
 from .colormap import *
 from .extbrushfilling import *
+from .histogram import HistogramData, getHistogramData
+from .pyramid import ImagePyramid, getImagePyramid
+from .triangulation import Triangulation, TriContourer, getTriangulation
 from .feedback import feedback, FeedbackCheckThread, disableFeedback
 
 from ..helpers.qtloops import addNumpyToPolygonF, plotPathsToPainter, \
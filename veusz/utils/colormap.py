@@ -16,7 +16,9 @@
 #    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 ###############################################################################
 
+from collections import OrderedDict
 import re
+import threading
 
 import numpy as N
 
@@ -939,8 +941,13 @@ def applyScaling(data, mode, minval, maxval):
 
     return data
 
+# colormapped images kept, up to this total number of bytes
+_imagecachebytes = 256*1024*1024
+_imagecache = OrderedDict()
+_imagecachelock = threading.Lock()
+
 def applyColorMap(cmap, scaling, datain, minval, maxval,
-                  trans, transimg=None):
+                  trans, transimg=None, cachekey=None):
     """Apply a colour map to the 2d data given.
 
     cmap is the color map (numpy of BGRalpha quads)
@@ -949,11 +956,44 @@ def applyColorMap(cmap, scaling, datain, minval, maxval,
     minval and maxval are the extremes of the data for the colormap
     trans is a number from 0 to 100
     transimg is an optional image to apply transparency from
+    cachekey is an optional hashable value which uniquely identifies
+     datain and transimg (e.g. including dataset versions). If given,
+     the image is kept and reused for the same key and color mapping.
     Returns a QImage
     """
 
     cmap = N.array(cmap, dtype=N.intc)
 
+    if cachekey is not None:
+        key = (
+            cachekey, cmap.tobytes(), cmap.shape, scaling,
+            minval, maxval, trans, transimg is not None)
+        with _imagecachelock:
+            img = _imagecache.get(key)
+            if img is not None:
+                _imagecache.move_to_end(key)
+                # copy is cheap, as data are shared until modified
+                return qt.QImage(img)
+
+        img = _makeColorMapImage(
+            cmap, scaling, datain, minval, maxval, trans, transimg)
+
+        with _imagecachelock:
+            _imagecache[key] = img
+            total = sum(i.bytesPerLine()*i.height()
+                        for i in _imagecache.values())
+            while len(_imagecache) > 1 and total > _imagecachebytes:
+                _, old = _imagecache.popitem(last=False)
+                total -= old.bytesPerLine()*old.height()
+        return qt.QImage(img)
+
+    return _makeColorMapImage(
+        cmap, scaling, datain, minval, maxval, trans, transimg)
+
+def _makeColorMapImage(cmap, scaling, datain, minval, maxval,
+                       trans, transimg):
+    """Make QImage for applyColorMap."""
+
     # invert colour map if min and max are swapped
     if minval > maxval:
         minval, maxval = maxval, minval
@@ -1008,7 +1048,8 @@ def makeColorbarImage(minval, maxval, scaling, cmap, transparency,
         vals = vals.reshape(barsize, 1)
 
     img = applyColorMap(
-        cmap, colorscaling, vals, minval, maxval, transparency)
+        cmap, colorscaling, vals, minval, maxval, transparency,
+        cachekey=('colorbar', scaling, direction, barsize))
 
     return img
 
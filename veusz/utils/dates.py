@@ -100,6 +100,152 @@ def dateStringToDate(datestr):
     else:
         return N.nan
 
+# number of strings to convert at once in _isoStringsToMicrosec
+_chunksize = 65536
+
+def _isoStringsToMicrosec(strs, seps, minfrac, strip):
+    """Convert strings of the form YYYY-MM-DD, hh:mm:ss[.s] or a date
+    and time separated by one of the characters in seps, to
+    microseconds from offsetdate.
+
+    minfrac is the minimum number of digits after a decimal point in
+    the seconds. If strip is set, whitespace is removed from the ends
+    of the strings.
+
+    Returns an array of microseconds and a boolean array, which is
+    False for strings which were not converted (not in one of these
+    layouts, or invalid dates or times).
+    """
+
+    num = len(strs)
+    usec = N.zeros(num, dtype=N.int64)
+    done = N.zeros(num, dtype=bool)
+
+    for start in range(0, num, _chunksize):
+        chunk = strs[start:start+_chunksize]
+        if strip:
+            chunk = list(map(str.strip, chunk))
+        lens = N.fromiter(map(len, chunk), dtype=N.intp, count=len(chunk))
+        arr = N.array(chunk, dtype=str)
+        # unicode code points, padded with zeros
+        codes = arr.view(N.uint32).reshape(len(chunk), -1)
+
+        for length in N.unique(lens):
+            # possible positions of date and time for this length
+            layouts = []
+            if length == 10:
+                layouts.append((True, None))
+            if length == 8 or length >= 9+minfrac:
+                layouts.append((False, 0))
+            if length == 19 or length >= 20+minfrac:
+                layouts.append((True, 11))
+            if not layouts or length > 40:
+                continue
+
+            rows = N.nonzero(lens == length)[0]
+            c = codes[rows, :length].astype(N.int32)
+            dig = c - ord('0')
+            isdig = (dig >= 0) & (dig <= 9)
+            left = N.ones(len(rows), dtype=bool)
+
+            for hasdate, tpos in layouts:
+                ok = left.copy()
+                year, month, day = 2009, 1, 1
+                hour = minute = 0
+                secs = N.zeros(len(rows))
+
+                if hasdate:
+                    ok &= N.all(isdig[:, [0, 1, 2, 3, 5, 6, 8, 9]], axis=1)
+                    ok &= (c[:, 4] == ord('-')) & (c[:, 7] == ord('-'))
+                    year = (
+                        dig[:, 0]*1000 + dig[:, 1]*100 + dig[:, 2]*10 +
+                        dig[:, 3] )
+                    month = dig[:, 5]*10 + dig[:, 6]
+                    day = dig[:, 8]*10 + dig[:, 9]
+                    ok &= (year >= 1) & (month >= 1) & (month <= 12) & (
+                        day >= 1)
+
+                if tpos is not None:
+                    if hasdate:
+                        ok &= N.isin(c[:, 10], [ord(x) for x in seps])
+                    t = tpos
+                    ok &= N.all(isdig[:, [t, t+1, t+3, t+4, t+6, t+7]], axis=1)
+                    ok &= (c[:, t+2] == ord(':')) & (c[:, t+5] == ord(':'))
+                    hour = dig[:, t]*10 + dig[:, t+1]
+                    minute = dig[:, t+3]*10 + dig[:, t+4]
+
+                    # seconds (with any fraction) as integer mantissa
+                    mant = (dig[:, t+6]*10 + dig[:, t+7]).astype(N.int64)
+                    numfrac = length - t - 9
+                    if numfrac >= 0:
+                        # the float is only exact if the mantissa is
+                        # small enough
+                        if numfrac > 13:
+                            continue
+                        ok &= c[:, t+8] == ord('.')
+                        ok &= N.all(isdig[:, t+9:], axis=1)
+                        for i in range(t+9, length):
+                            mant = mant*10 + dig[:, i]
+                    else:
+                        numfrac = 0
+                    # this gives the same value as converting the
+                    # text with float()
+                    secs = mant / 10.**numfrac
+                    ok &= (hour <= 23) & (minute <= 59) & (secs < 60)
+
+                if not N.any(ok):
+                    continue
+
+                # days from offset, checking the day is in the month
+                if hasdate:
+                    months = ((year-1970)*12 + month-1).astype('M8[M]')
+                    dates = months.astype('M8[D]') + (day-1).astype('m8[D]')
+                    ok &= dates.astype('M8[M]') == months
+                    days = (dates - offsetdate_np.astype('M8[D]')).astype(
+                        N.int64)
+                else:
+                    days = 0
+
+                # split seconds as math.modf, as the scalar conversions do
+                intsecs = N.trunc(secs)
+                fracusec = N.trunc((secs-intsecs)*1e6).astype(N.int64)
+                total = (
+                    ((days*24 + hour)*60 + minute)*60 +
+                    intsecs.astype(N.int64) )*1000000 + fracusec
+
+                sel = rows[ok]
+                usec[start+sel] = total[ok]
+                done[start+sel] = True
+                left &= ~ok
+
+    return usec, done
+
+def _microsecToFloat(usec, isodate):
+    """Convert microseconds from offsetdate to float dates. This adds
+    the parts in the same order as dateStringToDate (if isodate) or
+    datetimeToFloat, to get identical values."""
+    days, rem = N.divmod(usec, 86400000000)
+    secs, us = N.divmod(rem, 1000000)
+    if isodate:
+        return (days*24*60*60 + secs).astype(N.float64) + us*1e-6
+    else:
+        return days*24*60*60 + (secs + us*1e-6)
+
+def dateStringsToFloats(strs):
+    """Interpret a list of date strings, returning an array of
+    Veusz-format date values (as dateStringToDate)."""
+
+    strs = list(strs)
+    usec, done = _isoStringsToMicrosec(
+        strs, ' ,ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz',
+        1, False)
+    out = _microsecToFloat(usec, True)
+
+    # convert anything else individually
+    for i in N.nonzero(~done)[0]:
+        out[i] = dateStringToDate(strs[i])
+    return out
+
 def floatUnixToVeusz(f):
     """Convert unix float to veusz float."""
     delta = datetime.datetime(1970,1,1) - offsetdate
@@ -114,6 +260,92 @@ def floatToDateTime(f):
     except OverflowError:
         return datetime.datetime(8000, 1, 1)
 
+# range of floats which can be converted to dates (years 1 to 9999),
+# less a day to avoid rounding problems at the ends
+_mindatefloat = (
+    datetime.datetime(1, 1, 2) - offsetdate).total_seconds()
+_maxdatefloat = (
+    datetime.datetime(9999, 12, 30) - offsetdate).total_seconds()
+
+def floatsToDateTime64(vals):
+    """Convert array of floats to numpy datetime64 values (with
+    microsecond resolution), as floatToDateTime does for each value.
+
+    Values which cannot be converted (non-finite or out of range) are
+    returned as NaT.
+    """
+
+    vals = N.asarray(vals, dtype=N.float64)
+    out = N.full(vals.shape, N.datetime64('NaT'), dtype='M8[us]')
+    ok = N.isfinite(vals) & (vals > _mindatefloat) & (vals < _maxdatefloat)
+    v = vals[ok]
+
+    # split up in same way as floatToDateTime, to get same rounding
+    days = N.trunc(v/24/60/60)
+    rem = v - days*24*60*60
+    sec = N.trunc(rem)
+    usec = N.round((rem - sec)*1e6)
+    delta = (
+        days.astype(N.int64)*86400000000 + sec.astype(N.int64)*1000000 +
+        usec.astype(N.int64) )
+    out[ok] = offsetdate_np.astype('M8[us]') + delta.astype('m8[us]')
+    return out
+
+def timeTupleRange(start, end, tt):
+    """Return float dates from datetime start to end (inclusive), in
+    steps given by time tuple tt (yr,mn,dy,h,m,s,us).
+
+    This gives the same values as repeatedly calling
+    addTimeTupleToDateTime.
+    """
+
+    def deltaToMicrosec(delta):
+        return (
+            (delta.days*24*60*60 + delta.seconds)*1000000 +
+            delta.microseconds )
+
+    startus = deltaToMicrosec(start - offsetdate)
+    endus = deltaToMicrosec(end - offsetdate)
+
+    if tt[0] == 0 and tt[1] == 0:
+        # fixed length steps
+        step = (
+            (((tt[2]*24 + tt[3])*60 + tt[4])*60 + tt[5])*1000000 + tt[6] )
+        if step <= 0 or endus < startus:
+            return N.array([])
+        us = startus + N.arange((endus-startus)//step + 1, dtype=N.int64)*step
+
+    elif all(x == 0 for x in tt[2:]) and start.day <= 28 and tt[0] >= 0 and (
+            tt[1] >= 0 and tt[0]+tt[1] > 0):
+        # steps of whole months, keeping the same offset into the month
+        step = tt[0]*12 + tt[1]
+        startmonth = (start.year-1970)*12 + start.month-1
+        endmonth = (end.year-1970)*12 + end.month-1
+        if endmonth < startmonth:
+            return N.array([])
+        months = N.arange(startmonth, endmonth+1, step).astype('M8[M]')
+        inmonth = startus - deltaToMicrosec(
+            start.replace(day=1, hour=0, minute=0, second=0, microsecond=0) -
+            offsetdate)
+        us = (
+            (months.astype('M8[us]') - offsetdate_np.astype('M8[us]')).astype(
+                N.int64) + inmonth )
+        us = us[us <= endus]
+
+    else:
+        # fall back to stepping with datetime arithmetic
+        vals = []
+        dt = start
+        while dt <= end:
+            vals.append(datetimeToFloat(dt))
+            dt = addTimeTupleToDateTime(dt, tt)
+        return N.array(vals)
+
+    # convert to floats in same way as datetimeToFloat
+    days, rem = N.divmod(us, 86400000000)
+    secs, usecs = N.divmod(rem, 1000000)
+    return days*24*60*60 + (secs + usecs*1e-6)
+
 def dateFloatToString(f):
     """Convert date float to string."""
     if N.isfinite(f):
@@ -298,3 +530,28 @@ def dateREMatchToDate(match):
 
     # return to veusz float time
     return datetimeToFloat(d)
+
+# date format which can be converted quickly by dateFormatStringsToFloats
+_isoformat = 'YYYY-MM-DD|T|hh:mm:ss'
+
+def dateFormatStringsToFloats(strs, fmt):
+    """Interpret a list of date strings in the format fmt (see
+    dateStrToRegularExpression), returning an array of float date
+    values. Strings which cannot be interpreted give nan."""
+
+    strs = list(strs)
+    if fmt == _isoformat:
+        usec, done = _isoStringsToMicrosec(strs, 'T', 0, True)
+        out = _microsecToFloat(usec, False)
+    else:
+        out = N.empty(len(strs))
+        done = N.zeros(len(strs), dtype=bool)
+
+    # convert anything else individually
+    datere = re.compile(dateStrToRegularExpression(fmt))
+    for i in N.nonzero(~done)[0]:
+        try:
+            out[i] = dateREMatchToDate(datere.match(strs[i]))
+        except ValueError:
+            out[i] = N.nan
+    return out
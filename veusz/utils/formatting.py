@@ -180,6 +180,47 @@ def formatEngineering(num, fmtarg, locale=None):
 # catch general veusz formatting expression
 _formatRE = re.compile(r'%([-0-9.+# ]*)(VDVS|VD.|V.|[A-Za-z%])')
 
+def _formatItem(num, farg, ftype, locale):
+    """Format number for a single item in a format string, where farg
+    and ftype are the groups matched by _formatRE."""
+
+    # special veusz formatting
+    if ftype[:1] == 'V':
+        # special veusz formatting
+        if ftype == 'Ve':
+            out = formatSciNotation(num, farg, locale=locale)
+        elif ftype == 'Vg':
+            out = formatGeneral(num, farg, locale=locale)
+        elif ftype == 'VE':
+            out = formatEngineering(num, farg, locale=locale)
+        elif ftype[:2] == 'VD':
+            d = dates.floatToDateTime(num)
+            # date formatting (seconds since start of epoch)
+            if ftype[:4] == 'VDVS':
+                # special seconds operator
+                out = ('%'+ftype[4:]+'g') % (d.second+d.microsecond*1e-6)
+            else:
+                # use date formatting
+                try:
+                    out = d.strftime(str('%'+ftype[2:]))
+                except ValueError:
+                    out = _formaterror
+        else:
+            out = _formaterror
+
+        # replace hyphen with true minus sign
+        out = out.replace('-', '\u2212')
+    elif ftype == '%':
+        out = '%'
+    else:
+        # standard C formatting
+        try:
+            out = localeFormat('%' + farg + ftype, (num,), locale=locale)
+        except:
+            out = _formaterror
+
+    return out
+
 def formatNumber(num, formatstr, locale=None):
     """ Format a number in different ways.
 
@@ -203,44 +244,94 @@ def formatNumber(num, formatstr, locale=None):
 
         # argument and type of formatting
         farg, ftype = match.groups()
-
-        # special veusz formatting
-        if ftype[:1] == 'V':
-            # special veusz formatting
-            if ftype == 'Ve':
-                out = formatSciNotation(num, farg, locale=locale)
-            elif ftype == 'Vg':
-                out = formatGeneral(num, farg, locale=locale)
-            elif ftype == 'VE':
-                out = formatEngineering(num, farg, locale=locale)
-            elif ftype[:2] == 'VD':
-                d = dates.floatToDateTime(num)
-                # date formatting (seconds since start of epoch)
-                if ftype[:4] == 'VDVS':
-                    # special seconds operator
-                    out = ('%'+ftype[4:]+'g') % (d.second+d.microsecond*1e-6)
-                else:
-                    # use date formatting
-                    try:
-                        out = d.strftime(str('%'+ftype[2:]))
-                    except ValueError:
-                        out = _formaterror
-            else:
-                out = _formaterror
-
-            # replace hyphen with true minus sign
-            out = out.replace('-', '\u2212')
-        elif ftype == '%':
-            out = '%'
-        else:
-            # standard C formatting
-            try:
-                out = localeFormat('%' + farg + ftype, (num,), locale=locale)
-            except:
-                out = _formaterror
+        out = _formatItem(num, farg, ftype, locale)
 
         outitems.append(formatstr[:match.start()])
         outitems.append(out)
         formatstr = formatstr[match.end():]
 
     return ''.join(outitems)
+
+# date fields which can be formatted without strftime, with the
+# minimum year for which the output is the same
+_datefields = {
+    'Y': ('%04i', 1000),
+    'm': ('%02i', 1),
+    'd': ('%02i', 1),
+    'H': ('%02i', 1),
+    'M': ('%02i', 1),
+    'S': ('%02i', 1),
+}
+
+def _formatDates(nums, ftype):
+    """Format array of numbers for a date item ftype (VDx) in a format
+    string, returning a list of strings."""
+
+    dts = dates.floatsToDateTime64(nums)
+    years = dts.astype('M8[Y]').astype(N.int64) + 1970
+    usecinday = (dts - dts.astype('M8[D]')).astype(N.int64)
+
+    code = ftype[2:]
+    if ftype[:4] == 'VDVS':
+        # same float as second + microsecond*1e-6 in formatNumber
+        secs = (usecinday // 1000000 % 60) + (usecinday % 1000000) * 1e-6
+        fmt = '%'+ftype[4:]+'g'
+        out = [fmt % v for v in secs.tolist()]
+        fast = ~N.isnat(dts)
+    elif code in _datefields:
+        if code == 'Y':
+            vals = years
+        elif code == 'm':
+            vals = dts.astype('M8[M]').astype(N.int64) % 12 + 1
+        elif code == 'd':
+            vals = (dts.astype('M8[D]') - dts.astype('M8[M]')).astype(
+                N.int64) + 1
+        else:
+            vals = usecinday // {
+                'H': 3600000000, 'M': 60000000, 'S': 1000000}[code]
+            if code != 'H':
+                vals %= 60
+        fmt, minyear = _datefields[code]
+        out = [fmt % v for v in vals.tolist()]
+        fast = ~N.isnat(dts) & (years >= minyear)
+    else:
+        out = [None]*len(dts)
+        fast = N.zeros(len(dts), dtype=bool)
+
+    # use standard formatting for anything else
+    for i in N.nonzero(~fast)[0]:
+        out[i] = _formatItem(nums[i], '', ftype, None)
+    if code == 'VS':
+        # only seconds can be negative
+        out = [o.replace('-', '\u2212') for o in out]
+    return out
+
+def formatNumbers(nums, formatstr, locale=None):
+    """Format a list of numbers using formatNumber, returning a list
+    of strings.
+
+    This is quicker than formatting each number separately, as the
+    format string is only parsed once and dates are converted for all
+    the numbers together.
+    """
+
+    nums = list(nums)
+    columns = []
+    while formatstr:
+        match = _formatRE.search(formatstr)
+        if not match:
+            columns.append( [formatstr]*len(nums) )
+            break
+
+        farg, ftype = match.groups()
+        columns.append( [formatstr[:match.start()]]*len(nums) )
+        if ftype[:2] == 'VD' and len(nums) > 0:
+            columns.append( _formatDates(N.array(nums, dtype=N.float64), ftype) )
+        else:
+            columns.append(
+                [_formatItem(num, farg, ftype, locale) for num in nums] )
+        formatstr = formatstr[match.end():]
+
+    if not columns:
+        return ['']*len(nums)
+    return [''.join(items) for items in zip(*columns)]
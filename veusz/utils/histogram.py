@@ -0,0 +1,136 @@
+#    Copyright (C) 2021 Jeremy S. Sanders
+#    Email: Jeremy Sanders <jeremy@jeremysanders.net>
+#
+#    This program is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation; either version 2 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License along
+#    with this program; if not, write to the Free Software Foundation, Inc.,
+#    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+###############################################################################
+
+"""Fast repeated histogramming of data.
+
+A sorted copy of the finite input values is kept, so that binning
+with new edges only needs a binary search for each edge, rather than
+a pass over all the data.
+"""
+
+from collections import OrderedDict
+import threading
+
+import numpy as N
+
+class HistogramData:
+    """Sorted copy of data (and optionally weights) for histogramming."""
+
+    def __init__(self, data, weights=None):
+        data = N.asarray(data, dtype=N.float64)
+
+        # total number of values, including non-finite ones
+        self.numtotal = len(data)
+
+        # minimum and maximum ignoring nan, as N.nanmin/N.nanmax
+        self.minval = -N.inf if N.any(data == -N.inf) else N.nan
+        self.maxval = N.inf if N.any(data == N.inf) else N.nan
+
+        finite = N.isfinite(data)
+        if weights is None:
+            self.sorted = N.sort(data[finite])
+            self.cumweights = None
+        else:
+            weights = N.asarray(weights, dtype=N.float64)
+            fdata = data[finite]
+            order = N.argsort(fdata, kind='stable')
+            self.sorted = fdata[order]
+            # cumulative weights, so that sum in range is a difference
+            self.cumweights = N.concatenate((
+                [0.], N.cumsum(weights[finite][order])))
+
+        self.numfinite = len(self.sorted)
+        if self.numfinite > 0:
+            if N.isnan(self.minval):
+                self.minval = self.sorted[0]
+            if N.isnan(self.maxval):
+                self.maxval = self.sorted[-1]
+
+    @property
+    def nbytes(self):
+        """Memory used by the sorted copy."""
+        n = self.sorted.nbytes
+        if self.cumweights is not None:
+            n += self.cumweights.nbytes
+        return n
+
+    def binEdges(self, bins, range=None):
+        """Compute bin edges using the same rules as numpy.histogram.
+
+        bins is the number of bins, an array of edges or the name of
+        a numpy binning method.
+        """
+        return N.histogram_bin_edges(self.sorted, bins=bins, range=range)
+
+    def counts(self, edges):
+        """Return number of values (or sum of weights) in each bin.
+
+        Bins include their lower edge but not their upper edge, except
+        for the last bin, matching numpy.histogram.
+        """
+        edges = N.asarray(edges, dtype=N.float64)
+        if N.any(edges[:-1] > edges[1:]):
+            raise ValueError('bins must increase monotonically')
+
+        idxs = N.searchsorted(self.sorted, edges, side='left')
+        if len(edges) > 0:
+            idxs[-1] = N.searchsorted(self.sorted, edges[-1], side='right')
+
+        if self.cumweights is None:
+            return N.diff(idxs)
+        else:
+            return N.diff(self.cumweights[idxs])
+
+    def binValues(self, edges):
+        """Return list of sorted values in each bin, where a bin
+        includes its upper edge but not its lower edge."""
+        idxs = N.searchsorted(self.sorted, edges, side='right')
+        return [
+            self.sorted[lo:hi]
+            for lo, hi in zip(idxs[:-1], idxs[1:])
+        ]
+
+# sorted datasets kept, up to this total number of bytes
+_cachebytes = 256*1024*1024
+_cache = OrderedDict()
+_cachelock = threading.Lock()
+
+def getHistogramData(key, getdata):
+    """Return a cached HistogramData object.
+
+    key: hashable value which uniquely identifies the data and
+      weights (e.g. includes the dataset versions)
+    getdata: function returning (data, weights), called if the
+      data are not cached
+    """
+    with _cachelock:
+        hdata = _cache.get(key)
+        if hdata is not None:
+            _cache.move_to_end(key)
+            return hdata
+
+    data, weights = getdata()
+    hdata = HistogramData(data, weights=weights)
+
+    with _cachelock:
+        _cache[key] = hdata
+        # remove least recently used, but always keep the latest
+        total = sum(h.nbytes for h in _cache.values())
+        while len(_cache) > 1 and total > _cachebytes:
+            total -= _cache.popitem(last=False)[1].nbytes
+    return hdata
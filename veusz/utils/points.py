@@ -22,7 +22,8 @@ import numpy as N
 
 from .. import qtall as qt
 from . import colormap
-from ..helpers.qtloops import plotPathsToPainter, scalePath
+from ..helpers.qtloops import (
+    plotPathsToPainter, plotLineArrowsToPainter, scalePath)
 
 """Symbol plotting part of Veusz
 
@@ -583,7 +584,7 @@ MarkerCodes = (
 
 def plotMarkers(painter, xpos, ypos, markername, markersize, scaling=None,
                 clip=None, cmap=None, colorvals=None, scaleline=False,
-                equalarea=False):
+                equalarea=False, colorkey=None):
     """Funtion to plot an array of markers on a painter.
 
     painter: QPainter
@@ -596,6 +597,8 @@ def plotMarkers(painter, xpos, ypos, markername, markersize, scaling=None,
     colorvals: color values 0-1 of each point if used
     scaleline: if scaling, scale border line width with scaling
     equalarea: apply scaling factor for marker area (for filled markers)
+    colorkey: optional hashable value identifying colorvals, so that
+     the colors can be reused (see applyColorMap)
     """
 
     # minor optimization
@@ -627,7 +630,8 @@ def plotMarkers(painter, xpos, ypos, markername, markersize, scaling=None,
         trans = (1-painter.brush().color().alphaF())*100
         color2d = colorvals.reshape( 1, len(colorvals) )
         colorimg = colormap.applyColorMap(
-            cmap, 'linear', color2d, 0., 1., trans)
+            cmap, 'linear', color2d, 0., 1., trans,
+            cachekey=None if colorkey is None else ('points', colorkey))
 
     plotPathsToPainter(
         painter, path, xpos, ypos, scaling, clip, colorimg, scaleline)
@@ -703,3 +707,29 @@ def plotLineArrow(painter, xpos, ypos, length, angle,
     painter.drawLine(qt.QPointF(0, 0), qt.QPointF(length, 0))
 
     painter.restore()
+
+def plotLineArrows(painter, xpos, ypos, lengths, angles,
+                   arrowsizes=0,
+                   arrowleft='none', arrowright='none',
+                   clip=None):
+    """Plot a set of lines or arrows, as plotLineArrow.
+
+    xpos, ypos, lengths and angles are arrays for each line
+    arrowsizes is a single size or an array of sizes
+    clip is a rectangle to skip lines outside, if given
+    """
+
+    linewidth = painter.pen().widthF()
+    if N.isscalar(arrowsizes):
+        pathsize, scaling = arrowsizes, None
+    else:
+        pathsize, scaling = 1., N.asarray(arrowsizes, dtype=N.float64)
+
+    leftpath, leftfill = getPointPainterPath(
+        arrow_translate[arrowleft], pathsize, linewidth)
+    rightpath, rightfill = getPointPainterPath(
+        arrow_translate[arrowright], pathsize, linewidth)
+
+    plotLineArrowsToPainter(
+        painter, leftpath, leftfill, rightpath, rightfill,
+        xpos, ypos, lengths, angles, scaling, clip)
@@ -0,0 +1,108 @@
+#    Copyright (C) 2021 Jeremy S. Sanders
+#    Email: Jeremy Sanders <jeremy@jeremysanders.net>
+#
+#    This program is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation; either version 2 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License along
+#    with this program; if not, write to the Free Software Foundation, Inc.,
+#    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+###############################################################################
+
+"""Multi-resolution copies of 2D images.
+
+Large images can be drawn from a reduced resolution copy which has
+about the resolution of the output, rather than from the full data.
+"""
+
+from collections import OrderedDict
+import threading
+
+import numpy as N
+
+def halveImage(data):
+    """Return 2D array with half the resolution of data.
+
+    Each output pixel is the mean of the finite values in a 2x2 block
+    of input pixels (or nan if there are none). If the input has an
+    odd size, the final row or column of blocks only covers one input
+    pixel.
+    """
+
+    h, w = data.shape
+    if h % 2 != 0 or w % 2 != 0:
+        padded = N.full((h + h%2, w + w%2), N.nan)
+        padded[:h, :w] = data
+        data = padded
+
+    blocks = data.reshape(data.shape[0]//2, 2, data.shape[1]//2, 2)
+    finite = N.isfinite(blocks)
+    total = N.where(finite, blocks, 0.).sum(axis=(1, 3))
+    count = finite.sum(axis=(1, 3))
+    with N.errstate(invalid='ignore', divide='ignore'):
+        return total / count
+
+class ImagePyramid:
+    """Image data at successively halved resolutions.
+
+    Level 0 is the original data and each pixel in level n covers
+    2**n x 2**n original pixels. Levels are made when first requested.
+    """
+
+    def __init__(self, data):
+        self.levels = [N.asarray(data, dtype=N.float64)]
+        self._range = None
+
+    def level(self, num):
+        """Return data at level num (clipped to the smallest level)."""
+        while len(self.levels) <= num:
+            last = self.levels[-1]
+            if last.shape[0] <= 1 and last.shape[1] <= 1:
+                break
+            self.levels.append(halveImage(last))
+        return self.levels[min(num, len(self.levels)-1)]
+
+    def valueRange(self):
+        """Return minimum and maximum of the original data, ignoring
+        nan values."""
+        if self._range is None:
+            data = self.levels[0]
+            if data.size == 0:
+                self._range = (N.nan, N.nan)
+            else:
+                self._range = (N.nanmin(data), N.nanmax(data))
+        return self._range
+
+# maximum number of pyramids to keep
+_cachesize = 4
+_cache = OrderedDict()
+_cachelock = threading.Lock()
+
+def getImagePyramid(key, getdata):
+    """Return a cached ImagePyramid object.
+
+    key: hashable value which uniquely identifies the data
+      (e.g. the dataset version)
+    getdata: function returning the 2D data, called if the pyramid
+      is not cached
+    """
+    with _cachelock:
+        pyramid = _cache.get(key)
+        if pyramid is not None:
+            _cache.move_to_end(key)
+            return pyramid
+
+    pyramid = ImagePyramid(getdata())
+
+    with _cachelock:
+        _cache[key] = pyramid
+        while len(_cache) > _cachesize:
+            _cache.popitem(last=False)
+    return pyramid
@@ -21,6 +21,8 @@
 
 import math
 import re
+import threading
+from collections import OrderedDict
 
 import numpy as N
 
@@ -1240,6 +1242,59 @@ def makePartTree(partlist):
     else:
         return PartLines(lines)
 
+class TextLayoutCache:
+    """Thread-safe LRU cache of laid out text.
+
+    Items are keyed by the text, font and paint device resolution, so
+    that text which is drawn repeatedly is not parsed and measured
+    each time.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key, makefn):
+        """Return cached item for key, calling makefn() to make it if
+        it is not in the cache."""
+        with self.lock:
+            item = self.items.get(key)
+            if item is not None:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return item
+            self.misses += 1
+
+        item = makefn()
+
+        with self.lock:
+            self.items[key] = item
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+        return item
+
+    def clear(self):
+        """Remove all items and reset statistics."""
+        with self.lock:
+            self.items.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """Return dict of cache statistics."""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self.items),
+                'hitrate': self.hits/total if total else 0.,
+            }
+
+# cache of part trees and sizes for _StdRenderer
+textlayoutcache = TextLayoutCache()
+
 class _Renderer:
     """Different renderer types based on this."""
 
@@ -1405,9 +1460,32 @@ class _StdRenderer(_Renderer):
             text = text[:delta+m.start()] + expanded + text[delta+m.end():]
             delta += len(expanded) - (m.end()-m.start())
 
-        # make internal tree
-        partlist = makePartList(text)
-        self.parttree = makePartTree(partlist)
+        self.text = text
+
+    def _layoutKey(self):
+        """Key identifying layout of text in the layout cache."""
+        dev = self.painter.device()
+        dpi = (None, None) if dev is None else (
+            dev.logicalDpiX(), dev.logicalDpiY())
+        return (
+            self.text, self.font.key(), dpi,
+            getattr(self.painter, 'pixperpt', None),
+            getattr(self.painter, 'scaling', None),
+            self.usefullheight, self.alignvert == 0,
+        )
+
+    def _getLayout(self):
+        """Get (parttree, totalwidth, totalheight, dy) for the text.
+
+        The part tree keeps the measurements made for this font and
+        device, so it can only be shared by renderers with the same
+        layout key.
+        """
+        return textlayoutcache.get(self._layoutKey(), self._makeLayout)
+
+    @property
+    def parttree(self):
+        return self._getLayout()[0]
 
     def _expandExpr(self, expr):
         """Expand expression."""
@@ -1426,6 +1504,12 @@ class _StdRenderer(_Renderer):
 
     def _getWidthHeight(self):
         """Get size of box around text."""
+        return self._getLayout()[1:]
+
+    def _makeLayout(self):
+        """Parse text and work out size of box around it."""
+
+        parttree = makePartTree(makePartList(self.text))
 
         # work out total width and height
         self.painter.setFont(self.font)
@@ -1455,12 +1539,12 @@ class _StdRenderer(_Renderer):
             dy = 0
 
         # work out width
-        self.parttree.render(state)
+        parttree.render(state)
         totalwidth = state.x
         # add number of lines for height
         totalheight += fm.height()*(state.maxlines-1)
 
-        return totalwidth, totalheight, dy
+        return parttree, totalwidth, totalheight, dy
 
     def render(self):
         """Render the text."""
@@ -1612,3 +1696,58 @@ def Renderer(painter, font, x, y, text,
         angle=angle, usefullheight=usefullheight,
         doc=doc
     )
+
+def renderLabels(painter, font, xs, ys, texts,
+                 alignhorz = -1, alignvert = -1, angle = 0,
+                 clip = None, doc = None):
+    """Render a set of text labels at the positions given.
+
+    Each distinct text is only laid out once, then moved to each
+    position where it is drawn. Labels which are entirely outside the
+    clip rectangle (if given) are not drawn.
+
+    xs and ys are the positions to draw the texts at
+    other parameters are as for Renderer
+    """
+
+    xs = N.asarray(xs, dtype=N.float64)
+    ys = N.asarray(ys, dtype=N.float64)
+    texts = list(texts)
+    num = min(len(xs), len(ys), len(texts))
+    if num == 0:
+        return
+
+    idxs = N.arange(num)
+    idxs = idxs[N.isfinite(xs[:num]) & N.isfinite(ys[:num])]
+
+    # layouts of each text, positioned at the origin, which are
+    # culled using their measured bounds
+    layouts = {}
+    for i in idxs:
+        text = texts[i]
+        layout = layouts.get(text)
+        if layout is None:
+            r = Renderer(
+                painter, font, 0, 0, text,
+                alignhorz=alignhorz, alignvert=alignvert,
+                angle=angle, doc=doc)
+            bounds = list(r.getBounds())
+            # parts of the text (e.g. superscripts) can be drawn
+            # outside the bounds, so allow some extra room for culling
+            pad = max(bounds[2]-bounds[0], bounds[3]-bounds[1])
+            layout = layouts[text] = (r, r.xi, r.yi, bounds, pad)
+
+        r, xi, yi, bounds, pad = layout
+        x, y = xs[i], ys[i]
+        if clip is not None and (
+                bounds[0]+x > clip.right()+pad or
+                bounds[2]+x < clip.left()-pad or
+                bounds[1]+y > clip.bottom()+pad or
+                bounds[3]+y < clip.top()-pad):
+            continue
+
+        # move the laid out text to the position
+        r.x, r.y = x, y
+        r.xi, r.yi = xi+x, yi+y
+        r.calcbounds = [bounds[0]+x, bounds[1]+y, bounds[2]+x, bounds[3]+y]
+        r.render()
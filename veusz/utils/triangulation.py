@@ -0,0 +1,317 @@
+#    Copyright (C) 2021 Jeremy S. Sanders
+#    Email: Jeremy Sanders <jeremy@jeremysanders.net>
+#
+#    This program is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation; either version 2 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License along
+#    with this program; if not, write to the Free Software Foundation, Inc.,
+#    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+###############################################################################
+
+"""Contouring of scattered points.
+
+The points are Delaunay triangulated, and contours are found on the
+triangles (marching triangles). Each triangle crossing a level gives
+a segment of the contour, and the segments are joined into lines by
+matching their ends.
+"""
+
+from collections import OrderedDict
+import threading
+
+import numpy as N
+
+from ..helpers.qtloops import delaunayTriangulate
+
+def _polygonTable():
+    """Make table of the outline of the part of a triangle within a
+    band of values, for each combination of the classes of its
+    vertices.
+
+    Classes are 0 (below the band), 1 (in the band) and 2 (above).
+    The code for a triangle is 9*class0 + 3*class1 + class2. For each
+    code the outline is a list of points, anticlockwise, where each
+    point is (vertex, edge, crossing). If crossing is 0 the point is
+    the vertex given. Otherwise it is where the edge crosses the lower
+    (1) or upper (2) level of the band. Edge i goes from vertex i to
+    vertex i+1.
+    """
+
+    table = []
+    for code in range(27):
+        classes = (code//9, (code//3)%3, code%3)
+        outline = []
+        for i in range(3):
+            ca, cb = classes[i], classes[(i+1)%3]
+            if ca == 1:
+                outline.append((i, i, 0))
+            if ca < cb:
+                if ca == 0:
+                    outline.append((i, i, 1))
+                if cb == 2:
+                    outline.append((i, i, 2))
+            elif ca > cb:
+                if ca == 2:
+                    outline.append((i, i, 2))
+                if cb == 0:
+                    outline.append((i, i, 1))
+        table.append(outline)
+    return table
+
+_outlines = _polygonTable()
+
+def _pointEdges(point):
+    """Triangle edges which a point in the outline table lies on."""
+    vertex, edge, crossing = point
+    if crossing == 0:
+        return {vertex, (vertex+2)%3}
+    return {edge}
+
+def _chainSegments(startkeys, endkeys):
+    """Join segments into chains, where each segment ends where the
+    next starts.
+
+    Returns (order, breaks, closed). order is the segment indices in
+    chain order, with chain i being order[breaks[i]:breaks[i+1]].
+    closed is a boolean array, True for chains which are loops.
+    """
+
+    num = len(startkeys)
+    idx = N.arange(num)
+
+    # find the following segment for each segment (or itself if none)
+    sortidx = N.argsort(startkeys)
+    sortkeys = startkeys[sortidx]
+    pos = N.minimum(N.searchsorted(sortkeys, endkeys), num-1)
+    nxt = N.where(sortkeys[pos] == endkeys, sortidx[pos], idx)
+
+    # find the lowest index in each loop by pointer jumping
+    lowest = idx.copy()
+    jump = nxt.copy()
+    steps = 1
+    while steps < num:
+        lowest = N.minimum(lowest, lowest[jump])
+        jump = jump[jump]
+        steps *= 2
+
+    # break loops before their lowest segment
+    inloop = nxt[jump] != jump
+    cut = inloop & (nxt == lowest)
+    nxt[cut] = idx[cut]
+
+    # find distance of each segment to the end of its chain
+    dist = (nxt != idx).astype(N.int64)
+    tail = nxt.copy()
+    steps = 1
+    while steps < num:
+        dist = dist + dist[tail]
+        tail = tail[tail]
+        steps *= 2
+
+    order = N.lexsort((-dist, tail))
+    tails = tail[order]
+    breaks = N.concatenate((
+        [0], N.nonzero(tails[1:] != tails[:-1])[0]+1, [num]))
+    closed = cut[order[breaks[1:]-1]]
+    return order, breaks, closed
+
+class TriContourer:
+    """Contour a set of values on a triangulation."""
+
+    def __init__(self, triangulation, z):
+        self.tri = triangulation
+        self.z = N.asarray(z, dtype=N.float64)
+
+        # only use triangles with finite values
+        ztri = self.z[triangulation.triangles]
+        valid = N.all(N.isfinite(ztri), axis=1)
+        self.triangles = triangulation.triangles[valid]
+        self.zmin = ztri[valid].min(axis=1)
+        self.zmax = ztri[valid].max(axis=1)
+        self.outer = triangulation.outerEdges(valid)
+        self.hasouter = N.any(self.outer, axis=1)
+
+    def _crossing(self, va, vb, level):
+        """Return key and coordinates of where edges va->vb cross level."""
+        lo = N.minimum(va, vb)
+        hi = N.maximum(va, vb)
+        z, x, y = self.z, self.tri.x, self.tri.y
+        frac = (level - z[lo]) / (z[hi] - z[lo])
+        return (
+            lo*self.tri.npts + hi,
+            x[lo] + frac*(x[hi]-x[lo]),
+            y[lo] + frac*(y[hi]-y[lo]) )
+
+    def _outlineSegments(self, lowlevel, highlevel, withedges):
+        """Return segments of the outline of the region between the
+        levels, as start keys, end keys, start coordinates and end
+        coordinates.
+
+        If withedges is False, only segments along contours are
+        returned, not along the edges of the triangulation.
+        """
+
+        if withedges:
+            sel = ~( (self.zmax < lowlevel) | (self.zmin > highlevel) |
+                     ( (self.zmin >= lowlevel) & (self.zmax <= highlevel) &
+                       ~self.hasouter ) )
+        else:
+            sel = (self.zmin < lowlevel) & (self.zmax >= lowlevel)
+            if N.isfinite(highlevel):
+                sel |= (self.zmin <= highlevel) & (self.zmax > highlevel)
+
+        triangles = self.triangles[sel]
+        outer = self.outer[sel]
+        ztri = self.z[triangles]
+        classes = (ztri >= lowlevel).astype(N.intp) + (ztri > highlevel)
+        codes = classes[:,0]*9 + classes[:,1]*3 + classes[:,2]
+
+        # group triangles with the same code
+        order = N.argsort(codes, kind='stable')
+        bounds = N.searchsorted(codes[order], N.arange(28))
+
+        npts = self.tri.npts
+        levels = (None, lowlevel, highlevel)
+        startkeys, endkeys, startxy, endxy = [], [], [], []
+        for code, outline in enumerate(_outlines):
+            rows = order[bounds[code]:bounds[code+1]]
+            if len(rows) == 0 or len(outline) == 0:
+                continue
+            tris = triangles[rows]
+
+            # key and coordinates of each point in outline
+            pts = []
+            for vertex, edge, crossing in outline:
+                if crossing == 0:
+                    v = tris[:,vertex]
+                    pts.append((
+                        (v*npts + v)*3, self.tri.x[v], self.tri.y[v]))
+                else:
+                    key, x, y = self._crossing(
+                        tris[:,edge], tris[:,(edge+1)%3], levels[crossing])
+                    pts.append((key*3 + crossing, x, y))
+
+            # segments between successive points
+            for i in range(len(outline)):
+                j = (i+1) % len(outline)
+                edges = _pointEdges(outline[i]) & _pointEdges(outline[j])
+                if edges:
+                    # along the edge of the triangle
+                    if not withedges:
+                        continue
+                    keep = outer[rows, edges.pop()]
+                else:
+                    keep = slice(None)
+                startkeys.append(pts[i][0][keep])
+                endkeys.append(pts[j][0][keep])
+                startxy.append(N.column_stack(
+                    (pts[i][1][keep], pts[i][2][keep])))
+                endxy.append(N.column_stack(
+                    (pts[j][1][keep], pts[j][2][keep])))
+
+        if not startkeys:
+            e = N.array([], dtype=N.int64)
+            return e, e, N.zeros((0, 2)), N.zeros((0, 2))
+        return (
+            N.concatenate(startkeys), N.concatenate(endkeys),
+            N.concatenate(startxy), N.concatenate(endxy) )
+
+    def _joinOutline(self, lowlevel, highlevel, withedges):
+        """Join outline segments into a list of lines."""
+        startkeys, endkeys, startxy, endxy = self._outlineSegments(
+            lowlevel, highlevel, withedges)
+        if len(startkeys) == 0:
+            return []
+
+        order, breaks, closed = _chainSegments(startkeys, endkeys)
+        pts = startxy[order]
+
+        # lines are the start of each segment, plus the end of the
+        # last one (which is the start of the first for loops)
+        lines = []
+        for i in range(len(closed)):
+            last = order[breaks[i+1]-1]
+            lines.append(N.vstack((
+                pts[breaks[i]:breaks[i+1]], endxy[last:last+1])))
+        return lines
+
+    def lines(self, level):
+        """Return list of contour lines for level.
+
+        Each line is a numpy array of x,y coordinates (shape (n,2)).
+        """
+        return self._joinOutline(level, N.inf, False)
+
+    def polygons(self, lowlevel, highlevel):
+        """Return list of polygons enclosing the region between the
+        levels, where holes are given by polygons inside others.
+
+        Each polygon is a numpy array of x,y coordinates (shape (n,2)).
+        """
+        return self._joinOutline(lowlevel, highlevel, True)
+
+class Triangulation:
+    """Delaunay triangulation of scattered points."""
+
+    def __init__(self, x, y):
+        self.x = x = N.array(x, dtype=N.float64)
+        self.y = y = N.array(y, dtype=N.float64)
+        self.npts = len(x)
+
+        # triangulate finite points, and convert back to their indices
+        finiteidx = N.nonzero(N.isfinite(x) & N.isfinite(y))[0]
+        tris, nbs = delaunayTriangulate(x[finiteidx], y[finiteidx])
+        self.triangles = finiteidx[tris.reshape(-1, 3)]
+
+        # triangle on the other side of each edge (or -1)
+        self.neighbours = nbs.reshape(-1, 3)
+
+    def outerEdges(self, valid):
+        """Return boolean array for each edge of the triangles selected
+        by valid, which is True for edges not shared with another
+        selected triangle.
+
+        Edge i goes from vertex i to vertex i+1.
+        """
+        nbs = self.neighbours[valid]
+        return (nbs < 0) | ~valid[N.maximum(nbs, 0)]
+
+    def contourer(self, z):
+        """Return TriContourer for values z at the points."""
+        return TriContourer(self, z)
+
+# maximum number of triangulations to keep
+_cachesize = 4
+_cache = OrderedDict()
+_cachelock = threading.Lock()
+
+def getTriangulation(key, getdata):
+    """Return a cached Triangulation object.
+
+    key: hashable value which uniquely identifies the x and y
+      coordinates (e.g. includes the dataset versions)
+    getdata: function returning (x, y), called if the triangulation
+      is not cached
+    """
+    with _cachelock:
+        tri = _cache.get(key)
+        if tri is not None:
+            _cache.move_to_end(key)
+            return tri
+
+    x, y = getdata()
+    tri = Triangulation(x, y)
+
+    with _cachelock:
+        _cache[key] = tri
+        while len(_cache) > _cachesize:
+            _cache.popitem(last=False)
+    return tri
@@ -19,8 +19,11 @@
 """Widget to plot axes, and to handle conversion of coordinates to plot
 positions."""
 
-import numpy as N
+from collections import OrderedDict
 import re
+import threading
+
+import numpy as N
 
 from .. import qtall as qt
 from .. import document
@@ -37,6 +40,38 @@ def _(text, disambiguation=None, context='Axis'):
     """Translate text."""
     return qt.QCoreApplication.translate(context, text, disambiguation)
 
+# maximum number of sets of tick labels to keep
+_labelcachesize = 256
+_labelcache = OrderedDict()
+_labelcachelock = threading.Lock()
+
+def formatTickLabels(tickvals, scale, format, locale):
+    """Return list of labels for tick values multiplied by scale.
+
+    Labels are cached, so that axes with the same ticks and format
+    only format them once.
+    """
+
+    tickvals = N.asarray(tickvals, dtype=N.float64)
+    key = (
+        tickvals.tobytes(), scale, format,
+        locale.name(), int(locale.numberOptions()) )
+
+    with _labelcachelock:
+        labels = _labelcache.get(key)
+        if labels is not None:
+            _labelcache.move_to_end(key)
+            return labels
+
+    labels = tuple(
+        utils.formatNumbers(N.asarray(tickvals)*scale, format, locale=locale) )
+
+    with _labelcachelock:
+        _labelcache[key] = labels
+        while len(_labelcache) > _labelcachesize:
+            _labelcache.popitem(last=False)
+    return labels
+
 class MajorTick(setting.Line):
     '''Major tick settings.'''
 
@@ -609,15 +644,15 @@ class Axis(widget.Widget):
         extendmin = nexttick and s.min == 'Auto' and allowauto
         extendmax = nexttick and s.max == 'Auto' and allowauto
 
-        # create object to compute ticks
-        axs = tickclass(
+        # get object with computed ticks (shared with other axes)
+        axs = axisticks.getCachedTicks(
+            tickclass,
             self.plottedrange[0], self.plottedrange[1],
             s.MajorTicks.number, s.MinorTicks.number,
             extendmin = extendmin, extendmax = extendmax,
             logaxis = self.plottedLog()
         )
 
-        axs.getTicks()
         self.plottedrange[0] = axs.minval
         self.plottedrange[1] = axs.maxval
         self.majortickscalc = axs.tickvals
@@ -966,9 +1001,9 @@ class Axis(widget.Widget):
                 format = self.autoformat
 
             # generate positions and labels
-            for posn, tickval in zip(coordticks, tickvals):
-                text = utils.formatNumber(
-                    tickval*scale, format, locale=self.document.locale)
+            labels = formatTickLabels(
+                tickvals, scale, format, self.document.locale)
+            for posn, text in zip(coordticks, labels):
                 yield posn, text
 
         # position of label perpendicular to axis
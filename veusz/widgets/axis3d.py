@@ -450,15 +450,15 @@ class Axis3D(widget.Widget):
         extendmin = nexttick and s.min == 'Auto' and allowauto
         extendmax = nexttick and s.max == 'Auto' and allowauto
 
-        # create object to compute ticks
-        axs = tickclass(
+        # get object with computed ticks (shared with other axes)
+        axs = axisticks.getCachedTicks(
+            tickclass,
             self.plottedrange[0], self.plottedrange[1],
             s.MajorTicks.number, s.MinorTicks.number,
             extendmin = extendmin, extendmax = extendmax,
             logaxis = s.log
         )
 
-        axs.getTicks()
         self.plottedrange[0] = axs.minval
         self.plottedrange[1] = axs.maxval
         self.majortickscalc = axs.tickvals
@@ -574,9 +574,8 @@ class Axis3D(widget.Widget):
             if fmt.lower() == 'auto':
                 fmt = self.autoformat
             scale = ticklabelsprop.scale
-            ticklabels = [
-                utils.formatNumber(v*scale, fmt, locale=self.document.locale)
-                for v in tickvals ]
+            ticklabels = list(axis.formatTickLabels(
+                tickvals, scale, fmt, self.document.locale))
         else:
             return
 
@@ -19,7 +19,10 @@
 #    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 ##############################################################################
 
+from collections import OrderedDict
 import math
+import threading
+
 import numpy as N
 
 from .. import utils
@@ -489,30 +492,22 @@ class DateTicks(AxisTicksBase):
             maxtick = maxdate
 
         # make ticks
-        ticks = []
-        dt = mintick
-        while dt <= maxtick:
-            ticks.append( utils.datetimeToFloat(dt))
-            dt = utils.addTimeTupleToDateTime(dt, besttt)
+        ticks = utils.timeTupleRange(mintick, maxtick, besttt)
 
         return (
             utils.datetimeToFloat(mindate),
             utils.datetimeToFloat(maxdate),
             intervals_sec[best],
-            N.array(ticks), fmt
+            ticks, fmt
         )
 
     def filterIntervals(self, estint):
         """Filter intervals and intervals_sec to be
         multiples of estint seconds."""
-        intervals = []
-        intervals_sec = []
-        for i, inter in enumerate(self.intervals_sec):
-            ratio = estint / inter
-            if abs(ratio-int(ratio)) < ratio*.01:
-                intervals.append(self.intervals[i])
-                intervals_sec.append(inter)
-        return intervals, N.array(intervals_sec)
+        ratio = estint / self.intervals_sec
+        sel = N.nonzero(N.abs(ratio-N.trunc(ratio)) < ratio*.01)[0]
+        intervals = [self.intervals[i] for i in sel]
+        return intervals, self.intervals_sec[sel]
 
     def getTicks(self):
         """Calculate and return the position of the major ticks.
@@ -537,3 +532,39 @@ class DateTicks(AxisTicksBase):
         self.minorticks = minorticks
         self.tickvals = ticks
         self.autoformat = fmt
+
+# maximum number of tick calculations to keep
+_cachesize = 256
+_cache = OrderedDict()
+_cachelock = threading.Lock()
+
+def getCachedTicks(tickclass, minval, maxval, numticks, numminorticks,
+                   **args):
+    """Return tickclass object for the parameters, after calling
+    getTicks().
+
+    Axes with the same range and tick settings share the same object,
+    so its attributes (and arrays) should not be modified.
+    """
+
+    key = (
+        tickclass, minval, maxval, numticks, numminorticks,
+        tuple(sorted(args.items())) )
+
+    with _cachelock:
+        axs = _cache.get(key)
+        if axs is not None:
+            _cache.move_to_end(key)
+            return axs
+
+    axs = tickclass(minval, maxval, numticks, numminorticks, **args)
+    axs.getTicks()
+    for vals in axs.tickvals, axs.minorticks:
+        if isinstance(vals, N.ndarray):
+            vals.flags.writeable = False
+
+    with _cachelock:
+        _cache[key] = axs
+        while len(_cache) > _cachesize:
+            _cache.popitem(last=False)
+    return axs
@@ -174,14 +174,17 @@ class BarPlotter(GenericPlotter):
     def singleBarDataRange(self, datasets):
         """For single bars where multiple datasets are added,
         compute maximum range."""
-        minv, maxv = 0., 0.
-        for data in zip(*[ds.data for ds in datasets]):
-            totpos = sum( [d for d in data if d > 0] )
-            totneg = sum( [d for d in data if d < 0] )
-
-            minv = min(minv, totneg)
-            maxv = max(maxv, totpos)
-        return minv,  maxv
+        if not datasets:
+            return 0., 0.
+        length = min([len(ds.data) for ds in datasets])
+        if length == 0:
+            return 0., 0.
+        stack = N.vstack([ds.data[:length] for ds in datasets])
+
+        # totals of positive and negative values in each bar
+        totpos = N.where(stack > 0, stack, 0.).sum(axis=0)
+        totneg = N.where(stack < 0, stack, 0.).sum(axis=0)
+        return min(0., totneg.min()), max(0., totpos.max())
 
     def getRange(self, axis, depname, axrange):
         """Update axis range from data."""
@@ -376,31 +379,20 @@ class BarPlotter(GenericPlotter):
     def calcStackedPoints(self, dsvals, axis, widgetposn):
         """Calculate stacked dataset coordinates for plotting."""
 
-        # keep track of last most negative or most positive values in bars
-        poslen = len(dsvals[0]['data'])
-        lastneg = N.zeros(poslen)
-        lastpos = N.zeros(poslen)
-
-        # returned stacked values and coordinates
-        stackedvals = []
-        stackedcoords = []
-
-        for dsnum, data in enumerate(dsvals):
-            # add on value to last value in correct direction
-            data = data['data']
-            new = N.where(data < 0., lastneg+data, lastpos+data)
-
-            # work out maximum extents for next time
-            lastneg = N.min( N.vstack((lastneg, new)), axis=0 )
-            lastpos = N.max( N.vstack((lastpos, new)), axis=0 )
+        stack = N.vstack([data['data'] for data in dsvals])
 
-            # convert values to plotter coordinates
-            newplt = axis.dataToPlotterCoords(widgetposn, new)
+        # negative values are added to the total of the previous
+        # negative values, and positive values to the positive total
+        cumneg = N.cumsum(N.minimum(stack, 0.), axis=0)
+        cumpos = N.cumsum(N.maximum(stack, 0.), axis=0)
+        stacked = N.where(stack < 0., cumneg, cumpos)
 
-            stackedvals.append(new)
-            stackedcoords.append(newplt)
+        # convert values to plotter coordinates
+        coords = axis.dataToPlotterCoords(
+            widgetposn, stacked.ravel()).reshape(stacked.shape)
 
-        return stackedvals, stackedcoords
+        # returned stacked values and coordinates
+        return list(stacked), list(coords)
 
     def barDrawStacked(self, painter, posns, maxwidth, dsvals,
                        axes, widgetposn, clip):
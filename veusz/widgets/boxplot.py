@@ -18,7 +18,6 @@
 
 """For making box plots."""
 
-import math
 import numpy as N
 
 from .. import qtall as qt
@@ -32,27 +31,6 @@ def _(text, disambiguation=None, context='BoxPlot'):
     """Translate text."""
     return qt.QCoreApplication.translate(context, text, disambiguation)
 
-def percentile(sortedds, perc):
-    """Given a sorted dataset, get the percentile perc.
-
-    Interpolates between data points."""
-
-    index = perc * 0.01 * (sortedds.shape[0]-1)
-
-    # interpolate between indices
-    frac, index = math.modf(index)
-    index = int(index)
-    indexplus1 = min(index+1, sortedds.shape[0]-1)
-    interpol = (1-frac)*sortedds[index] + frac*sortedds[indexplus1]
-    return interpol
-
-def swapline(painter, x1, y1, x2, y2, swap):
-    """Draw line, swapping x and y coordinates if swap is True."""
-    if swap:
-        painter.drawLine( qt.QPointF(y1, x1), qt.QPointF(y2, x2) )
-    else:
-        painter.drawLine( qt.QPointF(x1, y1), qt.QPointF(x2, y2) )
-
 def swapbox(painter, x1, y1, x2, y2, swap):
     """Return box, swapping x and y coordinates if swap is True."""
     if swap:
@@ -60,48 +38,114 @@ def swapbox(painter, x1, y1, x2, y2, swap):
     else:
         return qt.QRectF(qt.QPointF(x1, y1), qt.QPointF(x2, y2))
 
-class _Stats:
-    """Store statistics about box."""
+def groupPercentile(sortedds, starts, counts, perc):
+    """Get the percentile perc for groups of sorted values.
 
-    def calculate(self, data, whiskermode):
-        """Calculate statistics for data."""
-        cleaned = data[ N.isfinite(data) ]
-        cleaned.sort()
+    sortedds is an array of groups of sorted values, with each group
+    starting at an index in starts and having the number of values in
+    counts (which must be non-zero). Interpolates between data points.
+    """
 
-        if len(cleaned) == 0:
-            self.median = self.botquart = self.topquart = self.mean = \
-                self.botwhisker = self.topwhisker = N.nan
-            return
+    index = perc * 0.01 * (counts-1)
+    frac = index - N.floor(index)
+    index = index.astype(N.intp)
+    indexplus1 = N.minimum(index+1, counts-1)
+    return (1-frac)*sortedds[starts+index] + frac*sortedds[starts+indexplus1]
 
-        self.median = percentile(cleaned, 50)
-        self.botquart = percentile(cleaned, 25)
-        self.topquart = percentile(cleaned, 75)
-        self.mean = N.mean(cleaned)
+class _Stats:
+    """Store statistics about boxes.
+
+    Each statistic is an array with a value for each box. The outliers
+    of all the boxes are in outliers, with the index of their box in
+    outlierboxes.
+    """
+
+    def calculate(self, datalist, whiskermode):
+        """Calculate statistics for each data array in datalist."""
+
+        # sort the finite values of each box, then join them together
+        cleaned = []
+        for data in datalist:
+            c = data[ N.isfinite(data) ]
+            c.sort()
+            cleaned.append(c)
+        numboxes = len(cleaned)
+        counts = N.array([len(c) for c in cleaned], dtype=N.intp)
+        sortedds = (
+            N.concatenate(cleaned) if numboxes > 0 else N.array([]) )
+        starts = N.concatenate(([0], N.cumsum(counts)[:-1])).astype(N.intp)
+
+        # box of each value
+        boxidx = N.repeat(N.arange(numboxes), counts)
+
+        for name in ('median', 'botquart', 'topquart', 'mean',
+                     'botwhisker', 'topwhisker'):
+            setattr(self, name, N.full(numboxes, N.nan))
+
+        self.outliers = N.array([])
+        self.outlierboxes = N.array([], dtype=N.intp)
+
+        # compute statistics for non-empty boxes
+        ok = counts > 0
+        if not N.any(ok):
+            return
+        okstarts, okcounts = starts[ok], counts[ok]
+        self.median[ok] = groupPercentile(sortedds, okstarts, okcounts, 50)
+        self.botquart[ok] = groupPercentile(sortedds, okstarts, okcounts, 25)
+        self.topquart[ok] = groupPercentile(sortedds, okstarts, okcounts, 75)
+        self.mean[ok] = N.add.reduceat(sortedds, okstarts) / okcounts
 
         if whiskermode == 'min/max':
-            self.botwhisker = cleaned.min()
-            self.topwhisker = cleaned.max()
+            self.botwhisker[ok] = sortedds[okstarts]
+            self.topwhisker[ok] = sortedds[okstarts+okcounts-1]
         elif whiskermode == '1.5IQR':
             iqr = self.topquart - self.botquart
-            eltop = N.searchsorted(cleaned, self.topquart+1.5*iqr)-1
-            self.topwhisker = cleaned[eltop]
-            elbot = max(N.searchsorted(cleaned, self.botquart-1.5*iqr), 0)
-            self.botwhisker = cleaned[elbot]
+            # count values below limits, to find index of whiskers
+            toplim = (self.topquart+1.5*iqr)[boxidx]
+            botlim = (self.botquart-1.5*iqr)[boxidx]
+            numbelowtop = N.add.reduceat(
+                (sortedds < toplim).astype(N.intp), okstarts)
+            numbelowbot = N.add.reduceat(
+                (sortedds < botlim).astype(N.intp), okstarts)
+            self.topwhisker[ok] = sortedds[
+                okstarts + N.maximum(numbelowtop-1, 0)]
+            self.botwhisker[ok] = sortedds[okstarts + numbelowbot]
         elif whiskermode == '1 stddev':
-            stddev = N.std(cleaned)
-            self.topwhisker = self.mean+stddev
-            self.botwhisker = self.mean-stddev
+            sqdev = (sortedds - self.mean[boxidx])**2
+            stddev = N.sqrt(N.add.reduceat(sqdev, okstarts) / okcounts)
+            self.topwhisker[ok] = self.mean[ok]+stddev
+            self.botwhisker[ok] = self.mean[ok]-stddev
         elif whiskermode == '9/91 percentile':
-            self.topwhisker = percentile(cleaned, 91)
-            self.botwhisker = percentile(cleaned, 9)
+            self.topwhisker[ok] = groupPercentile(
+                sortedds, okstarts, okcounts, 91)
+            self.botwhisker[ok] = groupPercentile(
+                sortedds, okstarts, okcounts, 9)
         elif whiskermode == '2/98 percentile':
-            self.topwhisker = percentile(cleaned, 98)
-            self.botwhisker = percentile(cleaned, 2)
+            self.topwhisker[ok] = groupPercentile(
+                sortedds, okstarts, okcounts, 98)
+            self.botwhisker[ok] = groupPercentile(
+                sortedds, okstarts, okcounts, 2)
         else:
             raise RuntimeError("Invalid whisker mode")
 
-        self.outliers = cleaned[ (cleaned < self.botwhisker) |
-                                 (cleaned > self.topwhisker) ]
+        outlying = ( (sortedds < self.botwhisker[boxidx]) |
+                     (sortedds > self.topwhisker[boxidx]) )
+        self.outliers = sortedds[outlying]
+        self.outlierboxes = boxidx[outlying]
+
+    def setManual(self, topwhisker, botwhisker, botquart, topquart,
+                  mean, median):
+        """Set statistics from arrays of values."""
+        num = min(len(topwhisker), len(botwhisker), len(botquart),
+                  len(topquart), len(mean), len(median))
+        self.topwhisker = N.array(topwhisker[:num], dtype=N.float64)
+        self.botwhisker = N.array(botwhisker[:num], dtype=N.float64)
+        self.botquart = N.array(botquart[:num], dtype=N.float64)
+        self.topquart = N.array(topquart[:num], dtype=N.float64)
+        self.mean = N.array(mean[:num], dtype=N.float64)
+        self.median = N.array(median[:num], dtype=N.float64)
+        self.outliers = N.array([])
+        self.outlierboxes = N.array([], dtype=N.intp)
 
 class BoxPlot(GenericPlotter):
     """Plot bar charts."""
@@ -327,80 +371,88 @@ class BoxPlot(GenericPlotter):
         positions = self.getPosns()
         return (text, positions)
 
-    def plotBox(self, painter, axes, boxposn, posn, width, clip, stats):
-        """Draw box for dataset."""
-
-        if not N.isfinite(stats.median):
-            # skip bad datapoints
-            return
+    def plotBoxes(self, painter, axes, boxposns, posn, width, clip, stats):
+        """Draw boxes for all the datasets."""
 
         s = self.settings
         horz = (s.direction == 'horizontal')
 
+        # skip bad datapoints
+        good = N.isfinite(stats.median) & N.isfinite(boxposns)
+        boxposns = boxposns[good]
+
         # convert quartiles, top and bottom whiskers to plotter
-        medplt, botplt, topplt, botwhisplt, topwhisplt = tuple(
-            axes[not horz].dataToPlotterCoords(
-                posn,
-                N.array([
-                    stats.median, stats.botquart, stats.topquart,
-                    stats.botwhisker, stats.topwhisker
-                ]))
-        )
-
-        # draw whisker top to bottom
+        medplt, botplt, topplt, botwhisplt, topwhisplt = [
+            axes[not horz].dataToPlotterCoords(posn, vals[good])
+            for vals in (
+                stats.median, stats.botquart, stats.topquart,
+                stats.botwhisker, stats.topwhisker)
+        ]
+
+        def swaplines(x1, y1, x2, y2):
+            """Draw finite lines, swapping x and y if horizontal."""
+            x1, y1, x2, y2 = N.broadcast_arrays(x1, y1, x2, y2)
+            ok = ( N.isfinite(x1) & N.isfinite(y1) &
+                   N.isfinite(x2) & N.isfinite(y2) )
+            if horz:
+                x1, y1, x2, y2 = y1, x1, y2, x2
+            utils.plotLinesToPainter(
+                painter, x1[ok], y1[ok], x2[ok], y2[ok], clip)
+
+        # draw whiskers top to bottom and their ends
         p = s.Whisker.makeQPenWHide(painter)
         p.setCapStyle(qt.Qt.FlatCap)
         painter.setPen(p)
-        swapline(painter, boxposn, topwhisplt, boxposn, botwhisplt, horz)
-        # draw ends of whiskers
         endsize = width/2
-        swapline(
-            painter, boxposn-endsize/2, topwhisplt,
-            boxposn+endsize/2, topwhisplt, horz)
-        swapline(
-            painter, boxposn-endsize/2, botwhisplt,
-            boxposn+endsize/2, botwhisplt, horz)
+        swaplines(
+            N.concatenate((boxposns, boxposns-endsize/2, boxposns-endsize/2)),
+            N.concatenate((topwhisplt, topwhisplt, botwhisplt)),
+            N.concatenate((boxposns, boxposns+endsize/2, boxposns+endsize/2)),
+            N.concatenate((botwhisplt, topwhisplt, botwhisplt)))
 
         # draw box fill
         boxpath = qt.QPainterPath()
-        boxpath.addRect( swapbox(
-            painter, boxposn-width/2, botplt, boxposn+width/2, topplt, horz) )
+        boxpath.setFillRule(qt.Qt.WindingFill)
+        for bpos, bot, top in zip(boxposns, botplt, topplt):
+            if N.isfinite(bot) and N.isfinite(top):
+                boxpath.addRect( swapbox(
+                    painter, bpos-width/2, bot, bpos+width/2, top,
+                    horz).normalized() )
         utils.brushExtFillPath(painter, s.Fill, boxpath)
 
-        # draw line across box
-        p = s.Whisker.makeQPenWHide(painter)
-        p.setCapStyle(qt.Qt.FlatCap)
+        # draw line across boxes
         painter.setPen(p)
-        swapline(
-            painter, boxposn-width/2, medplt,
-            boxposn+width/2, medplt, horz)
+        swaplines(boxposns-width/2, medplt, boxposns+width/2, medplt)
 
-        # draw box
+        # draw boxes
         painter.strokePath(boxpath, s.Border.makeQPenWHide(painter) )
 
         # draw outliers
         painter.setPen( s.MarkersLine.makeQPenWHide(painter) )
         painter.setBrush( s.MarkersFill.makeQBrushWHide(painter) )
         markersize = s.get('markerSize').convert(painter)
-        if stats.outliers.shape[0] != 0:
-            pltvals = axes[not horz].dataToPlotterCoords(posn, stats.outliers)
-            otherpos = N.zeros(pltvals.shape) + boxposn
+
+        # only keep outliers for boxes which are drawn
+        newidx = N.cumsum(good) - 1
+        keep = good[stats.outlierboxes]
+        if N.any(keep):
+            pltvals = axes[not horz].dataToPlotterCoords(
+                posn, stats.outliers[keep])
+            otherpos = boxposns[newidx[stats.outlierboxes[keep]]]
             if horz:
                 x, y = pltvals, otherpos
             else:
                 x, y = otherpos, pltvals
-
             utils.plotMarkers(
                 painter, x, y, s.outliersmarker, markersize, clip=clip )
 
-        # draw mean
-        meanplt = axes[not horz].dataToPlotterCoords(
-            posn, N.array([stats.mean]))[0]
+        # draw means
+        meanplt = axes[not horz].dataToPlotterCoords(posn, stats.mean[good])
         if horz:
-            x, y = meanplt, boxposn
+            x, y = meanplt, boxposns
         else:
-            x, y = boxposn, meanplt
-        utils.plotMarker( painter, x, y, s.meanmarker, markersize )
+            x, y = boxposns, meanplt
+        utils.plotMarkers( painter, x, y, s.meanmarker, markersize )
 
     def dataDraw(self, painter, axes, widgetposn, clip):
         """Plot the data on a plotter."""
@@ -455,30 +507,19 @@ class BoxPlot(GenericPlotter):
         # adjust width
         width = width * s.fillfraction
 
+        stats = _Stats()
+        numposns = len(plotposns)
         if s.calculate:
             # calculated boxes
-            for vals, plotpos in zip(values, plotposns):
-                stats = _Stats()
-                stats.calculate(vals.data, s.whiskermode)
-                self.plotBox(
-                    painter, axes, plotpos, widgetposn, width,
-                    clip, stats)
+            stats.calculate(
+                [vals.data for vals in values][:numposns], s.whiskermode)
         else:
             # manually given boxes
-            vals = [d.data for d in datasets] + [plotposns]
-            lens = [len(d) for d in vals]
-            for i in range(min(lens)):
-                stats = _Stats()
-                stats.topwhisker = vals[0][i]
-                stats.botwhisker = vals[1][i]
-                stats.botquart = vals[2][i]
-                stats.topquart = vals[3][i]
-                stats.mean = vals[4][i]
-                stats.median = vals[5][i]
-                stats.outliers = N.array([])
-                self.plotBox(
-                    painter, axes, vals[6][i], widgetposn,
-                    width, clip, stats)
+            stats.setManual(*[d.data[:numposns] for d in datasets])
+
+        self.plotBoxes(
+            painter, axes, plotposns[:len(stats.median)], widgetposn,
+            width, clip, stats)
 
 # allow the factory to instantiate a boxplot
 document.thefactory.register(BoxPlot)
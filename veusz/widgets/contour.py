@@ -24,6 +24,8 @@ as a C routine (taken from matplotlib) is used to trace the contours.
 
 import sys
 import math
+import os
+from concurrent.futures import ThreadPoolExecutor
 
 from .. import qtall as qt
 import numpy as N
@@ -50,6 +52,88 @@ def finitePoly(poly):
         out.append( line[validrows] )
     return out
 
+# use threads if number of grid points times number of traces is larger
+_threadminwork = 1000000
+
+def traceContours(xpts, ypts, zpts, mask, levels, maxthreads=None):
+    """Trace contours on a grid.
+
+    levels is a list of single levels, for contour lines, or
+    (lower, upper) tuples, for the polygons between the levels.
+
+    Levels outside the range of the data are skipped. For large grids
+    the levels are split between threads, each with its own tracer.
+
+    Returns a list of lists of curves for each item in levels.
+    """
+
+    out = [[] for l in levels]
+
+    finitez = zpts[N.logical_not(mask)]
+    if finitez.size == 0:
+        return out
+    zmin, zmax = finitez.min(), finitez.max()
+
+    # levels which could have contours
+    todo = []
+    for i, level in enumerate(levels):
+        if isinstance(level, tuple):
+            if max(level) >= zmin and min(level) <= zmax:
+                todo.append((i, level))
+        elif zmin <= level <= zmax:
+            todo.append((i, (level,)))
+    if not todo:
+        return out
+
+    if maxthreads is None:
+        maxthreads = os.cpu_count() or 1
+    if zpts.size*len(todo) < _threadminwork:
+        maxthreads = 1
+    numthreads = max(min(maxthreads, len(todo)), 1)
+
+    # tracer converts mask to bytes, so avoid it doing this each time
+    mask = N.ascontiguousarray(mask, dtype=N.int8)
+
+    def traceChunk(chunk):
+        c = Cntr(xpts, ypts, zpts, mask)
+        for i, level in chunk:
+            out[i] = finitePoly(c.trace(*level))
+
+    # interleave levels between threads to balance work
+    chunks = [todo[i::numthreads] for i in range(numthreads)]
+    if numthreads == 1:
+        traceChunk(chunks[0])
+    else:
+        with ThreadPoolExecutor(max_workers=numthreads) as executor:
+            for result in executor.map(traceChunk, chunks):
+                pass
+
+    return out
+
+def traceTriContours(contourer, levels):
+    """Trace contours on triangulated points.
+
+    contourer is a utils.TriContourer for the values. levels is as
+    for traceContours.
+
+    Returns a list of lists of curves for each item in levels.
+    """
+
+    out = []
+    zmin = contourer.zmin.min() if len(contourer.zmin) > 0 else N.inf
+    zmax = contourer.zmax.max() if len(contourer.zmax) > 0 else -N.inf
+    for level in levels:
+        if isinstance(level, tuple):
+            if max(level) >= zmin and min(level) <= zmax:
+                out.append( contourer.polygons(*level) )
+            else:
+                out.append( [] )
+        elif zmin <= level <= zmax:
+            out.append( contourer.lines(level) )
+        else:
+            out.append( [] )
+    return out
+
 class ContourLineLabeller(LineLabeller):
     def __init__(self, clip, rot, painter, font, doc):
         LineLabeller.__init__(self, clip, rot)
@@ -183,47 +267,65 @@ class Contour(plotters.GenericPlotter):
         """Construct list of settings."""
         plotters.GenericPlotter.addSettings(s)
 
+        s.add( setting.BoolSwitch(
+            'scattered', False,
+            descr=_('Contour scattered x, y, z points rather than a 2D dataset'),
+            usertext=_('Scattered points'),
+            settingstrue=('xData', 'yData', 'zData'),
+            settingsfalse=('data',)), 0 )
         s.add( setting.DatasetExtended(
             'data', '',
             dimensions=2,
             descr=_('Dataset to plot'),
-            usertext=_('Dataset')), 0 )
+            usertext=_('Dataset')), 1 )
+        s.add( setting.DatasetExtended(
+            'xData', '',
+            descr=_('X coordinates of scattered points'),
+            usertext=_('X data')), 2 )
+        s.add( setting.DatasetExtended(
+            'yData', '',
+            descr=_('Y coordinates of scattered points'),
+            usertext=_('Y data')), 3 )
+        s.add( setting.DatasetExtended(
+            'zData', '',
+            descr=_('Values at scattered points'),
+            usertext=_('Z data')), 4 )
         s.add( setting.FloatOrAuto(
             'min', 'Auto',
             descr=_('Minimum value of contour scale'),
-            usertext=_('Min. value')), 1 )
+            usertext=_('Min. value')), 5 )
         s.add( setting.FloatOrAuto(
             'max', 'Auto',
             descr=_('Maximum value of contour scale'),
-            usertext=_('Max. value')), 2 )
+            usertext=_('Max. value')), 6 )
         s.add( setting.Int(
             'numLevels', 5,
             minval=1,
             descr=_('Number of contour levels to plot'),
-            usertext=_('Number levels')), 3 )
+            usertext=_('Number levels')), 7 )
         s.add( setting.Choice(
             'scaling',
             ['linear', 'sqrt', 'log', 'squared', 'manual'],
             'linear',
             descr=_('Scaling between contour levels'),
-            usertext=_('Scaling')), 4 )
+            usertext=_('Scaling')), 8 )
         s.add( setting.FloatList(
             'manualLevels',
             [],
             descr=_('Levels to use for manual scaling'),
-            usertext=_('Manual levels')), 5 )
+            usertext=_('Manual levels')), 9 )
 
         s.add( setting.Bool(
             'keyLevels',
             False,
             descr=_('Show levels in key'),
-            usertext=_('Levels in key')), 6 )
+            usertext=_('Levels in key')), 10 )
 
         s.add( setting.FloatList(
             'levelsOut',
             [],
             descr=_('Levels used in the plot'),
-            usertext=_('Output levels')), 7, readonly=True )
+            usertext=_('Output levels')), 11, readonly=True )
 
         s.add( ContourLabel(
             'ContourLabels',
@@ -259,7 +361,10 @@ class Contour(plotters.GenericPlotter):
         """User friendly description."""
         s = self.settings
         out = []
-        if s.data:
+        if s.scattered:
+            if s.zData:
+                out.append( str(s.zData) )
+        elif s.data:
             out.append( s.data )
         if s.scaling == 'manual':
             out.append('manual levels (%s)' %  (
@@ -268,6 +373,27 @@ class Contour(plotters.GenericPlotter):
             out.append('%(numLevels)i %(scaling)s levels (%(min)s to %(max)s)' % s)
         return ', '.join(out)
 
+    def getScatteredData(self):
+        """Get scattered points to contour.
+
+        Returns (x, y, z, versions), where versions is a tuple of
+        the dataset versions, or None if the data are not valid.
+        """
+
+        s = self.settings
+        d = self.document
+
+        dsets = [ s.get(n).getData(d) for n in ('xData', 'yData', 'zData') ]
+        if any(ds is None for ds in dsets):
+            return None
+        length = min( len(ds.data) for ds in dsets )
+        if length < 3:
+            return None
+
+        return (
+            dsets[0].data[:length], dsets[1].data[:length],
+            dsets[2].data[:length], tuple(ds.version for ds in dsets) )
+
     def calculateLevels(self):
         """Calculate contour levels from data and settings.
 
@@ -280,11 +406,18 @@ class Contour(plotters.GenericPlotter):
 
         minval, maxval = 0., 1.
         # scan data
-        data = s.get('data').getData(d)
-        if data is None or data.dimensions != 2 or data.data.size == 0:
-            return
+        if s.scattered:
+            scattered = self.getScatteredData()
+            if scattered is None:
+                return
+            zvals = scattered[2]
+        else:
+            data = s.get('data').getData(d)
+            if data is None or data.dimensions != 2 or data.data.size == 0:
+                return
+            zvals = data.data
 
-        minval, maxval = N.nanmin(data.data), N.nanmax(data.data)
+        minval, maxval = N.nanmin(zvals), N.nanmax(zvals)
         if not N.isfinite(minval):
             minval = 0.
         if not N.isfinite(maxval):
@@ -382,12 +515,24 @@ class Contour(plotters.GenericPlotter):
         s = self.settings
         d = self.document
 
-        # return if no data or if the dataset isn't two dimensional
-        data = s.get('data').getData(d)
-        if data is None or data.dimensions != 2 or data.data.size == 0:
-            return
+        if s.scattered:
+            scattered = self.getScatteredData()
+            if scattered is None:
+                return
+            ranges = []
+            for vals in scattered[:2]:
+                vals = vals[N.isfinite(vals)]
+                if len(vals) == 0:
+                    return
+                ranges.append( (vals.min(), vals.max()) )
+            xr, yr = ranges
+        else:
+            # return if no data or if the dataset isn't two dimensional
+            data = s.get('data').getData(d)
+            if data is None or data.dimensions != 2 or data.data.size == 0:
+                return
+            xr, yr = data.getDataRanges()
 
-        xr, yr = data.getDataRanges()
         if depname == 'sx':
             axrange[0] = min( axrange[0], xr[0] )
             axrange[1] = max( axrange[1], xr[1] )
@@ -430,20 +575,29 @@ class Contour(plotters.GenericPlotter):
         d = self.document
 
         # return if no data or if the dataset isn't two dimensional
-        data = s.get('data').getData(d)
-        if data is None or data.dimensions != 2 or data.data.size == 0:
+        dataversion = None
+        if s.scattered:
+            scattered = self.getScatteredData()
+            if scattered is not None:
+                dataversion = scattered[3]
+        else:
+            data = s.get('data').getData(d)
+            if data is not None and data.dimensions == 2 and data.data.size != 0:
+                dataversion = data.version
+
+        if dataversion is None:
             self.contsettings = None
             s.levelsOut = []
             return False
 
-        hashval = hash(bytes(data.data))
         contsettings = (
             s.min, s.max, s.numLevels, s.scaling,
             s.SubLines.numLevels,
             len(s.Fills.fills) == 0 or s.Fills.hide,
             len(s.SubLines.lines) == 0 or s.SubLines.hide,
             tuple(s.manualLevels),
-            hashval
+            s.scattered,
+            dataversion
         )
 
         if contsettings != self.contsettings:
@@ -467,17 +621,63 @@ class Contour(plotters.GenericPlotter):
         """Update calculated contours."""
 
         s = self.settings
-        d = self.document
 
         minval, maxval, levels = self.calculateLevels()
         sublevels = self.calculateSubLevels(minval, maxval, levels)
 
+        # iterate over the levels and trace the contours
+        self._cachedcontours = None
+        self._cachedpolygons = None
+        self._cachedsubcontours = None
+
+        # collect all the levels to trace them together
+        tracelevels = []
+
+        # the contour levels
+        dolines = len(s.Lines.lines) != 0
+        if dolines:
+            tracelevels += list(levels)
+
+        # the polygons between the contours
+        dofills = (
+            len(s.Fills.fills) != 0 and len(levels) > 1 and
+            not s.Fills.hide )
+        if dofills:
+            tracelevels += list(zip(levels[:-1], levels[1:]))
+
+        # sub-levels
+        if len(sublevels) > 0:
+            tracelevels += list(sublevels)
+
+        if s.scattered:
+            traced = self.traceScattered(tracelevels)
+        else:
+            traced = self.traceGrid(tracelevels)
+        if traced is None:
+            return
+
+        if dolines:
+            self._cachedcontours = traced[:len(levels)]
+            traced = traced[len(levels):]
+        if dofills:
+            self._cachedpolygons = traced[:len(levels)-1]
+            traced = traced[len(levels)-1:]
+        if len(sublevels) > 0:
+            self._cachedsubcontours = traced
+
+    def traceGrid(self, levels):
+        """Trace levels on the 2D dataset (see traceContours)."""
+
+        s = self.settings
+        d = self.document
+
         # find coordinates of image coordinate bounds
         data = s.get('data').getData(d)
         if data is None or data.dimensions != 2 or data.data.size == 0:
-            return
+            return None
+        if Cntr is None:
+            return None
 
-        rangex, rangey = data.getDataRanges()
         yw, xw = data.data.shape
         xc, yc = data.getPixelCentres()
         xpts = N.reshape( N.tile(xc, yw), (yw, xw) )
@@ -486,34 +686,22 @@ class Contour(plotters.GenericPlotter):
         # only keep finite data points
         mask = N.logical_not(N.isfinite(data.data))
 
-        # iterate over the levels and trace the contours
-        self._cachedcontours = None
-        self._cachedpolygons = None
-        self._cachedsubcontours = None
+        return traceContours(xpts, ypts, data.data, mask, levels)
+
+    def traceScattered(self, levels):
+        """Trace levels on the triangulated scattered points (see
+        traceContours)."""
+
+        scattered = self.getScatteredData()
+        if scattered is None:
+            return None
+        xvals, yvals, zvals, versions = scattered
 
-        if Cntr is not None:
-            c = Cntr(xpts, ypts, data.data, mask)
-
-            # trace the contour levels
-            if len(s.Lines.lines) != 0:
-                self._cachedcontours = []
-                for level in levels:
-                    linelist = c.trace(level)
-                    self._cachedcontours.append( finitePoly(linelist) )
-
-            # trace the polygons between the contours
-            if len(s.Fills.fills) != 0 and len(levels) > 1 and not s.Fills.hide:
-                self._cachedpolygons = []
-                for level1, level2 in zip(levels[:-1], levels[1:]):
-                    linelist = c.trace(level1, level2)
-                    self._cachedpolygons.append( finitePoly(linelist) )
-
-            # trace sub-levels
-            if len(sublevels) > 0:
-                self._cachedsubcontours = []
-                for level in sublevels:
-                    linelist = c.trace(level)
-                    self._cachedsubcontours.append( finitePoly(linelist) )
+        # the triangulation only depends on the coordinates
+        tri = utils.getTriangulation(
+            (versions[0], versions[1], len(xvals)),
+            lambda: (xvals, yvals))
+        return traceTriContours(tri.contourer(zvals), levels)
 
     def _plotContours(self, painter, posn, axes, linestyles,
                       contours, showlabels, hidelines, clip):
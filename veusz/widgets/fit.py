@@ -207,6 +207,11 @@ class Fit(FunctionPlotter):
         env.update( self.settings.values )
         return env
 
+    def environKey(self):
+        """Environment also depends on fit values."""
+        return ( FunctionPlotter.environKey(self),
+                 tuple(sorted(self.settings.values.items())) )
+
     def updateOutputLabel(self, ops, vals, chi2, dof):
         """Use best fit parameters to update text label."""
         s = self.settings
@@ -24,6 +24,7 @@ from .. import qtall as qt
 from .. import document
 from .. import setting
 from .. import utils
+from .. import datasets
 
 from . import pickable
 from .plotters import GenericPlotter
@@ -32,6 +33,46 @@ def _(text, disambiguation=None, context='Function'):
     """Translate text."""
     return qt.QCoreApplication.translate(context, text, disambiguation)
 
+# maximum distance in plotter coordinates of a point from the line
+# between its neighbours before the curve is refined around it
+_adapttolerance = 0.5
+# do not subdivide steps smaller than this in plotter coordinates
+_adaptminstep = 0.5
+# maximum number of extra function evaluations when refining
+_adaptmaxevals = 10000
+# number of arrays of function evaluations to remember
+_evalcachesize = 4
+
+def _refineFlags(ipts, dpts):
+    """Given independent and dependent plotter coordinates, return
+    boolean array for each step between the points, saying whether it
+    should be subdivided."""
+
+    refine = N.zeros(max(len(ipts)-1, 0), dtype=N.bool_)
+    if len(ipts) < 3:
+        return refine
+
+    u0, u1, u2 = ipts[:-2], ipts[1:-1], ipts[2:]
+    v0, v1, v2 = dpts[:-2], dpts[1:-1], dpts[2:]
+    with N.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        # perpendicular distance of middle point from line joining
+        # its neighbours
+        du, dv = u2-u0, v2-v0
+        dist = ( N.abs(du*(v1-v0) - dv*(u1-u0)) /
+                 N.sqrt(du**2 + dv**2) )
+        finite = N.isfinite(dpts)
+        f0, f1, f2 = finite[:-2], finite[1:-1], finite[2:]
+        allfinite = f0 & f1 & f2
+        # refine around points which deviate or where the function
+        # becomes undefined, to find the edge
+        bad = ( (allfinite & (dist > _adapttolerance)) |
+                (~allfinite & (f0 | f1 | f2)) )
+
+    # the steps either side of bad points are refined
+    refine[:-1] |= bad
+    refine[1:] |= bad
+    return refine
+
 class FunctionPlotter(GenericPlotter):
     """Function plotting class."""
 
@@ -50,6 +91,10 @@ class FunctionPlotter(GenericPlotter):
             minval = 3,
             descr = _('Number of steps to evaluate the function over'),
             usertext=_('Steps'), formatting=True), 0 )
+        s.add( setting.Bool(
+            'adaptive', False,
+            descr = _('Add extra steps where the function curves sharply'),
+            usertext=_('Adaptive steps'), formatting=True), 1 )
         s.add( setting.Choice(
             'variable', ['x', 'y'], 'x',
             descr=_('Variable the function is a function of'),
@@ -157,10 +202,8 @@ class FunctionPlotter(GenericPlotter):
             # delta is zero
             return
 
-        env = self.initEnviron()
-        env[s.variable] = points
         try:
-            vals = eval(compiled, env) + points*0.
+            vals = self.evalFunction(compiled, points)
         except:
             # something wrong in the evaluation
             return
@@ -271,6 +314,42 @@ class FunctionPlotter(GenericPlotter):
         """Set up function environment."""
         return self.document.evaluate.context.copy()
 
+    def environKey(self):
+        """Return a value which changes if the environment returned by
+        initEnviron, or what the function reads from the document,
+        changes."""
+        return datasets.expressionDependencies(
+            self.document, (self.settings.function,))
+
+    def evalFunction(self, compiled, vals):
+        """Evaluate the function at the 1D array of values vals.
+
+        The results for the last few arrays of values are remembered,
+        so that drawing, picking and range calculation at the same
+        values, with the same function and environment, only evaluate
+        the function once. Exceptions from the evaluation are not
+        caught.
+        """
+
+        s = self.settings
+        key = (
+            s.function, s.variable, self.environKey(),
+            vals.dtype.str, vals.tobytes())
+        cache = getattr(self, '_evalcache', [])
+        for i, (ckey, cresults) in enumerate(cache):
+            if ckey == key:
+                # move to end, as most recently used
+                cache.append(cache.pop(i))
+                return cresults.copy()
+
+        env = self.initEnviron()
+        env[s.variable] = vals
+        results = eval(compiled, env) + N.zeros(vals.shape)
+
+        cache.append((key, results.copy()))
+        self._evalcache = cache[-_evalcachesize:]
+        return results
+
     def getIndependentPoints(self, axes, posn):
         """Calculate the real and screen points to plot for the independent axis"""
 
@@ -325,10 +404,8 @@ class FunctionPlotter(GenericPlotter):
         axis2 = axes[1] if s.variable == 'x' else axes[0]
 
         # evaluate function
-        env = self.initEnviron()
-        env[s.variable] = axispts
         try:
-            results = eval(compiled, env) + N.zeros(axispts.shape)
+            results = self.evalFunction(compiled, axispts)
             resultpts = axis2.dataToPlotterCoords(posn, results)
         except Exception as e:
             self.logEvalError(e)
@@ -337,14 +414,54 @@ class FunctionPlotter(GenericPlotter):
 
         return results, resultpts
 
+    def refinePoints(self, axes, posn, ipts, pipts, dpts, pdpts):
+        """Add extra points where the function deviates from a
+        straight line on the plotter, until the curve is smooth or the
+        evaluation budget is used up."""
+
+        axis1 = axes[0] if self.settings.variable == 'x' else axes[1]
+        numevals = 0
+        while numevals < _adaptmaxevals:
+            refine = _refineFlags(pipts, pdpts)
+            refine &= N.abs(N.diff(pipts)) > _adaptminstep
+            idxs = N.nonzero(refine)[0][:_adaptmaxevals-numevals]
+            if len(idxs) == 0:
+                break
+
+            # evaluate function at the midpoints of the steps
+            newpipts = 0.5*(pipts[idxs] + pipts[idxs+1])
+            newipts = axis1.plotterToDataCoords(posn, newpipts)
+            newdpts, newpdpts = self.calcDependentPoints(newipts, axes, posn)
+            if newpdpts is None or newpdpts.shape != newpipts.shape:
+                break
+            numevals += len(idxs)
+
+            # insert new points after the start of each step
+            ipts = N.insert(ipts, idxs+1, newipts)
+            pipts = N.insert(pipts, idxs+1, newpipts)
+            dpts = N.insert(dpts, idxs+1, newdpts)
+            pdpts = N.insert(pdpts, idxs+1, newpdpts)
+
+        return ipts, pipts, dpts, pdpts
+
     def calcFunctionPoints(self, axes, posn):
+        """Return ((xpts, ypts), (pxpts, pypts)) for the function."""
+
+        s = self.settings
         ipts, pipts = self.getIndependentPoints(axes, posn)
         dpts, pdpts = self.calcDependentPoints(ipts, axes, posn)
 
-        if self.settings.variable == 'x':
-            return (ipts, dpts), (pipts, pdpts)
+        if ( s.adaptive and pdpts is not None and
+             pdpts.shape == pipts.shape ):
+            ipts, pipts, dpts, pdpts = self.refinePoints(
+                axes, posn, ipts, pipts, dpts, pdpts)
+
+        if s.variable == 'x':
+            retn = (ipts, dpts), (pipts, pdpts)
         else:
-            return (dpts, ipts), (pdpts, pipts)
+            retn = (dpts, ipts), (pdpts, pipts)
+
+        return retn
 
     def _pickable(self, posn):
         s = self.settings
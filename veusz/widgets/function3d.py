@@ -24,6 +24,7 @@ from .. import qtall as qt
 from .. import setting
 from .. import document
 from .. import utils
+from .. import datasets
 from ..helpers import threed
 
 from . import plotters3d
@@ -476,6 +477,15 @@ class Function3D(plotters3d.GenericPlotter3D):
 
         clipcontainer.addObject(line)
 
+    def objectKey(self, painter, axes):
+        """Include what the functions read from the document."""
+        s = self.settings
+        return (
+            plotters3d.GenericPlotter3D.objectKey(self, painter, axes),
+            datasets.expressionDependencies(
+                self.document, (s.fnx, s.fny, s.fnz, s.fncolor)),
+        )
+
     def dataDrawToObject(self, painter, axes):
         """Do actual drawing of function."""
 
@@ -66,7 +66,7 @@ def _calcerrs(data, errmode):
     else:
         raise RuntimeError('Unknown error mode')
 
-def _specialbin(mode, data, edges):
+def _specialbin(mode, hdata, edges):
     """Special binning modes."""
     func = {
         'stddev': N.std,
@@ -77,11 +77,8 @@ def _specialbin(mode, data, edges):
         'max': N.amax,
     }[mode]
 
-    data = data[N.isfinite(data)]
-    idxs = N.searchsorted(edges, data)-1
     out = N.empty(len(edges)-1)
-    for i in range(len(edges)-1):
-        dbin = data[idxs==i]
+    for i, dbin in enumerate(hdata.binValues(edges)):
         if len(dbin)==0:
             out[i] = N.nan
         else:
@@ -92,7 +89,14 @@ def doBinning(data, weights=None,
               scaling='linear', minval='Auto', maxval='Auto',
               mode='constant', numbins=10, manualbins=None,
               calcmode='counts', errormode='gehrels',
+              key=None,
 ):
+    """Bin data, returning (hist, perr, nerr, edges).
+
+    If key is given, this should identify the data and weights
+    (e.g. using their versions), so that sorted data can be reused
+    when the binning is changed.
+    """
 
     if weights:
         minlen = min(len(weights), len(data))
@@ -102,15 +106,22 @@ def doBinning(data, weights=None,
     # scale data according to function
     sfwd = scaling_fwd[scaling]
     sbkd = scaling_bkd[scaling]
-    sdata = sfwd(data)
+
+    def getdata():
+        return sfwd(data), weights
+
+    if key is None:
+        hdata = utils.HistogramData(*getdata())
+    else:
+        hdata = utils.getHistogramData((key, scaling), getdata)
 
     if minval=='Auto' or minval is None:
-        minval = N.nanmin(sdata)
+        minval = hdata.minval
     else:
         minval = sfwd(minval)
 
     if maxval=='Auto' or maxval is None:
-        maxval = N.nanmax(sdata)
+        maxval = hdata.maxval
     else:
         maxval = sfwd(maxval)
 
@@ -118,9 +129,6 @@ def doBinning(data, weights=None,
         # problem with scaling or values
         return
 
-    # non finite bins should be included in fractions, etc.
-    sdata[~N.isfinite(sdata)] = N.inf
-
     if mode == 'constant':
         bins = numbins
     elif mode == 'manual':
@@ -132,12 +140,9 @@ def doBinning(data, weights=None,
     else:
         bins = mode
 
-    hist, edges = N.histogram(
-        sdata,
-        weights=weights,
-        range=(minval, maxval),
-        bins=bins
-    )
+    # non finite values are not included in bins
+    edges = hdata.binEdges(bins, range=(minval, maxval))
+    hist = hdata.counts(edges)
 
     # scale edges back after transformation
     sedges = sbkd(edges)
@@ -150,7 +155,7 @@ def doBinning(data, weights=None,
     # special calculation modes
     perr = nerr = None
     if calcmode in {'stddev', 'variance', 'mean', 'median', 'min', 'max'}:
-        hist = _specialbin(calcmode, sdata, edges)
+        hist = _specialbin(calcmode, hdata, edges)
     elif calcmode in {
             'counts', 'fraction', 'density', 'density_scaled',
             'counts-cumulative', 'counts-cumulative-reverse',
@@ -169,7 +174,7 @@ def doBinning(data, weights=None,
 
     if calcmode in {
             'fraction', 'fraction-cumulative', 'fraction-cumulative-reverse'}:
-        invcts = 1/len(data)
+        invcts = 1/hdata.numtotal
         hist = hist * invcts
         if perr is not None:
             perr *= invcts
@@ -404,12 +409,16 @@ class Histo(GenericPlotter):
         if not weights:
             weights = None
 
+        # allows sorted data to be reused if only binning changes
+        key = (ds.version, None if weights is None else weights.version)
+
         retn = doBinning(
             data, weights=weights,
             scaling=s.scaling, minval=s.minval, maxval=s.maxval,
             mode=s.binning, numbins=s.numbins,
             manualbins=s.manual,
-            calcmode=s.calcmode, errormode=s.errormode)
+            calcmode=s.calcmode, errormode=s.errormode,
+            key=key)
         if retn is None:
             return
 
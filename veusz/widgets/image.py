@@ -31,62 +31,6 @@ def _(text, disambiguation=None, context='Image'):
     """Translate text."""
     return qt.QCoreApplication.translate(context, text, disambiguation)
 
-def cropLinearImageToBox(image, pltx, plty, posn):
-    """Given a plotting range pltx[0]->pltx[1], plty[0]->plty[1] and
-    plotting bounds posn, return an image which is cropped to posn.
-
-    Returns:
-     - updated pltx range
-     - updated plty range
-     - cropped image
-    """
-
-    x1, y1, x2, y2 = posn
-    pltx1, pltx2 = pltx
-    pltw = pltx2-pltx1
-    plty2, plty1 = plty
-    plth = plty2-plty1
-
-    imw = image.width()
-    imh = image.height()
-    pixw = pltw / imw
-    pixh = plth / imh
-    cutr = [0, 0, imw-1, imh-1]
-
-    # work out where image intercepts posn, and make sure image
-    # fills at least that area
-
-    # need to chop left
-    if pltx1 < x1:
-        d = int((x1-pltx1) / pixw)
-        cutr[0] += d
-        pltx[0] += d*pixw
-
-    # need to chop right
-    if pltx2 > x2:
-        d = max(0, int((pltx2-x2) / pixw) - 1)
-        cutr[2] -= d
-        pltx[1] -= d*pixw
-
-    # chop top
-    if plty1 < y1:
-        d = int((y1-plty1) / pixh)
-        cutr[1] += d
-        plty[1] += d*pixh
-
-    # chop bottom
-    if plty2 > y2:
-        d = max(0, int((plty2-y2) / pixh) - 1)
-        cutr[3] -= d
-        plty[0] -= d*pixh
-
-    # create chopped-down image
-    newimage = image.copy(
-        cutr[0], cutr[1], cutr[2]-cutr[0]+1, cutr[3]-cutr[1]+1)
-
-    # return new image coordinates and image
-    return pltx, plty, newimage
-
 def cropGridImageToBox(image, gridx, gridy, posn):
     """Given an image, pixel coordinates and box, crop image to box."""
 
@@ -232,16 +176,23 @@ class Image(plotters.GenericPlotter):
         """Update data range from data."""
 
         s = self.settings
+        datarange = None
+        if ( (s.min == 'Auto' or s.max == 'Auto') and
+             data is not None and len(data.data) != 0 ):
+            # the pyramid remembers the range of the data
+            datarange = utils.getImagePyramid(
+                data.version, lambda: data.data).valueRange()
+
         minval = s.min
         if minval == 'Auto':
-            if data is not None and len(data.data) != 0:
-                minval = N.nanmin(data.data)
+            if datarange is not None:
+                minval = datarange[0]
             else:
                 minval = 0.
         maxval = s.max
         if maxval == 'Auto':
-            if data is not None and len(data.data) != 0:
-                maxval = N.nanmax(data.data)
+            if datarange is not None:
+                maxval = datarange[1]
             else:
                 maxval = minval + 1
 
@@ -289,6 +240,84 @@ class Image(plotters.GenericPlotter):
             s.colorInvert,
         )
 
+    def cropLinearData(self, painter, data, transds, pltrangex, pltrangey,
+                       posn):
+        """Get the part of a linear image (and its transparency data)
+        which is visible within posn.
+
+        If the image has a higher resolution than the output, a
+        reduced resolution copy is used, unless drawing rectangles.
+
+        Returns:
+         - updated pltx range
+         - updated plty range
+         - cropped data
+         - cropped transparency data (or None)
+         - tuple identifying the part of the image and its resolution
+        or None if the image is not visible.
+        """
+
+        imgdata = data.data
+        transdata = None if transds is None else transds.data
+        ny, nx = imgdata.shape
+        if nx == 0 or ny == 0:
+            return None
+
+        def visibleRange(pltrange, num, p1, p2):
+            """Return range of pixel indices visible between p1 and p2,
+            and pixel size."""
+            pix = (pltrange[1]-pltrange[0]) / num
+            a = (p1-pltrange[0]) / pix
+            b = (p2-pltrange[0]) / pix
+            lo = max(int(N.floor(min(a, b))), 0)
+            hi = min(int(N.ceil(max(a, b))), num)
+            return lo, hi, pix
+
+        x0, x1, pixw = visibleRange(pltrangex, nx, posn[0], posn[2])
+        y0, y1, pixh = visibleRange(pltrangey, ny, posn[1], posn[3])
+        if x0 >= x1 or y0 >= y1:
+            return None
+
+        if transdata is not None and transdata.shape != imgdata.shape:
+            # no sensible way to crop data and transparency together
+            return pltrangex, pltrangey, imgdata, transdata, None
+
+        # choose reduced resolution level, where output pixels are
+        # no larger than the pixels of that level
+        level = 0
+        if self.settings.drawMode != 'rectangles':
+            scale = getattr(painter, 'scaling', 1)
+            ratio = 1 / (max(abs(pixw), abs(pixh)) * scale)
+            if ratio >= 2:
+                level = int(N.log2(ratio))
+
+        if level > 0:
+            pyramid = utils.getImagePyramid(data.version, lambda: data.data)
+            imgdata = pyramid.level(level)
+            level = min(level, len(pyramid.levels)-1)
+            if transdata is not None:
+                transdata = utils.getImagePyramid(
+                    transds.version, lambda: transds.data).level(level)
+
+        # convert pixel ranges to those at this level
+        f = 2**level
+        lx0, lx1 = x0//f, min(-(-x1//f), imgdata.shape[1])
+        ly0, ly1 = y0//f, min(-(-y1//f), imgdata.shape[0])
+
+        imgdata = imgdata[ly0:ly1, lx0:lx1]
+        if transdata is not None:
+            transdata = transdata[ly0:ly1, lx0:lx1]
+
+        # each pixel in a reduced level covers f original pixels, so
+        # the last may extend beyond the image (by less than an
+        # output pixel), as its block is padded
+        pltx = N.array([
+            pltrangex[0] + lx0*f*pixw, pltrangex[0] + lx1*f*pixw])
+        plty = N.array([
+            pltrangey[0] + ly0*f*pixh, pltrangey[0] + ly1*f*pixh])
+
+        return pltx, plty, imgdata, transdata, (level, ly0, ly1, lx0, lx1)
+
     def drawNonlinearImage(self, painter, axes, posn, data, image):
         """Draw an image where the image data are non-linear, or the
         axes are non-linear."""
@@ -356,9 +385,7 @@ class Image(plotters.GenericPlotter):
         if s.hide or data is None or data.dimensions != 2:
             return
 
-        transimg = s.get('transparencyData').getData(d)
-        if transimg is not None:
-            transimg = transimg.data
+        transds = s.get('transparencyData').getData(d)
 
         rangex, rangey = data.getDataRanges()
         pltrangex = axes[0].dataToPlotterCoords(posn, N.array(rangex))
@@ -369,35 +396,44 @@ class Image(plotters.GenericPlotter):
            abs(pltrangey[0]-pltrangey[1])<1e-2):
             return
 
-        # make QImage from data
         cmap = d.evaluate.getColormap(s.colorMap, s.colorInvert)
         datavaluerange = self.getDataValueRange(data)
-        image = utils.applyColorMap(
-            cmap,
-            s.colorScaling,
-            data.data,
-            datavaluerange[0], datavaluerange[1],
-            s.transparency, transimg=transimg,
-        )
 
-        drawmode = s.drawMode
+        def makeImage(imgdata, transimg, region):
+            """Make QImage from data, reusing a previous image if the
+            datasets and the region of them are unchanged."""
+            return utils.applyColorMap(
+                cmap,
+                s.colorScaling,
+                imgdata,
+                datavaluerange[0], datavaluerange[1],
+                s.transparency, transimg=transimg,
+                cachekey=(
+                    'image', data.version,
+                    None if transds is None else transds.version,
+                    region),
+            )
 
         # if data are non linear, or axes are non linear in pixel
         # mode, switch to non linear drawing
         if not data.isLinearImage() or ((
                 not axes[0].isLinear() or not axes[1].isLinear()) and
                 s.mapping == 'pixels'):
+            image = makeImage(
+                data.data, None if transds is None else transds.data, None)
             self.drawNonlinearImage(painter, axes, posn, data, image)
             return
 
         # linearly spaced grid
 
-        # avoid drawing pixels outside of axis range
-        if ( pltrangex[0]<posn[0] or pltrangex[1]>posn[2] or
-             pltrangey[0]<posn[1] or pltrangey[1]>posn[3] ):
-            # need to crop image
-            pltrangex, pltrangey, image = cropLinearImageToBox(
-                image, pltrangex, pltrangey, posn)
+        # avoid colormapping pixels outside of axis range, or more
+        # pixels than can be shown
+        cropped = self.cropLinearData(
+            painter, data, transds, pltrangex, pltrangey, posn)
+        if cropped is None:
+            return
+        pltrangex, pltrangey, imgdata, transimg, region = cropped
+        image = makeImage(imgdata, transimg, region)
 
         # invert output drawing if axes go from positive->negative
         # we only translate the coordinate system if this is the case
@@ -153,7 +153,7 @@ class NonOrthPoint(Widget):
         return p.pickIndex(oldindex, direction, bounds)
 
     def drawLabels(self, painter, xplotter, yplotter,
-                   textvals, markersize):
+                   textvals, markersize, cliprect=None):
         """Draw labels for the points.
 
         This is copied from the xy (point) widget class, so it
@@ -177,12 +177,11 @@ class NonOrthPoint(Widget):
         font = lab.makeQFont(painter)
         angle = lab.angle
 
-        # iterate over each point and plot each label
-        for x, y, t in zip(xplotter+deltax, yplotter+deltay, textvals):
-            utils.Renderer(
-                painter, font, x, y, t,
-                alignhorz, alignvert, angle,
-                doc=self.document).render()
+        # plot the labels, laying out each distinct label once
+        utils.renderLabels(
+            painter, font, xplotter+deltax, yplotter+deltay, textvals,
+            alignhorz=alignhorz, alignvert=alignvert, angle=angle,
+            clip=cliprect, doc=self.document)
 
     def getColorbarParameters(self):
         """Return parameters for colorbar."""
@@ -224,8 +223,9 @@ class NonOrthPoint(Widget):
             self.parent.setClip(painter, posn)
 
             # split parts separated by NaNs
-            for v1, v2, scalings, cvals, textitems in datasets.generateValidDatasetParts(
-                [d1, d2, dscale, colorpoints, text]):
+            for partnum, (v1, v2, scalings, cvals, textitems) in enumerate(
+                    datasets.generateValidDatasetParts(
+                        [d1, d2, dscale, colorpoints, text])):
                 # convert data (chopping down length)
                 v1d, v2d = v1.data, v2.data
                 minlen = min(v1d.shape[0], v2d.shape[0])
@@ -250,7 +250,7 @@ class NonOrthPoint(Widget):
                 # plot markers
                 markersize = s.get('markerSize').convert(painter)
                 if not s.MarkerLine.hide or not s.MarkerFill.hide:
-                    pscale = colorvals = cmap = None
+                    pscale = colorvals = cmap = colorkey = None
 
                     if scalings:
                         pscale = scalings.data
@@ -263,6 +263,12 @@ class NonOrthPoint(Widget):
                             s.Color.min, s.Color.max)
                         cmap = self.document.evaluate.getColormap(
                             cmapname, s.MarkerFill.colorMapInvert)
+                        # parts depend on the validity of all the datasets
+                        colorkey = (
+                            d1.version, d2.version,
+                            None if dscale is None else dscale.version,
+                            colorpoints.version, partnum,
+                            s.Color.scaling, s.Color.min, s.Color.max)
 
                     painter.setBrush(s.MarkerFill.makeQBrushWHide(painter))
                     painter.setPen(s.MarkerLine.makeQPenWHide(painter))
@@ -271,11 +277,14 @@ class NonOrthPoint(Widget):
                         painter, px, py, s.marker, markersize,
                         scaling=pscale, clip=cliprect,
                         cmap=cmap, colorvals=colorvals,
-                        scaleline=s.MarkerLine.scaleLine)
+                        scaleline=s.MarkerLine.scaleLine,
+                        colorkey=colorkey)
 
                 # finally plot any labels
                 if textitems and not s.Label.hide:
-                    self.drawLabels(painter, px, py, textitems, markersize)
+                    self.drawLabels(
+                        painter, px, py, textitems, markersize,
+                        cliprect=cliprect)
 
 # allow the factory to instantiate plotter
 document.thefactory.register(NonOrthPoint)
@@ -28,6 +28,26 @@ def _(text, disambiguation=None, context='Plotters3D'):
     """Translate text."""
     return qt.QCoreApplication.translate(context, text, disambiguation)
 
+def _settingsKey(settings, doc):
+    """Return a value which changes if the values of settings (or
+    the datasets they refer to) change."""
+
+    key = []
+    for st in settings.getSettingList():
+        val = st.val
+        key.append(repr(val))
+        if isinstance(st, setting.DatasetOrStr):
+            ds = doc.data.get(val)
+            key.append(ds.version if ds is not None else None)
+        elif isinstance(st, setting.Datasets):
+            key.append(tuple(ds.version for ds in st.getData(doc)))
+        elif isinstance(st, setting.Dataset) and isinstance(val, str):
+            ds = st.getData(doc)
+            key.append(ds.version if ds is not None else None)
+    for sub in settings.getSettingsList():
+        key.append(_settingsKey(sub, doc))
+    return tuple(key)
+
 class GenericPlotter3D(widget.Widget):
     """Generic plotter."""
 
@@ -173,6 +193,25 @@ class GenericPlotter3D(widget.Widget):
                 axes[1].settings.upperPosition,
                 axes[2].settings.upperPosition))
 
+    def objectKey(self, painter, axes):
+        """Return a value which changes if the object made by
+        dataDrawToObject could change."""
+
+        doc = self.document
+        axeskey = []
+        for axis in axes:
+            axis.computePlottedRange()
+            axeskey.append((
+                _settingsKey(axis.settings, doc), tuple(axis.plottedrange)))
+
+        return (
+            _settingsKey(self.settings, doc),
+            tuple(axeskey),
+            painter.scaling, painter.pixperpt, painter.dpi,
+            doc.evaluate.changeset, doc.evaluate.colors.colortheme,
+            self.autoColor(painter),
+        )
+
     def drawToObject(self, painter, painthelper):
         # exit if hidden or function blank
         if self.settings.hide:
@@ -182,8 +221,26 @@ class GenericPlotter3D(widget.Widget):
         axes = self.fetchAxes()
         if not axes:
             return
-        else:
-            return self.dataDrawToObject(painter, axes)
+
+        # only remake the object if something has changed (e.g. not
+        # if only the scene is rotated)
+        key = self.objectKey(painter, axes)
+        cache = getattr(self, '_objectcache', None)
+        if cache is None or cache[0] != key:
+            cache = self._objectcache = (
+                key, self.dataDrawToObject(painter, axes))
+        if cache[1] is None:
+            return
+
+        # the cached object is kept here, so is shared with a new
+        # container, which can be owned by the caller
+        cont = threed.ObjectContainer()
+        cont.addSharedObject(cache[1])
+        # the container also keeps a reference, so the object is not
+        # deleted while the container is used (e.g. by a scene kept
+        # for picking), even if the cache is replaced
+        cont.sharedobject = cache[1]
+        return cont
 
     def dataDrawToObject(self, painter, axes):
         """Actually plot the data."""
@@ -782,7 +782,7 @@ class PointPlotter(GenericPlotter):
         painter.restore()
 
     def drawLabels(self, painter, xplotter, yplotter,
-                   textvals, markersize):
+                   textvals, markersize, cliprect=None):
         """Draw labels for the points."""
 
         s = self.settings
@@ -800,12 +800,11 @@ class PointPlotter(GenericPlotter):
         font = lab.makeQFont(painter)
         angle = lab.angle
 
-        # iterate over each point and plot each label
-        for x, y, t in zip(xplotter+deltax, yplotter+deltay, textvals):
-            utils.Renderer(
-                painter, font, x, y, t,
-                alignhorz, alignvert, angle,
-                doc=self.document).render()
+        # plot the labels, laying out each distinct label once
+        utils.renderLabels(
+            painter, font, xplotter+deltax, yplotter+deltay, textvals,
+            alignhorz=alignhorz, alignvert=alignvert, angle=angle,
+            clip=cliprect, doc=self.document)
 
     def getAxisLabels(self, direction):
         """Get labels for axis if using a label axis."""
@@ -891,7 +890,7 @@ class PointPlotter(GenericPlotter):
             text = text*(length // len(text)) + text[:length % len(text)]
 
         # loop over chopped up values
-        for xvals, yvals, tvals, ptvals, cvals in (
+        for partnum, (xvals, yvals, tvals, ptvals, cvals) in enumerate(
             datasets.generateValidDatasetParts(
                 [xv, yv, text, scalepoints, colorpoints])):
 
@@ -975,6 +974,7 @@ class PointPlotter(GenericPlotter):
 
                 # color point individually
                 cmapname = s.MarkerFill.colorMap
+                colorkey = None
                 if cvals and not s.MarkerFill.hide and cmapname != 'none':
                     colorvals = utils.applyScaling(
                         cvals.data, s.Color.scaling,
@@ -983,6 +983,13 @@ class PointPlotter(GenericPlotter):
                         colorvals = colorvals[::s.thinfactor]
                     cmap = self.document.evaluate.getColormap(
                         cmapname, s.MarkerFill.colorMapInvert)
+                    # parts depend on the validity of all the datasets
+                    colorkey = (
+                        xv.version, yv.version,
+                        None if scalepoints is None else scalepoints.version,
+                        colorpoints.version, partnum,
+                        s.Color.scaling, s.Color.min, s.Color.max,
+                        s.thinfactor)
 
                 # actually plot datapoints
                 utils.plotMarkers(
@@ -991,13 +998,14 @@ class PointPlotter(GenericPlotter):
                     cmap=cmap, colorvals=colorvals,
                     scaleline=s.MarkerLine.scaleLine,
                     equalarea=s.MarkerFill.newMarkerSizes,
+                    colorkey=colorkey,
                 )
 
             # finally plot any labels
             if tvals and not s.Label.hide:
                 self.drawLabels(
                     painter, xpltpoint, ypltpoint,
-                    tvals, markersize)
+                    tvals, markersize, cliprect=cliprect)
 
 # allow the factory to instantiate an x,y plotter
 document.thefactory.register(PointPlotter)
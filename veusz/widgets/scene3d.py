@@ -91,12 +91,26 @@ class Scene3D(widget.Widget):
 
         s.add( setting.Choice(
             'rendermode',
-            ('painters', 'bsp'),
+            ('painters', 'bsp', 'zbuffer'),
             'painters',
             uilist=("Fast (Painter's)",
-                    "Accurate (BSP)"),
+                    "Accurate (BSP)",
+                    "Bitmap for large plots (Z-buffer)"),
             usertext=_('Render method'),
             descr=_('Method used to draw 3D plot') ))
+        s.add( setting.Int(
+            'supersample',
+            2,
+            minval=1, maxval=4,
+            descr=_('Samples along each axis per pixel (antialiasing), '
+                    'for Z-buffer render method'),
+            usertext=_('Supersampling') ))
+        s.add( setting.IntOrAuto(
+            'threads',
+            'Auto',
+            descr=_('Maximum number of threads used to draw 3D plot '
+                    '(Auto for the number of processors)'),
+            usertext=_('Render threads') ))
 
         s.add( setting.Distance(
             'leftMargin',
@@ -195,8 +209,11 @@ class Scene3D(widget.Widget):
         mode = {
             'painters': threed.Scene.RENDER_PAINTERS,
             'bsp': threed.Scene.RENDER_BSP,
+            'zbuffer': threed.Scene.RENDER_ZBUFFER,
         }[s.rendermode]
         scene = threed.Scene(mode)
+        scene.setNumThreads(0 if s.threads == 'Auto' else max(s.threads, 1))
+        scene.setSupersample(s.supersample)
 
         # add lighting if enabled
         for light in s.Lighting1, s.Lighting2, s.Lighting3:
@@ -242,6 +259,11 @@ class Scene3D(widget.Widget):
                 painter, camera,
                 bounds[0], bounds[1], bounds[2], bounds[3], scale)
 
+        # keep the rendered scene and the root object (which keeps the
+        # objects the scene refers to alive), so that clicks can be
+        # identified without rendering again
+        painthelper.setPickData(self, (scene, root))
+
         #     painter.setPen(qt.QPen(qt.Qt.red))
         #     origin = ptToScreen((0,0,0))[1]
         #     for axpt in ((0.5,0,0),(0,0.5,0),(0,0,0.5)):
@@ -254,18 +276,23 @@ class Scene3D(widget.Widget):
         painter = document.PainterRoot()
         painter.updateMetaData(painthelper)
 
-        root = self.makeObjects(painter, bounds, painthelper)
-        if root is None:
-            return self
-        scene, camera = self.makeScene(painter)
-
-        sizescale = self.settings.size
-        if sizescale == 'Auto':
-            sizescale = -1
-        widgetid = scene.idPixel(
-            root, painter, camera,
-            bounds[0], bounds[1], bounds[2], bounds[3], sizescale,
-            scaling, x, y)
+        pickdata = painthelper.getPickData(self)
+        if pickdata is not None:
+            # look up what was drawn in the last render
+            widgetid = pickdata[0].pickWidget(painter, scaling, x, y)
+        else:
+            root = self.makeObjects(painter, bounds, painthelper)
+            if root is None:
+                return self
+            scene, camera = self.makeScene(painter)
+
+            sizescale = self.settings.size
+            if sizescale == 'Auto':
+                sizescale = -1
+            widgetid = scene.idPixel(
+                root, painter, camera,
+                bounds[0], bounds[1], bounds[2], bounds[3], sizescale,
+                scaling, x, y)
 
         # recursive check id of children against returned value
         widget = [self]
@@ -153,7 +153,8 @@ class Surface3D(plotters3d.GenericPlotter3D):
                 cmap, s.DataColor.scaling,
                 cdata,
                 s.DataColor.min, s.DataColor.max,
-                s.Surface.transparency)
+                s.Surface.transparency,
+                cachekey=('surface3d', colordata.version))
             surfprop.setRGBs(colorimg)
 
         mesh = threed.DataMesh(
@@ -29,6 +29,17 @@ def _(text, disambiguation=None, context='VectorField'):
     """Translate text."""
     return qt.QCoreApplication.translate(context, text, disambiguation)
 
+def _thinStep(coords):
+    """Step to thin out coordinates, so they are at least a pixel apart."""
+    delta = N.abs(N.diff(coords))
+    delta = delta[N.isfinite(delta)]
+    if len(delta) == 0:
+        return 1
+    spacing = N.median(delta)
+    if spacing <= 0:
+        return 1
+    return max(1, int(N.ceil(1./spacing)))
+
 class VectorField(plotters.GenericPlotter):
     '''A plotter for plotting a vector field.'''
 
@@ -177,12 +188,20 @@ class VectorField(plotters.GenericPlotter):
         # get pixel coordinates
         xc, yc = data1.getPixelCentres()
         xc, yc = xc[:xw], yc[:yw]
-        xdsvals = N.reshape(N.tile(xc, yw), xw*yw)
-        ydsvals = N.reshape(N.tile(yc[:, N.newaxis], xw), xw*yw)
 
         # convert using axes to plotter values
-        xplotter = axes[0].dataToPlotterCoords(posn, xdsvals)
-        yplotter = axes[1].dataToPlotterCoords(posn, ydsvals)
+        xcplt = axes[0].dataToPlotterCoords(posn, xc)
+        ycplt = axes[1].dataToPlotterCoords(posn, yc)
+
+        # only plot vectors at least a pixel apart
+        xstep, ystep = _thinStep(xcplt), _thinStep(ycplt)
+        xcplt, ycplt = xcplt[::xstep], ycplt[::ystep]
+        data1st = data1st[:yw:ystep, :xw:xstep]
+        data2nd = data2nd[:yw:ystep, :xw:xstep]
+        yw, xw = data1st.shape
+
+        xplotter = N.tile(xcplt, yw)
+        yplotter = N.repeat(ycplt, xw)
 
         pen = s.Line.makeQPenWHide(painter)
         painter.setPen(pen)
@@ -226,15 +245,14 @@ class VectorField(plotters.GenericPlotter):
             if s.scalearrow:
                 arrowsizes = (arrowsize/baselength/2) * lengths
             else:
-                arrowsizes = N.zeros(lengths.shape) + arrowsize
-
-            for x, y, l, a, asize in zip(x2, y2, lengths, angles, arrowsizes):
-                if l != 0.:
-                    utils.plotLineArrow(
-                        painter, x, y, l, a, asize,
-                        arrowleft=s.arrowfront,
-                        arrowright=s.arrowback
-                    )
+                arrowsizes = arrowsize
+
+            utils.plotLineArrows(
+                painter, x2, y2, lengths, angles, arrowsizes,
+                arrowleft=s.arrowfront,
+                arrowright=s.arrowback,
+                clip=cliprect
+            )
 
 # allow the factory to instantiate a vector field
 document.thefactory.register(VectorField)